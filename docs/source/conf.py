@@ -22,7 +22,7 @@ copyright = '2022, Ben Dichter'
 author = 'Ben Dichter'
 
 # The short X.Y version
-version = '0.1.0'
+version = '0.3.0'
 
 # The full version, including alpha/beta/rc tags
 release = 'alpha'
@@ -24,10 +24,14 @@ if not os.path.exists(ndx_sound_specpath):
 load_namespaces(ndx_sound_specpath)
 
 # Make them accessible at the package level
+AcousticWaveformPreview = get_class("AcousticWaveformPreview", "ndx-sound")
 AcousticWaveformSeries = get_class("AcousticWaveformSeries", "ndx-sound")
+SegmentedAcousticWaveformSeries = get_class("SegmentedAcousticWaveformSeries", "ndx-sound")
 
-# set default value for data_unit
-for i, arg in enumerate(AcousticWaveformSeries.__init__.__docval__["args"]):
-    if arg["name"] == "unit":
-        AcousticWaveformSeries.__init__.__docval__["args"][i].update(default="n.a.")
-        continue
+# set default value for data_unit, keeping the optional arguments after the required ones
+for acoustic_waveform_class in (AcousticWaveformPreview, AcousticWaveformSeries, SegmentedAcousticWaveformSeries):
+    docval_args = acoustic_waveform_class.__init__.__docval__["args"]
+    unit_arg = next(arg for arg in docval_args if arg["name"] == "unit")
+    unit_arg.update(default="n.a.")
+    docval_args.remove(unit_arg)
+    docval_args.insert(next(i for i, arg in enumerate(docval_args) if "default" in arg), unit_arg)
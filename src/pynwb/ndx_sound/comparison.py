@@ -0,0 +1,177 @@
+"""Shared read and STFT scheduling for comparing several AcousticWaveformSeries in one time window."""
+
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from librosa import amplitude_to_db, stft
+import numpy as np
+from pynwb.file import TimeSeries
+
+from . import SegmentedAcousticWaveformSeries
+from .profiling import stage
+from .segments import read_filled_window
+from .utils import get_starting_time, read_samples, resample_ratio, time_to_index, to_mono
+
+
+@dataclass(frozen=True)
+class WindowedSpectrogram:
+    """
+    Samples and spectrogram of one series within a time window.
+
+    Attributes
+    ----------
+    name: str
+        Name of the series.
+    data: np.ndarray
+        Samples mixed down to mono, at `rate`.
+    rate: float
+        Sampling rate of `data` in Hz, after resampling if any.
+    starting_time: float
+        Time of the first sample in seconds.
+    spectrogram_db: np.ndarray
+        Amplitude spectrogram in dB, shape (1 + n_fft // 2, n_frames).
+    frame_times: np.ndarray
+        Time of the center of each frame in seconds, shape (n_frames,).
+    """
+
+    name: str
+    data: np.ndarray
+    rate: float
+    starting_time: float
+    spectrogram_db: np.ndarray
+    frame_times: np.ndarray
+
+
+def resample(data: np.ndarray, rate: float, target_rate: float, max_denominator: int = 1000) -> np.ndarray:
+    """
+    Resample a signal with a polyphase filter.
+
+    The ratio of the rates is approximated by a fraction with a denominator of at most
+    `max_denominator`, see `ndx_sound.utils.resample_ratio`.
+    """
+    if rate == target_rate or len(data) == 0:
+        return data
+    from scipy.signal import resample_poly
+
+    up, down = resample_ratio(rate, target_rate, max_denominator)
+    return resample_poly(data, up, down, axis=0)
+
+
+def _read_window(
+    time_series: TimeSeries, time_window: Tuple[float, float], max_workers: Optional[int] = None
+) -> Tuple[np.ndarray, float]:
+    if isinstance(time_series, SegmentedAcousticWaveformSeries):
+        # the gaps between segments are silent, so that frames line up with the time of the window
+        data, starting_time = read_filled_window(time_series, time_window, fill_value=0.0, max_workers=max_workers)
+        return np.nan_to_num(to_mono(data), nan=0.0), starting_time
+    istart = time_to_index(time_series, time_window[0])
+    istop = time_to_index(time_series, time_window[1])
+    data = np.nan_to_num(to_mono(read_samples(time_series, istart, istop, max_workers=max_workers)), nan=0.0)
+    return data, get_starting_time(time_series) + istart / time_series.rate
+
+
+def _count_frames(n_samples: int, n_fft: int, hop_length: int, center: bool) -> int:
+    """Number of frames of librosa.stft for `n_samples`, excluding the frames over the zero padding of the batch."""
+    if center:
+        return 1 + n_samples // hop_length
+    return max(0, 1 + (n_samples - n_fft) // hop_length)
+
+
+def _frame_centers(n_frames: int, n_fft: int, hop_length: int, center: bool) -> np.ndarray:
+    """Index of the sample at the center of each frame of librosa.stft."""
+    centers = np.arange(n_frames) * hop_length
+    return centers if center else centers + n_fft // 2
+
+
+def compute_spectrograms(
+    time_series_list: Sequence[TimeSeries],
+    time_window: Tuple[float, float],
+    n_fft: int = 1024,
+    rate: Optional[float] = None,
+    max_workers: Optional[int] = None,
+    stft_kwargs: dict = None,
+) -> List[WindowedSpectrogram]:
+    """
+    Read several series within one time window and compute their spectrograms in batches.
+
+    The windows of all series are read concurrently on a thread pool, and the chunks of each
+    window are decompressed concurrently, see `read_window`. Series that share a sampling rate
+    are stacked and transformed with a single call to librosa.stft, which reuses the window and
+    FFT setup across the batch. If `rate` is given, all series are first resampled to it, so
+    that they form a single batch with a common frequency axis. The gaps between the segments of
+    a SegmentedAcousticWaveformSeries are filled with silence.
+
+    Parameters
+    ----------
+    time_series_list: sequence of pynwb.file.TimeSeries
+    time_window: tuple
+        Start and stop time in seconds.
+    n_fft: int, optional
+        Default is 1024
+    rate: float, optional
+        Common sampling rate in Hz. Default is to keep the rate of each series.
+    max_workers: int, optional
+        Number of threads used to read the series, and the chunks of each series.
+    stft_kwargs: dict
+        kwargs passed to librosa.stft
+
+    Returns
+    -------
+    list of WindowedSpectrogram
+        In the order of `time_series_list`.
+    """
+    if stft_kwargs is None:
+        stft_kwargs = dict()
+    hop_length = stft_kwargs.get("hop_length", n_fft // 4)
+    center = stft_kwargs.get("center", True)
+
+    with stage("compute_spectrograms"):
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # run each read in a copy of the current context so that it is profiled as a nested stage
+            futures = [
+                executor.submit(contextvars.copy_context().run, _read_window, time_series, time_window, max_workers)
+                for time_series in time_series_list
+            ]
+            windows = [future.result() for future in futures]
+
+        rates = [time_series.rate for time_series in time_series_list]
+        if rate is not None:
+            with stage("resample"):
+                windows = [
+                    (resample(data, series_rate, rate), starting_time)
+                    for (data, starting_time), series_rate in zip(windows, rates)
+                ]
+            rates = [rate] * len(windows)
+
+        groups: Dict[float, List[int]] = dict()
+        for index, series_rate in enumerate(rates):
+            groups.setdefault(series_rate, []).append(index)
+
+        spectrograms = [None] * len(windows)
+        for group_rate, indices in groups.items():
+            lengths = [len(windows[index][0]) for index in indices]
+            batch = np.zeros((len(indices), max(max(lengths), 1)))
+            for row, index in enumerate(indices):
+                batch[row, : lengths[row]] = windows[index][0]
+
+            with stage("stft") as current:
+                magnitude = np.abs(stft(batch, n_fft=n_fft, **stft_kwargs))
+                # convert each series separately so that each has its own dB reference
+                batch_db = np.stack([amplitude_to_db(series_magnitude) for series_magnitude in magnitude])
+                current.record_array(batch_db)
+
+            for row, index in enumerate(indices):
+                data, starting_time = windows[index]
+                n_frames = _count_frames(lengths[row], n_fft, hop_length, center)
+                spectrograms[index] = WindowedSpectrogram(
+                    name=time_series_list[index].name,
+                    data=data,
+                    rate=group_rate,
+                    starting_time=starting_time,
+                    spectrogram_db=batch_db[row, :, :n_frames],
+                    frame_times=_frame_centers(n_frames, n_fft, hop_length, center) / group_rate + starting_time,
+                )
+
+    return spectrograms
@@ -0,0 +1,199 @@
+"""Batched inter-channel time-delay estimation with the generalized cross-correlation (GCC-PHAT)."""
+
+from dataclasses import dataclass
+from functools import partial
+from itertools import combinations
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+from pynwb.file import TimeSeries
+
+from . import SegmentedAcousticWaveformSeries
+from .profiling import stage
+from .utils import map_bounded, read_samples, time_to_index
+
+
+@dataclass(frozen=True)
+class TimeDelays:
+    """
+    Inter-channel time delays estimated in a set of windows.
+
+    Attributes
+    ----------
+    delays: np.ndarray
+        Delay in seconds of the second channel of each pair relative to the first, positive when
+        the second channel lags, shape (n_windows, n_pairs).
+    peak_values: np.ndarray
+        Height of the GCC-PHAT peak, between 0 and 1, as a measure of confidence, shape
+        (n_windows, n_pairs).
+    channel_pairs: np.ndarray
+        Channel indices of each pair, shape (n_pairs, 2).
+    windows: np.ndarray
+        Start and stop time of each window in seconds, shape (n_windows, 2).
+    """
+
+    delays: np.ndarray
+    peak_values: np.ndarray
+    channel_pairs: np.ndarray
+    windows: np.ndarray
+
+
+def gcc_phat(
+    frames: np.ndarray,
+    channel_pairs: np.ndarray,
+    max_lag: Optional[int] = None,
+    interp: int = 1,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Estimate the delays of a batch of multi-channel frames with GCC-PHAT.
+
+    All frames and channel pairs are transformed together: one real FFT per frame and channel,
+    and one inverse FFT per frame, pair and phase of the upsampling, of which only the lags
+    within `max_lag` are kept.
+
+    Parameters
+    ----------
+    frames: np.ndarray
+        Array of shape (n_frames, n_samples, n_channels), zero-padded to a common length.
+    channel_pairs: np.ndarray
+        Channel indices of each pair, shape (n_pairs, 2).
+    max_lag: int, optional
+        Largest absolute delay searched, in samples. Default is n_samples - 1.
+    interp: int, optional
+        Upsampling factor of the cross-correlation, for sub-sample delays. Default is 1.
+
+    Returns
+    -------
+    np.ndarray, np.ndarray
+        Delay in samples of the second channel of each pair relative to the first, and height
+        of the peak, both of shape (n_frames, n_pairs).
+    """
+    n_samples = frames.shape[1]
+    if max_lag is None:
+        max_lag = n_samples - 1
+    max_lag = min(max_lag, n_samples - 1)
+    # pad so that the circular cross-correlation equals the linear one
+    n_fft = 1 << int(np.ceil(np.log2(max(2 * n_samples, 2))))
+    spectra = np.fft.rfft(frames, n=n_fft, axis=1)
+
+    cross = spectra[:, :, channel_pairs[:, 1]] * np.conj(spectra[:, :, channel_pairs[:, 0]])
+    cross /= np.maximum(np.abs(cross), np.finfo(float).tiny)
+
+    # The cross-correlation upsampled by `interp` is evaluated one phase at a time: the lags
+    # interp * q + r of phase r are the inverse FFT of length n_fft of the cross-spectrum shifted
+    # by r / interp samples. Only the lags within max_lag are kept, so memory use does not grow
+    # with `interp`. Scaled so that the peak of identical frames is 1 whatever the upsampling.
+    n_lags = max_lag * interp
+    lags = np.arange(-n_lags, n_lags + 1)
+    q_lags = np.arange(-max_lag, max_lag + 1)
+    frequencies = np.arange(cross.shape[1])
+    phases = np.empty((interp, len(frames), len(q_lags), len(channel_pairs)))
+    for r in range(interp):
+        shifted = cross * np.exp(2j * np.pi * frequencies * r / (n_fft * interp))[None, :, None]
+        if interp > 1:
+            # the last bin is only the Nyquist frequency of the transform without upsampling
+            shifted[:, -1] *= 2
+        phases[r] = np.fft.irfft(shifted, n=n_fft, axis=1)[:, q_lags]
+    correlation = phases[lags % interp, :, lags // interp + max_lag].transpose(1, 0, 2)
+    peak = np.argmax(correlation, axis=1)
+    peak_values = np.take_along_axis(correlation, peak[:, None], axis=1)[:, 0]
+
+    # parabolic interpolation around the peak
+    below = np.take_along_axis(correlation, np.maximum(peak - 1, 0)[:, None], axis=1)[:, 0]
+    above = np.take_along_axis(correlation, np.minimum(peak + 1, 2 * n_lags)[:, None], axis=1)[:, 0]
+    curvature = below - 2 * peak_values + above
+    inner = (peak > 0) & (peak < 2 * n_lags) & (curvature < 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shift = np.where(inner, 0.5 * (below - above) / curvature, 0.0)
+
+    delays = (peak - n_lags + shift) / interp
+    return delays, peak_values
+
+
+def _read_windows(time_series: TimeSeries, bounds: np.ndarray, n_samples: int) -> np.ndarray:
+    """Read windows given by sample bounds into a zero-padded array of shape (n_windows, n_samples, n_channels)."""
+    n_channels = time_series.data.shape[1]
+    frames = np.zeros((len(bounds), n_samples, n_channels))
+    lengths = bounds[:, 1] - bounds[:, 0]
+    span_start, span_stop = bounds[:, 0].min(), bounds[:, 1].max()
+    if span_stop - span_start <= 2 * lengths.sum():
+        # read dense windows in one call
+        span = np.nan_to_num(read_samples(time_series, span_start, span_stop), nan=0.0)
+        for frame, (istart, istop) in zip(frames, bounds):
+            frame[: istop - istart] = span[istart - span_start: istop - span_start]
+    else:
+        for frame, (istart, istop) in zip(frames, bounds):
+            frame[: istop - istart] = np.nan_to_num(read_samples(time_series, istart, istop), nan=0.0)
+    return frames
+
+
+def estimate_delays(
+    time_series: TimeSeries,
+    windows: Sequence[Tuple[float, float]],
+    channel_pairs: Optional[Sequence[Tuple[int, int]]] = None,
+    max_delay: Optional[float] = None,
+    interp: int = 1,
+    batch_size: int = 256,
+    max_workers: Optional[int] = None,
+) -> TimeDelays:
+    """
+    Estimate the inter-channel time delays of a multi-channel series in a set of windows.
+
+    The windows are processed in batches of `batch_size`: the samples of a batch are read in
+    the calling thread, in a single read when the windows are close together, and the
+    cross-correlations of all windows and channel pairs of the batch are computed at once on a
+    thread pool, so that long files with many windows are processed with bounded memory.
+
+    Parameters
+    ----------
+    time_series: pynwb.file.TimeSeries
+        Series with data of shape (time, channels) with at least 2 channels.
+    windows: sequence of (float, float)
+        Start and stop time in seconds of each window, e.g. of detected events.
+    channel_pairs: sequence of (int, int), optional
+        Default is all pairs of channels.
+    max_delay: float, optional
+        Largest absolute delay searched, in seconds, e.g. the distance between the microphones
+        divided by the speed of sound. Default is the length of the longest window.
+    interp: int, optional
+        Upsampling factor of the cross-correlation, for sub-sample delays. Default is 1.
+    batch_size: int, optional
+        Number of windows processed at a time. Default is 256.
+    max_workers: int, optional
+        Number of threads used to transform, see `map_bounded`.
+
+    Returns
+    -------
+    TimeDelays
+    """
+    if isinstance(time_series, SegmentedAcousticWaveformSeries):
+        raise ValueError("Delays of a SegmentedAcousticWaveformSeries are not supported.")
+    shape = np.shape(time_series.data)
+    if len(shape) < 2 or shape[1] < 2:
+        raise ValueError("Estimating delays requires data of shape (time, channels) with at least 2 channels.")
+    if channel_pairs is None:
+        channel_pairs = list(combinations(range(shape[1]), 2))
+    channel_pairs = np.asarray(channel_pairs, dtype=int).reshape(-1, 2)
+
+    windows = np.asarray(windows, dtype=float).reshape(-1, 2)
+    bounds = np.array(
+        [[time_to_index(time_series, start), time_to_index(time_series, stop)] for start, stop in windows], dtype=int
+    ).reshape(-1, 2)
+    n_samples = max(1, int((bounds[:, 1] - bounds[:, 0]).max(initial=1)))
+    max_lag = None if max_delay is None else int(np.ceil(max_delay * time_series.rate))
+
+    delays = np.empty((len(windows), len(channel_pairs)))
+    peak_values = np.empty((len(windows), len(channel_pairs)))
+    with stage("estimate_delays"):
+        batches = [slice(batch_start, batch_start + batch_size) for batch_start in range(0, len(windows), batch_size)]
+        frames = (_read_windows(time_series, bounds[batch], n_samples) for batch in batches)
+        transform = partial(gcc_phat, channel_pairs=channel_pairs, max_lag=max_lag, interp=interp)
+        for batch, result in zip(batches, map_bounded(transform, frames, max_workers=max_workers)):
+            delays[batch], peak_values[batch] = result
+
+    return TimeDelays(
+        delays=delays / time_series.rate,
+        peak_values=peak_values,
+        channel_pairs=channel_pairs,
+        windows=windows,
+    )
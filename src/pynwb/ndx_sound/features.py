@@ -0,0 +1,278 @@
+"""Spectral features of an AcousticWaveformSeries computed from shared STFT frames in one chunked pass."""
+
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+from pynwb import NWBFile
+from pynwb.file import TimeSeries
+
+from . import SegmentedAcousticWaveformSeries
+from .profiling import stage
+from .utils import DEFAULT_CHUNK_SIZE, get_starting_time, iter_frames, map_bounded, power_to_db, time_to_index
+
+FEATURES = ("stft", "mel", "cqt", "band_power")
+
+# frequency of C1, the default lowest frequency of librosa.cqt
+CQT_FMIN = 32.70319566257483
+
+
+@dataclass(frozen=True)
+class SoundFeatures:
+    """
+    Features computed by `compute_features`.
+
+    Attributes
+    ----------
+    features: dict
+        Map from feature name to an array of shape (n_frames, n_values).
+    frequencies: dict
+        Map from feature name to the center frequency in Hz of each value. For "band_power",
+        an array of shape (n_bands, 2) with the edges of each band.
+    rate: float
+        Number of frames per second.
+    starting_time: float
+        Time of the start of the first frame in seconds.
+    parameters: dict
+        Parameters used to compute the features.
+    """
+
+    features: Dict[str, np.ndarray]
+    frequencies: Dict[str, np.ndarray]
+    rate: float
+    starting_time: float
+    parameters: dict = field(default_factory=dict)
+
+
+def mel_filterbank(sr: float, n_fft: int, n_mels: int = 128, fmin: float = 0.0, fmax: Optional[float] = None):
+    """Return the mel filterbank of shape (n_mels, 1 + n_fft // 2) and the center frequencies of its filters."""
+    from librosa import mel_frequencies
+    from librosa.filters import mel
+
+    weights = mel(sr=sr, n_fft=n_fft, n_mels=n_mels, fmin=fmin, fmax=fmax)
+    return weights, mel_frequencies(n_mels=n_mels + 2, fmin=fmin, fmax=fmax or sr / 2)[1:-1]
+
+
+def log_frequency_filterbank(
+    sr: float, n_fft: int, fmin: float = CQT_FMIN, n_bins: int = 84, bins_per_octave: int = 12
+):
+    """
+    Return a constant-Q filterbank of shape (n_bins, 1 + n_fft // 2) applied to STFT magnitudes.
+
+    Each filter is triangular on a log-frequency axis, centered on `fmin * 2 ** (k / bins_per_octave)`
+    and reaching zero at the neighbouring center frequencies. Filters narrower than the STFT resolution
+    fall back to the nearest STFT bin. Bins above the Nyquist frequency are dropped.
+    """
+    fft_frequencies = np.fft.rfftfreq(n_fft, d=1.0 / sr)
+    edges = fmin * 2.0 ** ((np.arange(n_bins + 2) - 1) / bins_per_octave)
+    n_bins = min(n_bins, int(np.searchsorted(edges, sr / 2)) - 1)
+    if n_bins < 1:
+        raise ValueError(f"fmin={fmin} is above the Nyquist frequency {sr / 2}.")
+    lower, center, upper = edges[:n_bins], edges[1:n_bins + 1], edges[2:n_bins + 2]
+
+    rising = (fft_frequencies - lower[:, None]) / (center - lower)[:, None]
+    falling = (upper[:, None] - fft_frequencies) / (upper - center)[:, None]
+    weights = np.maximum(0.0, np.minimum(rising, falling))
+
+    empty = weights.sum(axis=1) == 0
+    nearest = np.abs(fft_frequencies - center[:, None]).argmin(axis=1)
+    weights[empty, nearest[empty]] = 1.0
+
+    return weights / weights.sum(axis=1, keepdims=True), center
+
+
+def _frames_to_features(frames: np.ndarray, window: np.ndarray, filterbanks: dict) -> Dict[str, np.ndarray]:
+    magnitude = np.abs(np.fft.rfft(np.nan_to_num(frames, nan=0.0) * window, axis=-1))
+    power = magnitude**2
+    out = dict()
+    for name, weights in filterbanks.items():
+        if name == "stft":
+            out[name] = magnitude
+        elif name in ("mel", "band_power"):
+            out[name] = power @ weights.T
+        else:
+            out[name] = magnitude @ weights.T
+    return {name: value.astype("float32") for name, value in out.items()}
+
+
+def compute_features(
+    time_series: TimeSeries,
+    features: Iterable[str] = ("stft",),
+    n_fft: int = 1024,
+    hop_length: Optional[int] = None,
+    time_window: Optional[Tuple[float, float]] = None,
+    n_mels: int = 128,
+    cqt_fmin: float = CQT_FMIN,
+    cqt_n_bins: int = 84,
+    cqt_bins_per_octave: int = 12,
+    bands: Optional[Sequence[Tuple[float, float]]] = None,
+    to_db: bool = True,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_workers: Optional[int] = None,
+) -> SoundFeatures:
+    """
+    Compute several spectral features from shared STFT frames in a single chunked pass.
+
+    The data is read chunk by chunk in the calling thread, decompressing the chunks of Zarr
+    datasets in parallel, and the Fourier transforms and filterbanks of each chunk are computed
+    on a thread pool with `map_bounded`. Multi-channel data is mixed
+    down to mono. Frames are not centered, so frame `i` starts at `i * hop_length / rate`
+    seconds after the start of the window. Segmented series are not supported, as frames would
+    straddle the gaps between segments.
+
+    Parameters
+    ----------
+    time_series: pynwb.file.TimeSeries
+    features: iterable of str, optional
+        Any of "stft" (magnitude), "mel" (mel power), "cqt" (constant-Q magnitude on a
+        log-frequency filterbank) and "band_power" (power summed within `bands`).
+        Default is ("stft",).
+    n_fft: int, optional
+        Default is 1024
+    hop_length: int, optional
+        Default is n_fft // 4
+    time_window: tuple, optional
+        Start and stop time in seconds. Default is the entire series.
+    n_mels: int, optional
+        Default is 128
+    cqt_fmin: float, optional
+        Default is the frequency of C1
+    cqt_n_bins: int, optional
+        Default is 84
+    cqt_bins_per_octave: int, optional
+        Default is 12
+    bands: sequence of (float, float), optional
+        Low and high frequency in Hz of each band, or of a single band, required for "band_power".
+    to_db: bool, optional
+        Whether to convert "stft", "mel" and "cqt" to decibels. Default is True.
+    chunk_size: int, optional
+        Number of samples read at a time. Default is 2**20.
+    max_workers: int, optional
+        Number of threads used to read and to transform, see `map_bounded`.
+
+    Returns
+    -------
+    SoundFeatures
+    """
+    if isinstance(time_series, SegmentedAcousticWaveformSeries):
+        raise ValueError("Features of a SegmentedAcousticWaveformSeries are not supported.")
+    features = tuple(features)
+    unknown = set(features) - set(FEATURES)
+    if unknown:
+        raise ValueError(f"Unknown features {sorted(unknown)}, expected any of {FEATURES}.")
+    if hop_length is None:
+        hop_length = n_fft // 4
+    sr = time_series.rate
+
+    filterbanks = dict()
+    frequencies = dict()
+    if "stft" in features:
+        filterbanks["stft"] = None
+        frequencies["stft"] = np.fft.rfftfreq(n_fft, d=1.0 / sr)
+    if "mel" in features:
+        filterbanks["mel"], frequencies["mel"] = mel_filterbank(sr, n_fft, n_mels=n_mels)
+    if "cqt" in features:
+        filterbanks["cqt"], frequencies["cqt"] = log_frequency_filterbank(
+            sr, n_fft, fmin=cqt_fmin, n_bins=cqt_n_bins, bins_per_octave=cqt_bins_per_octave
+        )
+    if "band_power" in features:
+        if bands is None or np.size(bands) == 0:
+            raise ValueError("'bands' must be specified to compute 'band_power'.")
+        # a single band may be given as (low, high)
+        bands = np.atleast_2d(np.asarray(bands, dtype=float))
+        if bands.ndim != 2 or bands.shape[1] != 2 or not np.all(bands[:, 0] < bands[:, 1]):
+            raise ValueError(f"'bands' must be pairs of (low, high) frequencies with low < high, got {bands.tolist()}.")
+        fft_frequencies = np.fft.rfftfreq(n_fft, d=1.0 / sr)
+        filterbanks["band_power"] = (
+            (fft_frequencies >= bands[:, :1]) & (fft_frequencies < bands[:, 1:])
+        ).astype(float)
+        frequencies["band_power"] = bands
+
+    if time_window is not None:
+        istart, istop = time_to_index(time_series, time_window[0]), time_to_index(time_series, time_window[1])
+    else:
+        istart, istop = 0, len(time_series.data)
+
+    window = np.hanning(n_fft + 1)[:-1]
+    blocks = {name: [] for name in filterbanks}
+    with stage("compute_features"):
+        frame_blocks = iter_frames(
+            time_series, n_fft, hop_length, istart, istop, chunk_size=chunk_size, max_workers=max_workers
+        )
+        transform = partial(_frames_to_features, window=window, filterbanks=filterbanks)
+        for block in map_bounded(transform, frame_blocks, max_workers=max_workers):
+            for name, value in block.items():
+                blocks[name].append(value)
+
+    out = dict()
+    for name, values in blocks.items():
+        n_values = len(frequencies[name])
+        value = np.concatenate(values) if values else np.empty((0, n_values), dtype="float32")
+        if to_db and name == "mel":
+            value = power_to_db(value)
+        elif to_db and name in ("stft", "cqt"):
+            value = power_to_db(value**2, amin=1e-10)
+        out[name] = value.astype("float32")
+
+    return SoundFeatures(
+        features=out,
+        frequencies=frequencies,
+        rate=sr / hop_length,
+        starting_time=get_starting_time(time_series) + istart / sr,
+        parameters=dict(n_fft=n_fft, hop_length=hop_length, to_db=to_db, window="hann"),
+    )
+
+
+def add_features_to_nwbfile(
+    nwbfile: NWBFile,
+    sound_features: SoundFeatures,
+    source_name: str,
+    module_name: str = "sound_features",
+) -> Dict[str, TimeSeries]:
+    """
+    Add features computed by `compute_features` to a processing module of an NWBFile.
+
+    Each feature is stored as a TimeSeries named "{source_name}_{feature}" with one column
+    per frequency bin or band.
+
+    Parameters
+    ----------
+    nwbfile: pynwb.NWBFile
+    sound_features: SoundFeatures
+    source_name: str
+        Name of the AcousticWaveformSeries the features were computed from.
+    module_name: str, optional
+        Name of the processing module, created if it does not exist. Default is "sound_features".
+
+    Returns
+    -------
+    dict
+        Map from feature name to the TimeSeries that was added.
+    """
+    if module_name in nwbfile.processing:
+        module = nwbfile.processing[module_name]
+    else:
+        module = nwbfile.create_processing_module(name=module_name, description="acoustic features")
+
+    parameters = ", ".join(f"{key}={value}" for key, value in sound_features.parameters.items())
+    added = dict()
+    for name, value in sound_features.features.items():
+        in_db = sound_features.parameters.get("to_db", False) and name != "band_power"
+        frequencies = np.asarray(sound_features.frequencies[name])
+        frequency_description = (
+            "bands (Hz): " + ", ".join(f"{low:g}-{high:g}" for low, high in frequencies)
+            if frequencies.ndim == 2
+            else f"{len(frequencies)} bins from {frequencies[0]:.2f} to {frequencies[-1]:.2f} Hz"
+        )
+        added[name] = TimeSeries(
+            name=f"{source_name}_{name}",
+            data=value,
+            unit="dB" if in_db else "n.a.",
+            rate=sound_features.rate,
+            starting_time=sound_features.starting_time,
+            description=f"{name} of {source_name} with {parameters}; {frequency_description}",
+        )
+        module.add(added[name])
+
+    return added
@@ -0,0 +1,453 @@
+"""
+Audio fingerprints of AcousticWaveformSeries and a local index to find duplicated stimuli.
+
+A fingerprint is a set of hashes of pairs of spectral peaks, as in landmark-based audio
+identification: each hash encodes the frequencies of two peaks and the number of frames
+between them, and is stored with the frame of the first peak. Two series with the same content
+share most of their hashes at a constant frame offset, even with a different gain or some noise.
+"""
+
+from dataclasses import dataclass
+import os
+import sqlite3
+from typing import List, Optional, Union
+import weakref
+
+import h5py
+import numpy as np
+from pynwb import NWBHDF5IO
+from pynwb.file import TimeSeries
+
+from . import AcousticWaveformSeries
+from .profiling import stage
+from .utils import DEFAULT_CHUNK_SIZE, iter_frames
+
+FREQUENCY_BITS = 11
+DT_BITS = 10
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    """
+    Spectral-peak hashes of a series.
+
+    Attributes
+    ----------
+    hashes: np.ndarray
+        Hash of each pair of peaks, shape (n_hashes,).
+    times: np.ndarray
+        Frame of the first peak of each pair, shape (n_hashes,).
+    rate: float
+        Sampling rate of the series in Hz.
+    n_fft: int
+    hop_length: int
+    n_frames: int
+        Number of frames of the series.
+    """
+
+    hashes: np.ndarray
+    times: np.ndarray
+    rate: float
+    n_fft: int
+    hop_length: int
+    n_frames: int
+
+
+@dataclass(frozen=True)
+class FingerprintMatch:
+    """
+    Series of the index that matches a fingerprint.
+
+    Attributes
+    ----------
+    file_path: str
+        Path of the NWB file of the series.
+    data_path: str
+        Path of the data of the series within the file.
+    object_id: str
+        Object ID of the series.
+    score: float
+        Fraction of the hashes of the longer of the two fingerprints that match at the same
+        frame offset, 1.0 for identical series.
+    containment: float
+        Fraction of the hashes of the query that match at the same frame offset, 1.0 for
+        identical series and for excerpts of the matching series.
+    offset: float
+        Time of the start of the fingerprinted series within the matching series, in seconds.
+    """
+
+    file_path: str
+    data_path: str
+    object_id: str
+    score: float
+    containment: float
+    offset: float
+
+
+def _frame_peaks(frames: np.ndarray, window: np.ndarray, peaks_per_frame: int, min_db: float):
+    """Return the frame and frequency bin of the strongest local maxima of the spectrum of each frame."""
+    magnitude_db = 20 * np.log10(np.maximum(np.abs(np.fft.rfft(frames * window, axis=-1)), 1e-10))
+    is_peak = np.zeros(magnitude_db.shape, dtype=bool)
+    is_peak[:, 1:-1] = (magnitude_db[:, 1:-1] > magnitude_db[:, :-2]) & (magnitude_db[:, 1:-1] >= magnitude_db[:, 2:])
+    is_peak &= magnitude_db > np.maximum(magnitude_db.max(axis=1, keepdims=True) - 40.0, min_db)
+    strength = np.where(is_peak, magnitude_db, -np.inf)
+
+    n_peaks = min(peaks_per_frame, strength.shape[1])
+    bins = np.argpartition(-strength, n_peaks - 1, axis=1)[:, :n_peaks]
+    keep = np.isfinite(np.take_along_axis(strength, bins, axis=1))
+    frame_index = np.broadcast_to(np.arange(len(frames))[:, None], bins.shape)
+    return frame_index[keep], bins[keep]
+
+
+def compute_fingerprint(
+    time_series: TimeSeries,
+    n_fft: int = 2048,
+    hop_length: Optional[int] = None,
+    peaks_per_frame: int = 5,
+    fan_out: int = 10,
+    max_dt: int = 63,
+    min_db: float = -60.0,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Fingerprint:
+    """
+    Compute the spectral-peak hashes of a series in a single streaming pass.
+
+    The data is read chunk by chunk and mixed down to mono, and the strongest spectral peaks of
+    each frame are kept. Each peak is then paired with the peaks of the following frames.
+
+    Parameters
+    ----------
+    time_series: pynwb.file.TimeSeries
+    n_fft: int, optional
+        Default is 2048
+    hop_length: int, optional
+        Default is n_fft // 2
+    peaks_per_frame: int, optional
+        Maximum number of peaks per frame. Default is 5.
+    fan_out: int, optional
+        Number of peaks following each peak that are paired with it. Default is 10.
+    max_dt: int, optional
+        Maximum number of frames between the peaks of a pair, less than 2**10. Default is 63.
+    min_db: float, optional
+        Minimum magnitude of a peak in dB. Default is -60.0.
+    chunk_size: int, optional
+        Number of samples read at a time. Default is 2**20.
+
+    Returns
+    -------
+    Fingerprint
+    """
+    if hop_length is None:
+        hop_length = n_fft // 2
+    window = np.hanning(n_fft + 1)[:-1]
+    max_dt = min(max_dt, 2**DT_BITS - 1)
+
+    peak_frames, peak_bins = [], []
+    n_frames = 0
+    with stage("compute_fingerprint"):
+        for frames in iter_frames(time_series, n_fft, hop_length, chunk_size=chunk_size):
+            frame_index, bins = _frame_peaks(np.nan_to_num(frames, nan=0.0), window, peaks_per_frame, min_db)
+            peak_frames.append(frame_index + n_frames)
+            peak_bins.append(bins)
+            n_frames += len(frames)
+
+    peak_frames = np.concatenate(peak_frames) if peak_frames else np.empty(0, dtype=int)
+    peak_bins = np.concatenate(peak_bins) if peak_bins else np.empty(0, dtype=int)
+    order = np.lexsort((peak_bins, peak_frames))
+    peak_frames, peak_bins = peak_frames[order], peak_bins[order]
+    # keep the most significant bits of the frequency bins
+    peak_bins = peak_bins >> max(0, int(np.ceil(np.log2(n_fft // 2 + 1))) - FREQUENCY_BITS)
+
+    hashes, times = [], []
+    # peaks of the same frame are skipped, so look far enough ahead to find `fan_out` later peaks
+    for step in range(1, fan_out + peaks_per_frame):
+        anchors = np.arange(len(peak_frames) - step)
+        dt = peak_frames[anchors + step] - peak_frames[anchors]
+        anchors = anchors[(dt > 0) & (dt <= max_dt)]
+        dt = peak_frames[anchors + step] - peak_frames[anchors]
+        hashes.append(
+            (peak_bins[anchors].astype(np.uint32) << (FREQUENCY_BITS + DT_BITS))
+            | (peak_bins[anchors + step].astype(np.uint32) << DT_BITS)
+            | dt.astype(np.uint32)
+        )
+        times.append(peak_frames[anchors])
+
+    return Fingerprint(
+        hashes=np.concatenate(hashes) if hashes else np.empty(0, dtype=np.uint32),
+        times=np.concatenate(times).astype(np.int32) if times else np.empty(0, dtype=np.int32),
+        rate=float(time_series.rate),
+        n_fft=n_fft,
+        hop_length=hop_length,
+        n_frames=n_frames,
+    )
+
+
+class FingerprintIndex:
+    """
+    Fingerprints of many series stored in a local SQLite file, to find duplicated stimuli.
+
+    Parameters
+    ----------
+    path: str or os.PathLike
+        Path of the index file, created if it does not exist.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        self.path = str(path)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS series (
+                id INTEGER PRIMARY KEY,
+                file_path TEXT NOT NULL,
+                data_path TEXT NOT NULL,
+                object_id TEXT,
+                rate REAL NOT NULL,
+                n_fft INTEGER NOT NULL,
+                hop_length INTEGER NOT NULL,
+                n_hashes INTEGER NOT NULL,
+                UNIQUE (file_path, data_path)
+            );
+            CREATE TABLE IF NOT EXISTS hashes (
+                hash INTEGER NOT NULL,
+                series_id INTEGER NOT NULL REFERENCES series (id) ON DELETE CASCADE,
+                time INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS hashes_hash ON hashes (hash);
+            """
+        )
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM series").fetchone()[0]
+
+    def add(
+        self,
+        time_series: TimeSeries,
+        file_path: Optional[str] = None,
+        data_path: Optional[str] = None,
+        fingerprint: Optional[Fingerprint] = None,
+    ) -> int:
+        """
+        Fingerprint a series and add it to the index, replacing a previous entry for the same data.
+
+        Parameters
+        ----------
+        time_series: pynwb.file.TimeSeries
+        file_path: str, optional
+            Path of the NWB file. Default is the file of the data, if it was read from an HDF5 file.
+        data_path: str, optional
+            Path of the data within the file. Default is the path of the data, if it was read
+            from an HDF5 file.
+        fingerprint: Fingerprint, optional
+            Default is `compute_fingerprint(time_series)`.
+
+        Returns
+        -------
+        int
+            ID of the series in the index.
+        """
+        data = time_series.data
+        if isinstance(data, h5py.Dataset):
+            file_path = file_path or data.file.filename
+            data_path = data_path or data.name
+        if file_path is None or data_path is None:
+            raise ValueError("'file_path' and 'data_path' must be given for series that were not read from a file.")
+        if fingerprint is None:
+            fingerprint = compute_fingerprint(time_series)
+
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM hashes WHERE series_id IN (SELECT id FROM series WHERE file_path = ? AND data_path = ?)",
+                (os.path.abspath(file_path), data_path),
+            )
+            self.connection.execute(
+                "DELETE FROM series WHERE file_path = ? AND data_path = ?", (os.path.abspath(file_path), data_path)
+            )
+            series_id = self.connection.execute(
+                "INSERT INTO series (file_path, data_path, object_id, rate, n_fft, hop_length, n_hashes) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    os.path.abspath(file_path),
+                    data_path,
+                    time_series.object_id,
+                    fingerprint.rate,
+                    fingerprint.n_fft,
+                    fingerprint.hop_length,
+                    len(fingerprint.hashes),
+                ),
+            ).lastrowid
+            self.connection.executemany(
+                "INSERT INTO hashes (hash, series_id, time) VALUES (?, ?, ?)",
+                zip(fingerprint.hashes.tolist(), [series_id] * len(fingerprint.hashes), fingerprint.times.tolist()),
+            )
+        return series_id
+
+    def add_nwbfile(self, file_path: Union[str, os.PathLike]) -> List[int]:
+        """Add all AcousticWaveformSeries of the stimulus of an NWB file to the index."""
+        series_ids = []
+        with NWBHDF5IO(str(file_path), mode="r") as io:
+            nwbfile = io.read()
+            for time_series in nwbfile.stimulus.values():
+                if isinstance(time_series, AcousticWaveformSeries):
+                    series_ids.append(self.add(time_series))
+        return series_ids
+
+    def query(
+        self,
+        time_series_or_fingerprint: Union[TimeSeries, Fingerprint],
+        min_score: float = 0.25,
+        mode: str = "containment",
+    ) -> List[FingerprintMatch]:
+        """
+        Find the series of the index whose content matches a series.
+
+        Only series fingerprinted with the same rate, n_fft and hop_length are compared. The
+        hashes of the query are looked up in the index, and for each series the matching hashes
+        are counted at each frame offset between the two series.
+
+        Parameters
+        ----------
+        time_series_or_fingerprint: pynwb.file.TimeSeries or Fingerprint
+        min_score: float, optional
+            Minimum score of the matches. Default is 0.25.
+        mode: str, optional
+            "containment" to find the series that contain the query, e.g. the stimulus an excerpt
+            was cut from, with the `containment` of the matches, or "identity" to find copies of
+            the query, with their symmetric `score`, see FingerprintMatch. Default is
+            "containment".
+
+        Returns
+        -------
+        list of FingerprintMatch
+            In decreasing order of the score of `mode`.
+        """
+        if mode not in ("containment", "identity"):
+            raise ValueError(f"Unknown mode '{mode}', expected 'containment' or 'identity'.")
+        fingerprint = time_series_or_fingerprint
+        if not isinstance(fingerprint, Fingerprint):
+            fingerprint = compute_fingerprint(fingerprint)
+        if not len(fingerprint.hashes):
+            return []
+
+        with stage("FingerprintIndex.query"):
+            cursor = self.connection.cursor()
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS query (hash INTEGER NOT NULL, time INTEGER NOT NULL)")
+            cursor.execute("DELETE FROM query")
+            cursor.executemany(
+                "INSERT INTO query (hash, time) VALUES (?, ?)",
+                zip(fingerprint.hashes.tolist(), fingerprint.times.tolist()),
+            )
+            # the offset with the most votes of each series, the earliest one on ties
+            rows = cursor.execute(
+                """
+                SELECT series.file_path, series.data_path, series.object_id, series.n_hashes, best.offset, best.count
+                FROM (
+                    SELECT series_id, offset, count,
+                        ROW_NUMBER() OVER (PARTITION BY series_id ORDER BY count DESC, offset) AS rank
+                    FROM (
+                        SELECT hashes.series_id AS series_id, hashes.time - query.time AS offset, COUNT(*) AS count
+                        FROM query JOIN hashes ON hashes.hash = query.hash
+                        GROUP BY hashes.series_id, offset
+                    ) AS votes
+                ) AS best
+                JOIN series ON series.id = best.series_id
+                WHERE best.rank = 1 AND series.rate = ? AND series.n_fft = ? AND series.hop_length = ?
+                """,
+                (fingerprint.rate, fingerprint.n_fft, fingerprint.hop_length),
+            ).fetchall()
+            cursor.execute("DELETE FROM query")
+
+        matches = [
+            FingerprintMatch(
+                file_path=file_path,
+                data_path=data_path,
+                object_id=object_id,
+                score=count / max(n_hashes, len(fingerprint.hashes)),
+                containment=count / len(fingerprint.hashes),
+                offset=offset * fingerprint.hop_length / fingerprint.rate,
+            )
+            for file_path, data_path, object_id, n_hashes, offset, count in rows
+        ]
+
+        def get_score(match):
+            return match.containment if mode == "containment" else match.score
+
+        return sorted(
+            (match for match in matches if get_score(match) >= min_score), key=get_score, reverse=True
+        )
+
+
+def _equal_data(data, other, chunk_size: int = DEFAULT_CHUNK_SIZE) -> bool:
+    if data.shape != np.shape(other) or np.dtype(data.dtype) != np.dtype(other.dtype):
+        return False
+    equal_nan = np.dtype(data.dtype).kind == "f"
+    return all(
+        np.array_equal(data[start: start + chunk_size], other[start: start + chunk_size], equal_nan=equal_nan)
+        for start in range(0, len(data), chunk_size)
+    )
+
+
+def link_to_canonical(
+    time_series: TimeSeries,
+    index: FingerprintIndex,
+    min_score: float = 0.9,
+) -> TimeSeries:
+    """
+    Return a copy of a series whose data links to the data of an identical series of the index.
+
+    The matches of the index are compared sample by sample with the series, from the best
+    one, and the first identical one is linked. When the returned series is written, its data
+    is stored as an HDF5 external link to the canonical copy instead of being duplicated. If no
+    series of the index is identical, the series is returned unchanged.
+
+    The returned series owns the canonical file, which is opened for reading and must stay in
+    place: the file is closed when the series is garbage collected, or can be closed with
+    `linked.data.data.file.close()` once the series is written. The files of the other matches
+    are closed before returning.
+
+    Parameters
+    ----------
+    time_series: pynwb.file.TimeSeries
+        Series that was not written yet.
+    index: FingerprintIndex
+    min_score: float, optional
+        Minimum symmetric score of the match, see FingerprintMatch. Default is 0.9.
+
+    Returns
+    -------
+    pynwb.file.TimeSeries
+    """
+    from hdmf.backends.hdf5 import H5DataIO
+
+    for match in index.query(time_series, min_score=min_score, mode="identity"):
+        canonical_file = h5py.File(match.file_path, "r")
+        try:
+            canonical_data = canonical_file[match.data_path]
+            identical = _equal_data(canonical_data, time_series.data)
+        except BaseException:
+            canonical_file.close()
+            raise
+        if identical:
+            break
+        canonical_file.close()
+    else:
+        return time_series
+
+    cls = type(time_series)
+    arg_names = {arg["name"] for arg in cls.__init__.__docval__["args"]}
+    # the preview belongs to the original series
+    arg_names.discard("preview")
+    kwargs = {key: value for key, value in time_series.fields.items() if key in arg_names}
+    kwargs.update(name=time_series.name, data=H5DataIO(data=canonical_data, link_data=True))
+    linked = cls(**kwargs)
+    weakref.finalize(linked, canonical_file.close)
+    return linked
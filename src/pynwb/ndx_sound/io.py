@@ -0,0 +1,88 @@
+"""Audio-aware dataset layout for writing AcousticWaveformSeries with the HDF5 or Zarr backend."""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+IO_BACKENDS = ("hdf5", "zarr")
+
+
+def get_audio_chunk_shape(
+    data_shape: Tuple[int, ...],
+    dtype,
+    chunk_mb: float = 1.0,
+) -> Tuple[int, ...]:
+    """
+    Return a chunk shape suited to reading windows of audio.
+
+    Each chunk holds all channels of a contiguous run of samples, so that a time window is read
+    from as few chunks as possible, and the number of samples per chunk is the largest power of
+    two within `chunk_mb`, so that chunk boundaries line up with power-of-two STFT frames.
+
+    Parameters
+    ----------
+    data_shape: tuple of int
+        Shape (time,) or (time, channels) of the data.
+    dtype
+        Dtype of the data.
+    chunk_mb: float, optional
+        Maximum uncompressed size of a chunk in MB. Default is 1.0.
+
+    Returns
+    -------
+    tuple of int
+    """
+    n_channels = int(np.prod(data_shape[1:], dtype=int))
+    bytes_per_sample = n_channels * np.dtype(dtype).itemsize
+    n_samples = 2 ** int(np.floor(np.log2(max(1.0, chunk_mb * 1e6 / bytes_per_sample))))
+    return (max(1, min(n_samples, data_shape[0])), *data_shape[1:])
+
+
+def wrap_data(
+    data,
+    backend: str = "hdf5",
+    chunk_mb: float = 1.0,
+    chunks: Optional[Tuple[int, ...]] = None,
+    compression: bool = True,
+):
+    """
+    Wrap data for an AcousticWaveformSeries with the chunking and compression of a backend.
+
+    With the "hdf5" backend, the data is compressed with gzip after byte shuffling. With the
+    "zarr" backend, it is compressed with Blosc/zstd after byte shuffling, which decompresses
+    without holding the GIL so that chunks can be read in parallel threads.
+
+    Parameters
+    ----------
+    data: np.ndarray or hdmf.data_utils.AbstractDataChunkIterator
+    backend: str, optional
+        "hdf5" (NWBHDF5IO) or "zarr" (hdmf_zarr.NWBZarrIO). Default is "hdf5".
+    chunk_mb: float, optional
+        Maximum uncompressed size of a chunk in MB, see `get_audio_chunk_shape`. Default is 1.0.
+    chunks: tuple of int, optional
+        Chunk shape. Default is `get_audio_chunk_shape(data.shape, data.dtype, chunk_mb)`.
+    compression: bool, optional
+        Default is True.
+
+    Returns
+    -------
+    hdmf.backends.hdf5.H5DataIO or hdmf_zarr.ZarrDataIO
+    """
+    if backend not in IO_BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {IO_BACKENDS}.")
+    if chunks is None:
+        shape = data.maxshape if hasattr(data, "maxshape") else np.shape(data)
+        chunks = get_audio_chunk_shape(shape, data.dtype, chunk_mb=chunk_mb)
+
+    if backend == "zarr":
+        from hdmf_zarr import ZarrDataIO
+        from numcodecs import Blosc
+
+        compressor = Blosc(cname="zstd", clevel=5, shuffle=Blosc.SHUFFLE) if compression else None
+        return ZarrDataIO(data=data, chunks=chunks, compressor=compressor)
+
+    from hdmf.backends.hdf5 import H5DataIO
+
+    if compression:
+        return H5DataIO(data=data, chunks=chunks, compression="gzip", shuffle=True)
+    return H5DataIO(data=data, chunks=chunks)
@@ -0,0 +1,243 @@
+"""
+Dask-backed lazy view of AcousticWaveformSeries data and chunked versions of its operations.
+
+The dask arrays returned here are picklable when the data is an HDF5 dataset or a Zarr array, so
+they can be computed with the multi-process scheduler, e.g. `.compute(scheduler="processes")`.
+"""
+
+from typing import Optional, Tuple
+
+import dask.array as da
+import h5py
+import numpy as np
+from pynwb.file import TimeSeries
+
+from . import SegmentedAcousticWaveformSeries
+from .utils import resample_margin, resample_ratio, time_to_index, to_mono
+
+
+class _HDF5DatasetReader:
+    """
+    Picklable stand-in for an h5py.Dataset that reopens the file in each process.
+
+    The reader reads from the dataset it was created with, whose file belongs to the caller.
+    Unpickled copies open the file on their first read and close it when they are closed or
+    garbage collected.
+    """
+
+    def __init__(self, dataset: h5py.Dataset):
+        self.filename = dataset.file.filename
+        self.name = dataset.name
+        self.shape = dataset.shape
+        self.dtype = dataset.dtype
+        self.ndim = dataset.ndim
+        self._dataset = dataset
+        self._file = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_dataset"] = None
+        state["_file"] = None
+        return state
+
+    def __getitem__(self, item):
+        if self._dataset is None:
+            self._file = h5py.File(self.filename, "r")
+            self._dataset = self._file[self.name]
+        return self._dataset[item]
+
+    def close(self):
+        """Close the file opened by this reader, if any."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._dataset = None
+
+    def __del__(self):
+        self.close()
+
+
+def as_dask_array(time_series: TimeSeries, chunks=None, in_units: bool = False) -> da.Array:
+    """
+    Return the data of a TimeSeries as a dask array whose chunks line up with the stored chunks.
+
+    Segmented series are not supported, as the operations of this module assume evenly spaced samples.
+
+    Parameters
+    ----------
+    time_series: pynwb.file.TimeSeries
+    chunks: optional
+        Chunks of the dask array. Default is the chunks of the HDF5 or Zarr dataset, grouped so
+        that each dask chunk holds about 2**20 samples, or 2**20 samples for in-memory data.
+    in_units: bool, optional
+        Whether to apply the conversion and offset of the TimeSeries. Default is False.
+
+    Returns
+    -------
+    dask.array.Array
+    """
+    if isinstance(time_series, SegmentedAcousticWaveformSeries):
+        raise ValueError("Dask arrays of a SegmentedAcousticWaveformSeries are not supported.")
+    data = time_series.data
+    if isinstance(data, h5py.Dataset):
+        source = _HDF5DatasetReader(data)
+    else:
+        source = data
+
+    if chunks is None:
+        stored_chunks = getattr(data, "chunks", None)
+        if stored_chunks:
+            chunk_length = stored_chunks[0] * max(1, 2**20 // stored_chunks[0])
+        else:
+            chunk_length = 2**20
+        chunks = (chunk_length, *np.shape(data)[1:])
+
+    array = da.from_array(source, chunks=chunks, lock=False, asarray=True)
+    if in_units:
+        array = array.astype(float) * time_series.conversion + getattr(time_series, "offset", 0.0)
+    return array
+
+
+def select_time_window(array: da.Array, time_series: TimeSeries, time_window: Tuple[float, float]) -> da.Array:
+    """Return the samples of `array` within a time window, using the timing of `time_series`."""
+    return array[time_to_index(time_series, time_window[0]): time_to_index(time_series, time_window[1])]
+
+
+def _to_mono(array: da.Array) -> da.Array:
+    """Mix down to a single channel with `utils.to_mono`, averaging the channels and ignoring NaNs."""
+    array = array.astype(float)
+    if array.ndim == 1:
+        return array
+    return array.rechunk({1: -1}).map_blocks(to_mono, drop_axis=1, dtype=float)
+
+
+def _rechunk_to_multiple(array: da.Array, multiple: int, minimum: int) -> da.Array:
+    """
+    Rechunk the first axis so that every chunk but the last has a length that is a multiple of
+    `multiple`, and every chunk is at least `minimum` long, as map_overlap requires.
+    """
+    n_samples = array.shape[0]
+    chunk_length = -(-max(array.chunks[0][0], minimum) // multiple) * multiple
+    lengths = [chunk_length] * (n_samples // chunk_length)
+    if n_samples % chunk_length:
+        if lengths and n_samples % chunk_length < minimum:
+            lengths[-1] += n_samples % chunk_length
+        else:
+            lengths.append(n_samples % chunk_length)
+    if tuple(lengths) == array.chunks[0]:
+        return array
+    return array.rechunk({0: tuple(lengths)})
+
+
+def spectrogram_db(
+    array: da.Array,
+    n_fft: int = 1024,
+    hop_length: Optional[int] = None,
+    amin: float = 1e-5,
+    top_db: Optional[float] = 80.0,
+) -> da.Array:
+    """
+    Amplitude spectrogram in dB, computed chunk by chunk with map_overlap.
+
+    Equivalent to `librosa.amplitude_to_db(np.abs(librosa.stft(data, n_fft=n_fft)))`: frames
+    are centered, the signal is padded with zeros and windowed with a periodic Hann window.
+    Multi-channel data is mixed down to mono ignoring NaNs, as with `utils.to_mono`, and the
+    remaining NaNs are replaced with zeros.
+
+    Parameters
+    ----------
+    array: dask.array.Array
+        Array of shape (time,) or (time, channels).
+    n_fft: int, optional
+        Default is 1024
+    hop_length: int, optional
+        Default is n_fft // 4
+    amin: float, optional
+        Default is 1e-5
+    top_db: float, optional
+        Default is 80.0
+
+    Returns
+    -------
+    dask.array.Array
+        Array of shape (n_frames, 1 + n_fft // 2).
+    """
+    if hop_length is None:
+        hop_length = n_fft // 4
+    depth = n_fft // 2
+    array = _rechunk_to_multiple(da.nan_to_num(_to_mono(array)), hop_length, depth)
+    window = np.hanning(n_fft + 1)[:-1]
+    lengths = array.chunks[0]
+    # frames are centered on multiples of hop_length, the last chunk also holds the frame at its end
+    n_frames = tuple(
+        -(-length // hop_length) if i < len(lengths) - 1 else 1 + length // hop_length
+        for i, length in enumerate(lengths)
+    )
+
+    def block_spectrogram(block, block_info=None):
+        index = block_info[0]["chunk-location"][0]
+        frames = np.lib.stride_tricks.sliding_window_view(block, n_fft)[::hop_length][: n_frames[index]]
+        return np.abs(np.fft.rfft(frames * window, axis=-1))
+
+    magnitude = da.map_overlap(
+        block_spectrogram,
+        array,
+        depth={0: depth},
+        boundary={0: 0},
+        trim=False,
+        chunks=(n_frames, (1 + n_fft // 2,)),
+        new_axis=1,
+        dtype=float,
+        meta=np.empty((0, 0)),
+    )
+    db = 20.0 * da.log10(da.maximum(amin, magnitude))
+    if top_db is not None:
+        db = da.maximum(db, db.max() - top_db)
+    return db
+
+
+def resample(array: da.Array, rate: float, target_rate: float, max_denominator: int = 1000) -> da.Array:
+    """
+    Resample with a polyphase filter, computed chunk by chunk with map_overlap.
+
+    Equivalent to scipy.signal.resample_poly applied to the entire array, with the ratio of the
+    rates approximated with `ndx_sound.utils.resample_ratio`.
+
+    Parameters
+    ----------
+    array: dask.array.Array
+        Array of shape (time,) or (time, channels).
+    rate: float
+    target_rate: float
+    max_denominator: int, optional
+        Default is 1000
+
+    Returns
+    -------
+    dask.array.Array
+    """
+    from scipy.signal import resample_poly
+
+    up, down = resample_ratio(rate, target_rate, max_denominator)
+    if up == down:
+        return array
+    depth = resample_margin(up, down)
+    array = _rechunk_to_multiple(array.astype(float), down, depth)
+    out_depth = depth * up // down
+    out_lengths = tuple(-(-length * up // down) for length in array.chunks[0])
+
+    def block_resample(block, block_info=None):
+        index = block_info[0]["chunk-location"][0]
+        out = resample_poly(block, up, down, axis=0)
+        return out[out_depth: out_depth + out_lengths[index]]
+
+    return da.map_overlap(
+        block_resample,
+        array,
+        depth={0: depth, **{axis: 0 for axis in range(1, array.ndim)}},
+        boundary={0: 0, **{axis: "none" for axis in range(1, array.ndim)}},
+        trim=False,
+        chunks=(out_lengths, *array.chunks[1:]),
+        dtype=float,
+        meta=np.empty((0,) * array.ndim),
+    )
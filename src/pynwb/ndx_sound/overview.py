@@ -0,0 +1,149 @@
+"""Full-length overview of an AcousticWaveformSeries, computed in a single streaming pass."""
+
+from dataclasses import dataclass
+from typing import Optional
+import weakref
+
+import numpy as np
+from pynwb.file import TimeSeries
+
+from . import SegmentedAcousticWaveformSeries
+from .profiling import stage
+from .segments import get_segment_times, iter_filled_chunks
+from .utils import DEFAULT_CHUNK_SIZE, get_starting_time, iter_chunks, power_to_db, to_mono
+
+_OVERVIEW_CACHE = weakref.WeakKeyDictionary()
+
+
+@dataclass(frozen=True)
+class SoundOverview:
+    """
+    Decimated waveform envelope and low-resolution spectrogram of an entire recording.
+
+    Attributes
+    ----------
+    bin_times: np.ndarray
+        Start time of each overview bin in seconds, shape (n_bins,). The bins of a
+        SegmentedAcousticWaveformSeries span the gaps between segments, where they are NaN.
+    bin_duration: float
+        Duration of each overview bin in seconds.
+    envelope_min: np.ndarray
+        Minimum sample value within each bin, shape (n_bins,).
+    envelope_max: np.ndarray
+        Maximum sample value within each bin, shape (n_bins,).
+    frequencies: np.ndarray
+        Frequencies of the spectrogram rows in Hz, shape (n_freqs,).
+    spectrogram_db: np.ndarray
+        Average power within each bin in dB, shape (n_freqs, n_bins).
+    """
+
+    bin_times: np.ndarray
+    bin_duration: float
+    envelope_min: np.ndarray
+    envelope_max: np.ndarray
+    frequencies: np.ndarray
+    spectrogram_db: np.ndarray
+
+
+def compute_overview(
+    time_series: TimeSeries,
+    n_bins: int = 2000,
+    n_fft: int = 256,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    use_cache: bool = True,
+    max_workers: Optional[int] = None,
+) -> SoundOverview:
+    """
+    Compute a decimated envelope and a low-resolution spectrogram of the whole series.
+
+    The data is read exactly once, chunk by chunk, so memory use is bounded by `chunk_size`
+    regardless of the length of the recording. Multi-channel data is mixed down to mono.
+    The spectrogram of each bin is the average power of the non-overlapping `n_fft` frames
+    it contains. Results are cached per series and parameters.
+
+    The bins of a SegmentedAcousticWaveformSeries cover the time from the onset of the first
+    segment to the offset of the last one, and only the segments are read. Bins that fall
+    entirely in a gap are NaN, and gaps count as silence in the spectrogram of the other bins.
+
+    Parameters
+    ----------
+    time_series: pynwb.file.TimeSeries
+    n_bins: int, optional
+        Maximum number of bins of the overview. Default is 2000.
+    n_fft: int, optional
+        Frame length of the spectrogram. Reduced to the bin length for short recordings. Default is 256.
+    chunk_size: int, optional
+        Approximate number of samples read at a time. Default is 2**20.
+    use_cache: bool, optional
+        Whether to return a previously computed overview. Default is True.
+    max_workers: int, optional
+        Number of threads used to read the chunks of Zarr datasets, see `read_window`.
+
+    Returns
+    -------
+    SoundOverview
+    """
+    key = (n_bins, n_fft, chunk_size)
+    if use_cache:
+        cached = _OVERVIEW_CACHE.get(time_series, {}).get(key)
+        if cached is not None:
+            return cached
+
+    if len(time_series.data) == 0:
+        raise ValueError("Cannot compute the overview of an empty series.")
+    segmented = isinstance(time_series, SegmentedAcousticWaveformSeries)
+    if segmented:
+        onsets, offsets = get_segment_times(time_series)
+        starting_time = float(onsets[0])
+        n_samples = int(np.ceil((offsets[-1] - onsets[0]) * time_series.rate))
+        read_chunks = iter_filled_chunks
+    else:
+        starting_time = get_starting_time(time_series)
+        n_samples = len(time_series.data)
+        read_chunks = iter_chunks
+
+    samples_per_bin = int(np.ceil(n_samples / n_bins))
+    n_bins = int(np.ceil(n_samples / samples_per_bin))
+    frame_length = min(n_fft, samples_per_bin)
+    frames_per_bin = samples_per_bin // frame_length
+    window = np.hanning(frame_length)
+    # read whole bins at a time so that no bin straddles two chunks
+    chunk_size = max(1, chunk_size // samples_per_bin) * samples_per_bin
+
+    envelope_min = np.full(n_bins, np.nan)
+    envelope_max = np.full(n_bins, np.nan)
+    power = np.full((frame_length // 2 + 1, n_bins), np.nan)
+
+    with stage("compute_overview"):
+        for chunk_start, chunk in read_chunks(time_series, chunk_size=chunk_size, max_workers=max_workers):
+            chunk = to_mono(chunk)
+            first_bin = chunk_start // samples_per_bin
+            n_chunk_bins = int(np.ceil(len(chunk) / samples_per_bin))
+            padded = np.full(n_chunk_bins * samples_per_bin, np.nan)
+            padded[: len(chunk)] = chunk
+            bins = padded.reshape(n_chunk_bins, samples_per_bin)
+
+            bin_slice = slice(first_bin, first_bin + n_chunk_bins)
+            envelope_min[bin_slice] = np.fmin.reduce(bins, axis=1)
+            envelope_max[bin_slice] = np.fmax.reduce(bins, axis=1)
+
+            frames = bins[:, : frames_per_bin * frame_length].reshape(n_chunk_bins, frames_per_bin, frame_length)
+            frames = np.nan_to_num(frames, nan=0.0) * window
+            power[:, bin_slice] = (np.abs(np.fft.rfft(frames, axis=-1)) ** 2).mean(axis=1).T
+            if segmented:
+                # bins that fall entirely in a gap are blank rather than silent
+                power[:, bin_slice][:, np.isnan(bins).all(axis=1)] = np.nan
+
+    overview = SoundOverview(
+        bin_times=np.arange(n_bins) * samples_per_bin / time_series.rate + starting_time,
+        bin_duration=samples_per_bin / time_series.rate,
+        envelope_min=envelope_min,
+        envelope_max=envelope_max,
+        frequencies=np.fft.rfftfreq(frame_length, d=1.0 / time_series.rate),
+        spectrogram_db=power_to_db(power),
+    )
+    if use_cache:
+        _OVERVIEW_CACHE.setdefault(time_series, {})[key] = overview
+
+    return overview
+
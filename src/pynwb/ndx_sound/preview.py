@@ -0,0 +1,149 @@
+"""Low-bitrate preview of an AcousticWaveformSeries for quick playback and browsing."""
+
+from typing import Optional, Tuple
+
+from hdmf.data_utils import GenericDataChunkIterator
+import numpy as np
+from pynwb.file import TimeSeries
+
+from . import AcousticWaveformPreview, SegmentedAcousticWaveformSeries
+from .overview import compute_overview
+from .utils import (
+    DEFAULT_CHUNK_SIZE,
+    get_starting_time,
+    mu_law_encode,
+    read_samples,
+    resample_margin,
+    resample_ratio,
+    to_mono,
+)
+
+DEFAULT_PREVIEW_RATE = 8000.0
+
+
+def _full_scale(time_series: TimeSeries) -> float:
+    """Largest absolute value of the series in its units, from the dtype for integer data."""
+    dtype = np.dtype(time_series.data.dtype)
+    if dtype.kind in "iu":
+        info = np.iinfo(dtype)
+        conversion = time_series.conversion if time_series.conversion is not None else 1.0
+        extremes = np.array([info.min, info.max], dtype=float) * conversion + getattr(time_series, "offset", 0.0)
+    else:
+        overview = compute_overview(time_series)
+        extremes = np.concatenate([overview.envelope_min, overview.envelope_max])
+    full_scale = np.nanmax(np.abs(extremes)) if np.isfinite(extremes).any() else 0.0
+    return float(full_scale) or 1.0
+
+
+class PreviewDataChunkIterator(GenericDataChunkIterator):
+    """
+    Compute the mu-law codes of a preview while it is written.
+
+    The series is mixed down to mono, resampled with a polyphase filter and encoded with the
+    mu-law. Each buffer is computed independently from the samples it covers, plus a margin the
+    length of the filter on each side, so the result is the same as if the whole series had been
+    resampled at once and memory use is bounded by the buffer size.
+    """
+
+    def __init__(
+        self,
+        time_series: TimeSeries,
+        rate: float = DEFAULT_PREVIEW_RATE,
+        full_scale: Optional[float] = None,
+        max_denominator: int = 1000,
+        **kwargs
+    ):
+        self.time_series = time_series
+        self.n_input_samples = len(time_series.data)
+        self.up, self.down = resample_ratio(time_series.rate, min(rate, time_series.rate), max_denominator)
+        self.rate = time_series.rate * self.up / self.down
+        self.full_scale = _full_scale(time_series) if full_scale is None else full_scale
+        self.margin = resample_margin(self.up, self.down)
+        self.n_samples = -(-self.n_input_samples * self.up // self.down)
+
+        if "buffer_gb" not in kwargs:
+            kwargs.setdefault("chunk_shape", (max(1, min(self.n_samples, 2**16)),))
+            kwargs.setdefault("buffer_shape", (max(1, min(self.n_samples, DEFAULT_CHUNK_SIZE)),))
+        super().__init__(**kwargs)
+
+    def _get_maxshape(self) -> Tuple[int, ...]:
+        return (self.n_samples,)
+
+    def _get_dtype(self) -> np.dtype:
+        return np.dtype("uint8")
+
+    def _get_data(self, selection: Tuple[slice]) -> np.ndarray:
+        from scipy.signal import resample_poly
+
+        start, stop, _ = selection[0].indices(self.n_samples)
+        if stop <= start:
+            return np.empty(0, dtype="uint8")
+        # input samples [istart, istop) cover the selection; istart is a multiple of `down`
+        istart = start // self.up * self.down
+        istop = min(self.n_input_samples, -(-stop * self.down // self.up))
+        read_start = max(0, istart - self.margin)
+        read_stop = min(self.n_input_samples, istop + self.margin)
+
+        samples = np.zeros(istop - istart + 2 * self.margin)
+        data = np.nan_to_num(to_mono(read_samples(self.time_series, read_start, read_stop)), nan=0.0)
+        samples[read_start - istart + self.margin: read_stop - istart + self.margin] = data
+        resampled = resample_poly(samples, self.up, self.down) if self.up != self.down else samples
+
+        first = start - (istart - self.margin) * self.up // self.down
+        return mu_law_encode(resampled[first: first + stop - start] / self.full_scale)
+
+
+def create_preview(
+    time_series: TimeSeries,
+    rate: float = DEFAULT_PREVIEW_RATE,
+    full_scale: Optional[float] = None,
+    **kwargs
+) -> AcousticWaveformPreview:
+    """
+    Create an 8-bit mu-law preview of a series, mixed down to mono and downsampled.
+
+    The codes are computed while the preview is written, from the samples of the series, so its
+    data must support slicing. At the default rate, a preview of 16-bit stereo data sampled at
+    44.1 kHz is less than 5% of the size of the data.
+
+    Parameters
+    ----------
+    time_series: pynwb.file.TimeSeries
+    rate: float, optional
+        Sampling rate of the preview in Hz, at most the rate of the series. Default is 8000.0.
+    full_scale: float, optional
+        Value of the series, in its units, encoded by the highest code. Default is the largest
+        value of the dtype for integer data and the largest absolute value of the data otherwise.
+    **kwargs
+        Additional keyword arguments to pass to PreviewDataChunkIterator.
+
+    Returns
+    -------
+    AcousticWaveformPreview
+    """
+    if isinstance(time_series, SegmentedAcousticWaveformSeries):
+        raise ValueError("Previews of a SegmentedAcousticWaveformSeries are not supported.")
+    data = PreviewDataChunkIterator(time_series, rate=rate, full_scale=full_scale, **kwargs)
+    return AcousticWaveformPreview(
+        name="preview",
+        data=data,
+        rate=data.rate,
+        starting_time=get_starting_time(time_series),
+        conversion=data.full_scale,
+        description=f"8-bit mu-law preview of {time_series.name}",
+    )
+
+
+def add_preview(time_series: TimeSeries, rate: float = DEFAULT_PREVIEW_RATE, **kwargs) -> AcousticWaveformPreview:
+    """Create a preview with `create_preview` and add it to the series, before the series is written."""
+    preview = create_preview(time_series, rate=rate, **kwargs)
+    time_series.preview = preview
+    return preview
+
+
+def get_playback_series(time_series: TimeSeries, full_fidelity: bool = False) -> TimeSeries:
+    """Return the preview of a series if it has one and `full_fidelity` is False, else the series itself."""
+    preview = getattr(time_series, "preview", None)
+    if full_fidelity or preview is None:
+        return time_series
+    return preview
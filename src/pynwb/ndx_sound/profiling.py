@@ -0,0 +1,193 @@
+"""
+Lightweight instrumentation of the I/O and plotting hot paths of ndx-sound.
+
+Timings are only recorded inside a `profile()` block or when the environment variable
+`NDX_SOUND_PROFILE` is set to a non-empty value other than "0", in which case every
+completed stage is also logged as JSON to the "ndx_sound.profiling" logger.
+
+>>> from ndx_sound.profiling import profile
+>>> with profile() as profiler:
+...     plot_sound(acoustic_waveform_series, time_window=(5, 15))
+>>> print(profiler.report())
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+PROFILE_ENV_VAR = "NDX_SOUND_PROFILE"
+
+logger = logging.getLogger("ndx_sound.profiling")
+
+_active_profilers: List["Profiler"] = []
+_active_profilers_lock = threading.Lock()
+_current_stage: ContextVar[Optional["Stage"]] = ContextVar("ndx_sound_current_stage", default=None)
+
+
+@dataclass(frozen=True)
+class StageRecord:
+    """
+    Timing of one execution of a stage.
+
+    Attributes
+    ----------
+    name: str
+        Name of the stage, prefixed by the names of its enclosing stages, e.g. "plot_spectrogram/stft".
+    duration: float
+        Wall-clock duration in seconds.
+    bytes_read: int
+        Number of bytes read from the data, including the enclosed stages.
+    peak_array_bytes: int
+        Size in bytes of the largest array recorded in the stage or in the enclosed stages.
+    """
+
+    name: str
+    duration: float
+    bytes_read: int
+    peak_array_bytes: int
+
+
+class Stage:
+    """Stage being timed, used to record the bytes read and the arrays that were produced."""
+
+    def __init__(self, name: str, parent: Optional["Stage"]):
+        self.name = name if parent is None else f"{parent.name}/{name}"
+        self.parent = parent
+        self.bytes_read = 0
+        self.peak_array_bytes = 0
+
+    def record_read(self, data: np.ndarray, nbytes: Optional[int] = None):
+        """Record that `data` was read, or `nbytes` if the raw size differs from the returned array."""
+        self.bytes_read += int(data.nbytes if nbytes is None else nbytes)
+        self.record_array(data)
+
+    def record_array(self, data):
+        """Record the size of an array produced in this stage."""
+        self.peak_array_bytes = max(self.peak_array_bytes, int(getattr(data, "nbytes", 0)))
+
+
+class _DisabledStage(Stage):
+    """Stage yielded when profiling is disabled, which records nothing."""
+
+    def __init__(self):
+        super().__init__("disabled", None)
+
+    def record_read(self, data, nbytes=None):
+        pass
+
+    def record_array(self, data):
+        pass
+
+
+_DISABLED_STAGE = _DisabledStage()
+
+
+class Profiler:
+    """Collects the StageRecords completed while it is active."""
+
+    def __init__(self):
+        self.records: List[StageRecord] = []
+        self._lock = threading.Lock()
+
+    def add(self, record: StageRecord):
+        with self._lock:
+            self.records.append(record)
+
+    def summary(self) -> List[Dict]:
+        """Aggregate the records by stage name, in order of first occurrence."""
+        summary = dict()
+        for record in self.records:
+            entry = summary.setdefault(
+                record.name, dict(stage=record.name, calls=0, total=0.0, bytes_read=0, peak_array_bytes=0)
+            )
+            entry["calls"] += 1
+            entry["total"] += record.duration
+            entry["bytes_read"] += record.bytes_read
+            entry["peak_array_bytes"] = max(entry["peak_array_bytes"], record.peak_array_bytes)
+        for entry in summary.values():
+            entry["mean"] = entry["total"] / entry["calls"]
+        return list(summary.values())
+
+    def report(self) -> str:
+        """Return the summary as a text table."""
+        summary = self.summary()
+        width = max([len("stage")] + [len(entry["stage"]) for entry in summary])
+        header = ("calls", "total (s)", "mean (s)", "read", "peak array")
+        lines = [f"{'stage':<{width}}  {header[0]:>5}  " + "  ".join(f"{column:>10}" for column in header[1:])]
+        for entry in summary:
+            lines.append(
+                f"{entry['stage']:<{width}}  {entry['calls']:>5}  {entry['total']:>10.4f}  {entry['mean']:>10.4f}  "
+                f"{_format_bytes(entry['bytes_read']):>10}  {_format_bytes(entry['peak_array_bytes']):>10}"
+            )
+        return "\n".join(lines)
+
+
+def _format_bytes(nbytes: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if nbytes < 1024 or unit == "GB":
+            return f"{nbytes:.0f} {unit}" if unit == "B" else f"{nbytes:.1f} {unit}"
+        nbytes /= 1024
+
+
+def _env_enabled() -> bool:
+    return os.environ.get(PROFILE_ENV_VAR, "0") not in ("", "0")
+
+
+@contextmanager
+def profile():
+    """Record the timings of all stages executed within this block and yield the Profiler."""
+    profiler = Profiler()
+    with _active_profilers_lock:
+        _active_profilers.append(profiler)
+    try:
+        yield profiler
+    finally:
+        with _active_profilers_lock:
+            _active_profilers.remove(profiler)
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Time a stage of computation.
+
+    Yields a Stage to record bytes read and array sizes. When profiling is disabled, the yielded
+    Stage records nothing, so that instrumented code pays only for this check.
+    """
+    if not _active_profilers and not _env_enabled():
+        yield _DISABLED_STAGE
+        return
+
+    parent = _current_stage.get()
+    current = Stage(name, parent)
+    token = _current_stage.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        duration = time.perf_counter() - start
+        _current_stage.reset(token)
+        if parent is not None:
+            parent.bytes_read += current.bytes_read
+            parent.peak_array_bytes = max(parent.peak_array_bytes, current.peak_array_bytes)
+
+        record = StageRecord(
+            name=current.name,
+            duration=duration,
+            bytes_read=current.bytes_read,
+            peak_array_bytes=current.peak_array_bytes,
+        )
+        with _active_profilers_lock:
+            profilers = list(_active_profilers)
+        for profiler in profilers:
+            profiler.add(record)
+        if _env_enabled():
+            logger.info(json.dumps(asdict(record)))
@@ -0,0 +1,240 @@
+"""Rasterization of waveforms and spectrograms into fixed-size images with vectorized NumPy."""
+
+import struct
+from typing import Optional, Tuple
+import zlib
+
+import numpy as np
+
+
+def waveform_value_range(data: np.ndarray) -> Tuple[float, float]:
+    """
+    Range of values to draw a waveform with, ignoring NaNs.
+
+    A constant waveform is drawn in the middle of a range of height 2, and a waveform without
+    finite values in (-1, 1), so that the range can always be used as the extent of an image.
+    """
+    data = np.asarray(data, dtype=float)
+    finite = data[np.isfinite(data)]
+    if not finite.size:
+        return -1.0, 1.0
+    low, high = float(finite.min()), float(finite.max())
+    if high <= low:
+        return low - 1.0, high + 1.0
+    return low, high
+
+
+def rasterize_waveform(
+    data: np.ndarray,
+    width: int = 1200,
+    height: int = 200,
+    value_range: Optional[Tuple[float, float]] = None,
+) -> np.ndarray:
+    """
+    Rasterize a waveform into an image whose cost is bounded by its number of pixels.
+
+    Samples are assigned to columns, and each column is filled between the minimum and
+    the maximum of its samples, extended to the last sample of the previous column so
+    that the trace is continuous. Channels are drawn on top of each other.
+
+    Parameters
+    ----------
+    data: np.ndarray
+        Array of shape (time,) or (time, channels).
+    width: int, optional
+        Default is 1200
+    height: int, optional
+        Default is 200
+    value_range: tuple of float, optional
+        Values mapped to the bottom and top of the image. Default is `waveform_value_range`.
+
+    Returns
+    -------
+    np.ndarray
+        Boolean image of shape (height, width), True where the trace is drawn. Row 0 is the top.
+    """
+    data = np.asarray(data, dtype=float)
+    if data.ndim == 1:
+        data = data[:, None]
+    image = np.zeros((height, width), dtype=bool)
+    if data.shape[0] == 0 or not np.isfinite(data).any():
+        return image
+
+    if value_range is None:
+        value_range = waveform_value_range(data)
+    low, high = value_range
+    if high <= low:
+        low, high = low - 0.5, high + 0.5
+
+    n_samples = data.shape[0]
+    if n_samples >= width:
+        # first sample of each column, columns are contiguous
+        starts = np.searchsorted(np.arange(n_samples) * width // n_samples, np.arange(width))
+        column_min = np.fmin.reduceat(data, starts, axis=0)
+        column_max = np.fmax.reduceat(data, starts, axis=0)
+        column_last = data[np.append(starts[1:], n_samples) - 1]
+    else:
+        positions = (np.arange(width) + 0.5) * n_samples / width - 0.5
+        column_last = np.stack(
+            [np.interp(positions, np.arange(n_samples), channel) for channel in data.T], axis=1
+        )
+        column_min = column_max = column_last
+
+    previous = np.vstack([column_last[:1], column_last[:-1]])
+    column_min = np.fmin(column_min, previous)
+    column_max = np.fmax(column_max, previous)
+
+    scale = (height - 1) / (high - low)
+    with np.errstate(invalid="ignore"):
+        top = np.clip(np.round((high - column_max) * scale), 0, height - 1)
+        bottom = np.clip(np.round((high - column_min) * scale), 0, height - 1)
+    rows = np.arange(height)[:, None, None]
+    # NaN comparisons are False, so empty columns stay blank
+    image = ((rows >= top[None]) & (rows <= bottom[None])).any(axis=-1)
+    return image
+
+
+def pool_frames(spectrogram: np.ndarray, width: int) -> np.ndarray:
+    """
+    Resample the frames of a spectrogram of shape (n_frequencies, n_frames) to `width` columns.
+
+    Frames are max-pooled when there are more frames than columns and repeated otherwise.
+    """
+    spectrogram = np.asarray(spectrogram)
+    n_frames = spectrogram.shape[1]
+    if n_frames >= width:
+        starts = np.searchsorted(np.arange(n_frames) * width // n_frames, np.arange(width))
+        return np.maximum.reduceat(spectrogram, starts, axis=1)
+    return spectrogram[:, np.arange(width) * n_frames // width]
+
+
+def rasterize_spectrogram(
+    spectrogram: np.ndarray,
+    frequencies: np.ndarray,
+    width: int = 1200,
+    height: int = 256,
+    log_frequency: bool = True,
+    fmin: Optional[float] = None,
+) -> Tuple[np.ndarray, Tuple[float, float]]:
+    """
+    Resample a spectrogram to a fixed-size image.
+
+    Frames are resampled to columns with `pool_frames`. Frequency bins are max-pooled into
+    rows spaced on a linear or log2 frequency axis.
+
+    Parameters
+    ----------
+    spectrogram: np.ndarray
+        Array of shape (n_frequencies, n_frames).
+    frequencies: np.ndarray
+        Frequency of each row of the spectrogram in Hz, in increasing order.
+    width: int, optional
+        Default is 1200
+    height: int, optional
+        Default is 256
+    log_frequency: bool, optional
+        Whether rows are spaced on a log2 frequency axis. Default is True.
+    fmin: float, optional
+        Lowest frequency of the image when `log_frequency` is True. Default is the first
+        non-zero frequency.
+
+    Returns
+    -------
+    np.ndarray, tuple of float
+        Image of shape (height, width) with the lowest frequency in the last row, and the
+        range of the frequency axis (in log2(Hz) if `log_frequency` is True, else in Hz).
+    """
+    frequencies = np.asarray(frequencies, dtype=float)
+    pooled = pool_frames(spectrogram, width)
+
+    if log_frequency:
+        if fmin is None:
+            fmin = frequencies[frequencies > 0][0]
+        frequency_range = (np.log2(fmin), np.log2(frequencies[-1]))
+        row_frequencies = 2.0 ** np.linspace(*frequency_range, height)
+    else:
+        frequency_range = (frequencies[0], frequencies[-1])
+        row_frequencies = np.linspace(*frequency_range, height)
+
+    # each row takes the maximum of the bins between the midpoints to its neighbours; rows
+    # narrower than a bin take the first bin above their lower edge
+    lower_edges = np.concatenate([row_frequencies[:1], (row_frequencies[1:] + row_frequencies[:-1]) / 2])
+    starts = np.clip(np.searchsorted(frequencies, lower_edges), 0, len(frequencies) - 1)
+    return np.maximum.reduceat(pooled, starts, axis=0)[::-1], frequency_range
+
+
+# anchors of the viridis colormap, interpolated by `colorize`
+_VIRIDIS = np.array(
+    [
+        [68, 1, 84],
+        [72, 40, 120],
+        [62, 74, 137],
+        [49, 104, 142],
+        [38, 130, 142],
+        [31, 158, 137],
+        [53, 183, 121],
+        [109, 205, 89],
+        [180, 222, 44],
+        [253, 231, 37],
+    ],
+    dtype=float,
+)
+
+
+def colorize(image: np.ndarray, value_range: Optional[Tuple[float, float]] = None) -> np.ndarray:
+    """
+    Map an image of values to RGBA with the viridis colormap.
+
+    Parameters
+    ----------
+    image: np.ndarray
+        Array of shape (height, width). NaN values are transparent.
+    value_range: tuple of float, optional
+        Values mapped to the first and last color. Default is the range of the image.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (height, width, 4) and dtype uint8.
+    """
+    image = np.asarray(image, dtype=float)
+    finite = np.isfinite(image)
+    if value_range is None:
+        value_range = (image[finite].min(), image[finite].max()) if finite.any() else (0.0, 1.0)
+    low, high = value_range
+    scaled = (np.clip(np.where(finite, image, low), low, high) - low) / ((high - low) or 1.0)
+    positions = scaled * (len(_VIRIDIS) - 1)
+    rgba = np.empty((*image.shape, 4), dtype=np.uint8)
+    for channel in range(3):
+        rgba[..., channel] = np.round(np.interp(positions, np.arange(len(_VIRIDIS)), _VIRIDIS[:, channel]))
+    rgba[..., 3] = np.where(finite, 255, 0)
+    return rgba
+
+
+def encode_png(image: np.ndarray) -> bytes:
+    """
+    Encode an RGBA image of shape (height, width, 4) and dtype uint8 as PNG.
+
+    A boolean image of shape (height, width) is encoded as an opaque black trace on a
+    transparent background.
+    """
+    image = np.asarray(image)
+    if image.dtype == bool:
+        trace = image
+        image = np.zeros((*trace.shape, 4), dtype=np.uint8)
+        image[..., 3] = np.where(trace, 255, 0)
+    height, width = image.shape[:2]
+    # each scanline starts with filter type 0
+    scanlines = np.zeros((height, 1 + 4 * width), dtype=np.uint8)
+    scanlines[:, 1:] = image.reshape(height, 4 * width)
+
+    def chunk(tag: bytes, payload: bytes) -> bytes:
+        return struct.pack(">I", len(payload)) + tag + payload + struct.pack(">I", zlib.crc32(tag + payload))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(scanlines.tobytes(), 6))
+        + chunk(b"IEND", b"")
+    )
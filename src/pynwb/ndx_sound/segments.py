@@ -0,0 +1,267 @@
+"""Reading SegmentedAcousticWaveformSeries, whose data holds only the active segments of a recording."""
+
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import SegmentedAcousticWaveformSeries
+from .utils import read_samples
+
+
+@dataclass(frozen=True)
+class Segment:
+    """
+    Samples of one segment, or of the part of a segment within a time window.
+
+    Attributes
+    ----------
+    index: int
+        Index of the segment in the series.
+    starting_time: float
+        Time of the first sample in seconds.
+    data: np.ndarray
+        Samples in the units of the series, shape (time,) or (time, channels).
+    """
+
+    index: int
+    starting_time: float
+    data: np.ndarray
+
+
+def stack_segments(segments: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Concatenate the samples of several segments into the data of a SegmentedAcousticWaveformSeries.
+
+    Parameters
+    ----------
+    segments: sequence of np.ndarray
+        Samples of each segment in time order, all of shape (time,) or all of shape (time, channels).
+
+    Returns
+    -------
+    np.ndarray, np.ndarray
+        The concatenated data and the index in it of the first sample of each segment, to use as
+        `data` and `segment_start_indices`.
+    """
+    if not len(segments):
+        raise ValueError("At least one segment is required.")
+    if any(len(segment) == 0 for segment in segments):
+        raise ValueError("Segments must not be empty.")
+    if len({np.shape(segment)[1:] for segment in segments}) > 1:
+        raise ValueError("All segments must have the same number of channels.")
+    lengths = [len(segment) for segment in segments]
+    segment_start_indices = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype("uint64")
+    return np.concatenate(segments), segment_start_indices
+
+
+def get_segment_times(time_series: SegmentedAcousticWaveformSeries) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return the onset and offset times of each segment, in seconds.
+
+    The offset is the time right after the last sample of the segment.
+    """
+    onsets, offsets, _ = _read_segment_index(time_series)
+    return onsets, offsets
+
+
+def validate_segments(time_series: SegmentedAcousticWaveformSeries) -> None:
+    """
+    Check that the segment index of a series is well-formed, raising a ValueError otherwise.
+
+    The segment onset times and start indices must have the same length, the start indices must
+    be strictly increasing from 0 and below the length of the data, and the segments must be in
+    time order without overlapping. The binary search of `find_segments` and `read_segments`
+    relies on it, and they run the same checks on every query.
+    """
+    _read_segment_index(time_series)
+
+
+def _read_segment_index(time_series: SegmentedAcousticWaveformSeries) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Read and validate the onset, offset and index of the first sample of each segment, reading each dataset once."""
+    onsets = np.asarray(time_series.segment_onset_times[:], dtype=float)
+    start_indices = np.asarray(time_series.segment_start_indices[:], dtype=np.int64)
+    n_samples = len(time_series.data)
+    if len(onsets) != len(start_indices):
+        raise ValueError(
+            f"segment_onset_times and segment_start_indices must have the same length, got {len(onsets)} "
+            f"and {len(start_indices)}."
+        )
+    if len(start_indices) and start_indices[0] != 0:
+        raise ValueError(f"segment_start_indices must start at 0, got {start_indices[0]}.")
+    if not len(start_indices) and n_samples:
+        raise ValueError("segment_start_indices must not be empty when there is data.")
+    if np.any(np.diff(start_indices) <= 0) or (len(start_indices) and start_indices[-1] >= n_samples):
+        raise ValueError(f"segment_start_indices must be strictly increasing and below the length {n_samples} of data.")
+    if not np.all(np.isfinite(onsets)) or np.any(np.diff(onsets) <= 0):
+        raise ValueError("segment_onset_times must be finite and strictly increasing.")
+    lengths = np.diff(np.append(start_indices, n_samples))
+    offsets = onsets + lengths / time_series.rate
+    # tolerate rounding when a segment starts right at the offset of the previous one
+    overlaps = np.flatnonzero(onsets[1:] < offsets[:-1] - 0.5 / time_series.rate)
+    if len(overlaps):
+        raise ValueError(f"Segment {overlaps[0] + 1} starts before the end of segment {overlaps[0]}.")
+    return onsets, offsets, start_indices
+
+
+def find_segments(time_series: SegmentedAcousticWaveformSeries, time_window: Tuple[float, float]) -> np.ndarray:
+    """Return the indices of the segments that overlap a time window, with a binary search of the segment times."""
+    return _search_segments(*get_segment_times(time_series), time_window)
+
+
+def _search_segments(onsets: np.ndarray, offsets: np.ndarray, time_window: Tuple[float, float]) -> np.ndarray:
+    first = np.searchsorted(offsets, time_window[0], side="right")
+    stop = np.searchsorted(onsets, time_window[1], side="left")
+    return np.arange(first, max(first, stop))
+
+
+def read_segments(
+    time_series: SegmentedAcousticWaveformSeries,
+    time_window: Optional[Tuple[float, float]] = None,
+    max_workers: Optional[int] = None,
+) -> List[Segment]:
+    """
+    Read the samples of the segments that overlap a time window.
+
+    Only the overlapping part of each overlapping segment is read.
+
+    Parameters
+    ----------
+    time_series: SegmentedAcousticWaveformSeries
+    time_window: tuple, optional
+        Start and stop time in seconds. Default is all segments.
+    max_workers: int, optional
+        Number of threads used to read the chunks of the data, see `read_window`. Default is the
+        default of concurrent.futures.ThreadPoolExecutor.
+
+    Returns
+    -------
+    list of Segment
+        In time order.
+    """
+    return _read_segments(time_series, _read_segment_index(time_series), time_window, max_workers)
+
+
+def _read_segments(
+    time_series: SegmentedAcousticWaveformSeries,
+    segment_index: Tuple[np.ndarray, np.ndarray, np.ndarray],
+    time_window: Optional[Tuple[float, float]],
+    max_workers: Optional[int],
+) -> List[Segment]:
+    """`read_segments` with the segment index already read by `_read_segment_index`."""
+    onsets, offsets, start_indices = segment_index
+    if time_window is None:
+        time_window = (-np.inf, np.inf)
+    rate = time_series.rate
+
+    segments = []
+    for index in _search_segments(onsets, offsets, time_window):
+        length = int(round((offsets[index] - onsets[index]) * rate))
+        istart = int(np.clip(np.ceil((time_window[0] - onsets[index]) * rate), 0, length))
+        istop = int(np.clip(np.ceil((time_window[1] - onsets[index]) * rate), istart, length))
+        if istop == istart:
+            continue
+        data = read_samples(
+            time_series, start_indices[index] + istart, start_indices[index] + istop, max_workers=max_workers
+        )
+        segments.append(Segment(index=int(index), starting_time=onsets[index] + istart / rate, data=data))
+    return segments
+
+
+def fill_gaps(
+    segments: Sequence[Segment],
+    rate: float,
+    time_window: Tuple[float, float],
+    fill_value: float = np.nan,
+) -> np.ndarray:
+    """
+    Place segments on a continuous time axis, filling the time between them with `fill_value`.
+
+    Parameters
+    ----------
+    segments: sequence of Segment
+    rate: float
+    time_window: tuple
+        Start and stop time in seconds of the returned samples.
+    fill_value: float, optional
+        Default is NaN.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (time,) or (time, channels), whose first sample is at `time_window[0]`.
+    """
+    n_samples = max(0, int(np.ceil((time_window[1] - time_window[0]) * rate)))
+    channel_shape = segments[0].data.shape[1:] if segments else ()
+    out = np.full((n_samples, *channel_shape), fill_value, dtype=float)
+    for segment in segments:
+        istart = int(round((segment.starting_time - time_window[0]) * rate))
+        data = segment.data[max(0, -istart): max(0, n_samples - istart)]
+        out[max(0, istart): max(0, istart) + len(data)] = data
+    return out
+
+
+def read_filled_window(
+    time_series: SegmentedAcousticWaveformSeries,
+    time_window: Tuple[float, float],
+    fill_value: float = np.nan,
+    max_workers: Optional[int] = None,
+) -> Tuple[np.ndarray, float]:
+    """
+    Read the samples within a time window on a continuous time axis, filling the gaps with `fill_value`.
+
+    Like the samples of a continuous series, the window is clipped to the onset of the first
+    segment and the offset of the last one. The segment index is read once.
+
+    Returns
+    -------
+    np.ndarray, float
+        Array of shape (time,) or (time, channels), and the time of its first sample.
+    """
+    segment_index = _read_segment_index(time_series)
+    onsets, offsets, _ = segment_index
+    start = max(time_window[0], onsets[0]) if len(onsets) else time_window[0]
+    stop = max(start, min(time_window[1], offsets[-1])) if len(onsets) else start
+    segments = _read_segments(time_series, segment_index, (start, stop), max_workers)
+    return fill_gaps(segments, time_series.rate, (start, stop), fill_value), float(start)
+
+
+def iter_filled_chunks(
+    time_series: SegmentedAcousticWaveformSeries,
+    chunk_size: int,
+    fill_value: float = np.nan,
+    max_workers: Optional[int] = None,
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Iterate over the samples of the segments in chunks of a continuous time axis, like `iter_chunks`.
+
+    The time axis starts at the onset of the first segment and ends at the offset of the last
+    one. Each chunk is filled with `fill_value` between segments, and chunks that fall entirely
+    within a gap are skipped. The segment index is read once.
+
+    Parameters
+    ----------
+    time_series: SegmentedAcousticWaveformSeries
+    chunk_size: int
+        Number of samples per chunk.
+    fill_value: float, optional
+        Default is NaN.
+    max_workers: int, optional
+        Number of threads used to read the chunks of the data, see `read_window`. Default is the
+        default of concurrent.futures.ThreadPoolExecutor.
+
+    Yields
+    ------
+    tuple of int and np.ndarray
+        The index on the continuous time axis of the first sample of the chunk, and the chunk.
+    """
+    segment_index = _read_segment_index(time_series)
+    onsets, offsets, _ = segment_index
+    rate = time_series.rate
+    n_samples = int(np.ceil((offsets[-1] - onsets[0]) * rate))
+    for chunk_start in range(0, n_samples, chunk_size):
+        chunk_stop = min(chunk_start + chunk_size, n_samples)
+        time_window = (onsets[0] + chunk_start / rate, onsets[0] + chunk_stop / rate)
+        segments = _read_segments(time_series, segment_index, time_window, max_workers)
+        if segments:
+            yield chunk_start, fill_gaps(segments, rate, time_window, fill_value)[: chunk_stop - chunk_start]
@@ -0,0 +1,635 @@
+"""
+Local HTTP server of waveform and spectrogram image tiles, to browse the AcousticWaveformSeries
+of an NWB file in a web browser.
+
+The extent of a series is divided into 2**zoom tiles at each zoom level, from a single tile at
+zoom 0 to tiles with one sample per pixel column at the highest zoom. Tiles are rendered by a
+pool of worker processes, each with its own handle to the file, written to an on-disk cache,
+and served with ETag and Cache-Control headers so that browsers and shared caches do not ask
+twice. Concurrent requests for the same tile share a single rendering.
+
+    python -m ndx_sound.server recording.nwb --port 8000
+
+Endpoints:
+
+- ``/``: a minimal viewer.
+- ``/series``: JSON list of the series of the file and of their tile geometry.
+- ``/tiles/<object_id>/<kind>/<zoom>/<index>.png``: tile of kind "waveform" or "spectrogram".
+"""
+
+import argparse
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+import hashlib
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import numpy as np
+from pynwb import NWBHDF5IO
+from pynwb.file import TimeSeries
+
+from . import AcousticWaveformSeries, SegmentedAcousticWaveformSeries
+from .overview import SoundOverview, compute_overview
+from .profiling import stage
+from .render import colorize, encode_png, rasterize_spectrogram, rasterize_waveform
+from .segments import Segment, get_segment_times, read_segments
+from .utils import get_starting_time, power_to_db, read_samples, time_to_index, to_mono
+
+TILE_KINDS = ("waveform", "spectrogram")
+# bump when the rendering changes, to invalidate cached tiles
+TILE_FORMAT_VERSION = 1
+
+logger = logging.getLogger("ndx_sound.server")
+
+_worker = threading.local()
+
+
+def get_default_cache_dir() -> str:
+    """Return the default directory of the tile cache, under the user cache directory."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "ndx-sound", "tiles")
+
+
+def get_extent(time_series: TimeSeries) -> Tuple[float, float]:
+    """Return the starting time and the duration in seconds of a series, including the gaps between segments."""
+    if isinstance(time_series, SegmentedAcousticWaveformSeries):
+        onsets, offsets = get_segment_times(time_series)
+        if len(onsets) == 0:
+            return 0.0, 0.0
+        return float(onsets[0]), float(offsets[-1] - onsets[0])
+    return get_starting_time(time_series), float(len(time_series.data) / time_series.rate)
+
+
+def get_max_zoom(time_series: TimeSeries, tile_width: int) -> int:
+    """Return the zoom level at which a tile of `tile_width` columns has at least one sample per column."""
+    _, duration = get_extent(time_series)
+    n_samples = duration * time_series.rate
+    if n_samples < 2 * tile_width:
+        return 0
+    return int(np.floor(np.log2(n_samples / tile_width)))
+
+
+def compute_tile_overview(
+    time_series: TimeSeries, n_fft: int = 512, n_bins: int = 2**15, use_cache: bool = True
+) -> SoundOverview:
+    """
+    Compute the overview from which coarse tiles are rendered, with `compute_overview`.
+
+    The number of bins is reduced so that each bin holds at least `n_fft` samples of the extent
+    of the series, gaps between segments included, so that the spectrograms of coarse tiles have
+    the same frequencies as those computed from the samples. The overview is cached per series
+    and parameters unless `use_cache` is False.
+    """
+    _, duration = get_extent(time_series)
+    n_bins = max(1, min(n_bins, int(round(duration * time_series.rate)) // n_fft))
+    return compute_overview(time_series, n_bins=n_bins, n_fft=n_fft, use_cache=use_cache)
+
+
+def _pool_columns(
+    times: np.ndarray,
+    values: np.ndarray,
+    time_window: Tuple[float, float],
+    width: int,
+    reduce: np.ufunc,
+) -> np.ndarray:
+    """
+    Reduce values at increasing times into the columns of a time window.
+
+    Returns an array of shape (width, ...) that is NaN in the columns without values.
+    """
+    start, stop = time_window
+    columns = np.floor((times - start) / (stop - start) * width).astype(int)
+    inside = (columns >= 0) & (columns < width)
+    columns, values = columns[inside], values[inside]
+    out = np.full((width, *values.shape[1:]), np.nan)
+    if len(columns):
+        occupied, starts = np.unique(columns, return_index=True)
+        out[occupied] = reduce.reduceat(values, starts, axis=0)
+    return out
+
+
+def _read_pieces(time_series: TimeSeries, time_window: Tuple[float, float]) -> List[Segment]:
+    """Read the samples of a time window as a list of contiguous pieces, one per segment for segmented series."""
+    if isinstance(time_series, SegmentedAcousticWaveformSeries):
+        return read_segments(time_series, time_window)
+    istart = time_to_index(time_series, time_window[0])
+    istop = time_to_index(time_series, time_window[1])
+    if istop <= istart:
+        return []
+    starting_time = get_starting_time(time_series) + istart / time_series.rate
+    return [Segment(index=0, starting_time=starting_time, data=read_samples(time_series, istart, istop))]
+
+
+def _piece_times(piece: Segment, rate: float) -> np.ndarray:
+    return piece.starting_time + np.arange(len(piece.data)) / rate
+
+
+def _waveform_columns(
+    time_series: TimeSeries,
+    time_window: Tuple[float, float],
+    width: int,
+    overview: Optional[SoundOverview],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Minimum and maximum of the samples in each column, from the overview if given."""
+    if overview is not None:
+        times = overview.bin_times + overview.bin_duration / 2
+        column_min = _pool_columns(times, overview.envelope_min, time_window, width, np.fmin)
+        column_max = _pool_columns(times, overview.envelope_max, time_window, width, np.fmax)
+        return column_min, column_max
+
+    column_min = np.full(width, np.nan)
+    column_max = np.full(width, np.nan)
+    for piece in _read_pieces(time_series, time_window):
+        times = _piece_times(piece, time_series.rate)
+        data = to_mono(piece.data)
+        column_min = np.fmin(column_min, _pool_columns(times, data, time_window, width, np.fmin))
+        column_max = np.fmax(column_max, _pool_columns(times, data, time_window, width, np.fmax))
+    return column_min, column_max
+
+
+def _spectrogram_columns(
+    time_series: TimeSeries,
+    time_window: Tuple[float, float],
+    width: int,
+    n_fft: int,
+    overview: Optional[SoundOverview],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Power in dB of each frequency and column, of shape (n_frequencies, width), and the frequencies.
+
+    Without an overview, between `width` and 8 * `width` frames of `n_fft` samples, evenly
+    spaced in the window, are max-pooled into the columns.
+    """
+    if overview is not None:
+        times = overview.bin_times + overview.bin_duration / 2
+        columns = _pool_columns(times, overview.spectrogram_db.T, time_window, width, np.fmax)
+        return columns.T, overview.frequencies
+
+    rate = time_series.rate
+    start, stop = time_window
+    n_frames = int(np.clip(np.ceil((stop - start) * rate / (n_fft // 4)), width, 8 * width))
+    centers = start + (np.arange(n_frames) + 0.5) * (stop - start) / n_frames
+    half = n_fft // 2
+    window = np.hanning(n_fft)
+    spectra = np.full((n_frames, n_fft // 2 + 1), np.nan)
+
+    margin = half / rate
+    for piece in _read_pieces(time_series, (start - margin, stop + margin)):
+        data = np.nan_to_num(to_mono(piece.data), nan=0.0)
+        indices = np.round((centers - piece.starting_time) * rate).astype(int)
+        inside = np.flatnonzero((indices >= 0) & (indices < len(data)))
+        if len(inside) == 0:
+            continue
+        padded = np.pad(data, half)
+        # the frame centered on sample i of the piece starts at sample i of the padded piece
+        frames = padded[indices[inside, None] + np.arange(n_fft)] * window
+        spectra[inside] = power_to_db(np.abs(np.fft.rfft(frames, axis=-1)) ** 2, top_db=None)
+
+    columns = _pool_columns(centers, spectra, time_window, width, np.fmax)
+    return columns.T, np.fft.rfftfreq(n_fft, d=1.0 / rate)
+
+
+def render_tile(
+    time_series: TimeSeries,
+    kind: str,
+    zoom: int,
+    index: int,
+    width: int = 512,
+    height: int = 256,
+    n_fft: int = 512,
+    overview: Optional[SoundOverview] = None,
+) -> bytes:
+    """
+    Render a tile of a series as PNG.
+
+    Tiles are computed from the overview when their columns span at least an overview bin, so
+    that the cost of a tile does not grow with its duration, and from the samples otherwise.
+    Tiles of segmented series are transparent in the gaps between segments, where the bins of
+    the overview are NaN and no samples are read. The value range of waveform tiles and the color scale of
+    spectrogram tiles are those of the whole series, so that neighbouring tiles match.
+
+    Parameters
+    ----------
+    time_series: pynwb.file.TimeSeries
+    kind: str
+        "waveform" or "spectrogram".
+    zoom: int
+        The extent of the series is divided into 2**zoom tiles.
+    index: int
+        Index of the tile, from 0 to 2**zoom - 1.
+    width: int, optional
+        Default is 512
+    height: int, optional
+        Default is 256
+    n_fft: int, optional
+        Frame length of the spectrogram. Default is 512.
+    overview: SoundOverview, optional
+        Default is computed with `compute_tile_overview` and the same `n_fft`, once per series.
+
+    Returns
+    -------
+    bytes
+    """
+    if kind not in TILE_KINDS:
+        raise ValueError(f"Unknown tile kind '{kind}', expected one of {TILE_KINDS}.")
+    if overview is None:
+        overview = compute_tile_overview(time_series, n_fft=n_fft, use_cache=True)
+    starting_time, duration = get_extent(time_series)
+    tile_duration = duration / 2**zoom
+    time_window = (starting_time + index * tile_duration, starting_time + (index + 1) * tile_duration)
+
+    coarse = tile_duration / width >= overview.bin_duration
+    with stage("render_tile"):
+        if kind == "waveform":
+            column_min, column_max = _waveform_columns(
+                time_series, time_window, width, overview if coarse else None
+            )
+            value_range = (np.nanmin(overview.envelope_min), np.nanmax(overview.envelope_max))
+            # the minimum and maximum of each column as two samples, so each column spans both
+            image = rasterize_waveform(
+                np.column_stack([column_min, column_max]).ravel(), width, height, value_range=value_range
+            )
+            return encode_png(image)
+
+        spectrogram, frequencies = _spectrogram_columns(
+            time_series, time_window, width, n_fft, overview if coarse else None
+        )
+        top = float(np.nanmax(overview.spectrogram_db))
+        image, _ = rasterize_spectrogram(spectrogram, frequencies, width, height)
+        return encode_png(colorize(image, value_range=(top - 80.0, top)))
+
+
+def _init_worker(file_path: str, cache_dir: str, options: Dict) -> None:
+    """Open the NWB file once per worker."""
+    _worker.io = NWBHDF5IO(file_path, mode="r")
+    _worker.nwbfile = _worker.io.read()
+    _worker.cache_dir = cache_dir
+    _worker.options = options
+    _worker.overviews = {}
+
+
+def _load_overview(time_series: TimeSeries) -> SoundOverview:
+    """
+    Load the overview of a series from the cache shared by the workers, computing it if needed.
+
+    TileServer computes each overview in a single worker, with `_compute_worker_overview`, before
+    any tile of the series is rendered, so that the workers do not compute it concurrently.
+    """
+    object_id = time_series.object_id
+    if object_id not in _worker.overviews:
+        path = os.path.join(_worker.cache_dir, object_id, "overview.npz")
+        if os.path.exists(path):
+            with np.load(path) as arrays:
+                overview = SoundOverview(**{key: arrays[key] for key in arrays.files})
+        else:
+            overview = compute_tile_overview(
+                time_series, n_fft=_worker.options["n_fft"], n_bins=_worker.options["overview_bins"]
+            )
+            _atomic_write(path, lambda file: np.savez(file, **overview.__dict__))
+        _worker.overviews[object_id] = overview
+    return _worker.overviews[object_id]
+
+
+def _compute_worker_overview(object_id: str) -> None:
+    _load_overview(_worker.nwbfile.objects[object_id])
+
+
+def _render_worker_tile(object_id: str, kind: str, zoom: int, index: int) -> bytes:
+    time_series = _worker.nwbfile.objects[object_id]
+    options = _worker.options
+    return render_tile(
+        time_series,
+        kind,
+        zoom,
+        index,
+        width=options["tile_width"],
+        height=options["tile_height"],
+        n_fft=options["n_fft"],
+        overview=_load_overview(time_series),
+    )
+
+
+def _atomic_write(path: str, write) -> None:
+    """Write a file through a temporary file in the same directory, so that readers never see partial files."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            write(file)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+
+
+class TileRequestHandler(BaseHTTPRequestHandler):
+    """Route the requests of a TileServer."""
+
+    server: "TileServer"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        parts = [part for part in urlsplit(self.path).path.split("/") if part]
+        try:
+            if not parts:
+                self._send(HTTPStatus.OK, _VIEWER_HTML.encode(), "text/html; charset=utf-8", cache_control="no-cache")
+            elif parts == ["series"]:
+                body = json.dumps(self.server.series).encode()
+                self._send(HTTPStatus.OK, body, "application/json", cache_control="no-cache")
+            elif len(parts) == 5 and parts[0] == "tiles" and parts[4].endswith(".png"):
+                self._send_tile(parts[1], parts[2], parts[3], parts[4][: -len(".png")])
+            else:
+                self.send_error(HTTPStatus.NOT_FOUND)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _send_tile(self, object_id: str, kind: str, zoom: str, index: str):
+        try:
+            zoom, index = int(zoom), int(index)
+        except ValueError:
+            self.send_error(HTTPStatus.BAD_REQUEST, "Zoom and index must be integers.")
+            return
+        if not self.server.has_tile(object_id, kind, zoom, index):
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        etag = self.server.get_etag(object_id, kind, zoom, index)
+        cache_control = f"public, max-age={self.server.max_age}"
+        if etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", cache_control)
+            self.end_headers()
+            return
+        try:
+            body = self.server.get_tile(object_id, kind, zoom, index)
+        except Exception:
+            logger.exception("Rendering tile %s/%s/%d/%d failed", object_id, kind, zoom, index)
+            self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR)
+            return
+        self._send(HTTPStatus.OK, body, "image/png", cache_control=cache_control, etag=etag)
+
+    def _send(self, status: HTTPStatus, body: bytes, content_type: str, cache_control: str, etag: Optional[str] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", cache_control)
+        if etag is not None:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class TileServer(ThreadingHTTPServer):
+    """
+    HTTP server of the waveform and spectrogram tiles of the AcousticWaveformSeries of an NWB file.
+
+    Each request is handled in its own thread. Tiles are read from the on-disk cache when they
+    have been rendered before, and otherwise rendered by the worker pool and written to the
+    cache. The cache and the ETags are keyed by the path, size and modification time of the
+    file and by the tile geometry, so that they are invalidated when any of these change. The
+    overview of each series, from which coarse tiles are rendered, is computed once by one
+    worker and loaded from the cache by the others.
+
+    Parameters
+    ----------
+    file_path: str or os.PathLike
+        Path to an NWB file in HDF5.
+    server_address: tuple, optional
+        Host and port. Default is ("127.0.0.1", 8000), use port 0 for any free port.
+    cache_dir: str, optional
+        Directory of the tile cache. Default is `get_default_cache_dir()`.
+    max_workers: int, optional
+        Number of workers rendering tiles. Default is os.cpu_count().
+    use_processes: bool, optional
+        Whether the workers are processes or threads of the server process. Rendering is mostly
+        CPU-bound, so processes scale better. Default is True.
+    tile_width: int, optional
+        Default is 512
+    tile_height: int, optional
+        Default is 256
+    n_fft: int, optional
+        Frame length of the spectrograms. Default is 512.
+    overview_bins: int, optional
+        Number of bins of the overviews from which coarse tiles are rendered. Default is 2**15.
+    max_age: int, optional
+        Number of seconds browsers may reuse a tile without revalidating it. Default is 3600.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        file_path: Union[str, os.PathLike],
+        server_address: Tuple[str, int] = ("127.0.0.1", 8000),
+        cache_dir: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        use_processes: bool = True,
+        tile_width: int = 512,
+        tile_height: int = 256,
+        n_fft: int = 512,
+        overview_bins: int = 2**15,
+        max_age: int = 3600,
+    ):
+        self.file_path = os.path.realpath(file_path)
+        self.max_age = max_age
+        options = dict(tile_width=tile_width, tile_height=tile_height, n_fft=n_fft, overview_bins=overview_bins)
+
+        file_stat = os.stat(self.file_path)
+        key = json.dumps(
+            [self.file_path, file_stat.st_size, file_stat.st_mtime_ns, options, TILE_FORMAT_VERSION], sort_keys=True
+        )
+        self.version = hashlib.sha1(key.encode()).hexdigest()[:16]
+        self.cache_dir = os.path.join(cache_dir or get_default_cache_dir(), self.version)
+
+        self.series = []
+        with NWBHDF5IO(self.file_path, mode="r") as io:
+            nwbfile = io.read()
+            for neurodata_object in nwbfile.objects.values():
+                if not isinstance(neurodata_object, AcousticWaveformSeries):
+                    continue
+                starting_time, duration = get_extent(neurodata_object)
+                if duration == 0:
+                    continue
+                shape = np.shape(neurodata_object.data)
+                self.series.append(
+                    dict(
+                        object_id=neurodata_object.object_id,
+                        name=neurodata_object.name,
+                        parent=neurodata_object.parent.name if neurodata_object.parent is not None else None,
+                        rate=float(neurodata_object.rate),
+                        starting_time=starting_time,
+                        duration=duration,
+                        n_channels=shape[1] if len(shape) > 1 else 1,
+                        segmented=isinstance(neurodata_object, SegmentedAcousticWaveformSeries),
+                        max_zoom=get_max_zoom(neurodata_object, tile_width),
+                        tile_width=tile_width,
+                        tile_height=tile_height,
+                    )
+                )
+        self._max_zoom = {series["object_id"]: series["max_zoom"] for series in self.series}
+
+        executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        executor_kwargs = dict(mp_context=multiprocessing.get_context("spawn")) if use_processes else {}
+        self.executor = executor_class(
+            max_workers=max_workers or os.cpu_count(),
+            initializer=_init_worker,
+            initargs=(self.file_path, self.cache_dir, options),
+            **executor_kwargs,
+        )
+        self._pending: Dict[Tuple, Future] = {}
+        self._pending_lock = threading.Lock()
+        super().__init__(server_address, TileRequestHandler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def has_tile(self, object_id: str, kind: str, zoom: int, index: int) -> bool:
+        max_zoom = self._max_zoom.get(object_id)
+        return max_zoom is not None and kind in TILE_KINDS and 0 <= zoom <= max_zoom and 0 <= index < 2**zoom
+
+    def get_etag(self, object_id: str, kind: str, zoom: int, index: int) -> str:
+        return f'"{self.version}-{object_id}-{kind}-{zoom}-{index}"'
+
+    def get_tile(self, object_id: str, kind: str, zoom: int, index: int) -> bytes:
+        """Return the PNG of a tile from the cache, rendering it if needed."""
+        path = os.path.join(self.cache_dir, object_id, kind, str(zoom), f"{index}.png")
+        try:
+            with open(path, "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            pass
+
+        self._ensure_overview(object_id)
+        return self._run_once(
+            (object_id, kind, zoom, index),
+            _render_worker_tile,
+            (object_id, kind, zoom, index),
+            store=lambda body: _atomic_write(path, lambda file: file.write(body)),
+        )
+
+    def _ensure_overview(self, object_id: str) -> None:
+        """Compute the overview of a series in one worker, once, before its tiles are rendered."""
+        if not os.path.exists(os.path.join(self.cache_dir, object_id, "overview.npz")):
+            self._run_once((object_id, "overview"), _compute_worker_overview, (object_id,))
+
+    def _run_once(self, key: Tuple, function, args: Tuple, store=None):
+        """
+        Run a task on the worker pool, sharing its result with the concurrent requests of the same key.
+
+        The request that submits the task calls `store` with the result before the other
+        requests may submit the task again, e.g. to write the result to the cache.
+        """
+        with self._pending_lock:
+            future = self._pending.get(key)
+            owner = future is None
+            if owner:
+                future = self.executor.submit(function, *args)
+                self._pending[key] = future
+        if not owner:
+            return future.result()
+        try:
+            result = future.result()
+            if store is not None:
+                store(result)
+            return result
+        finally:
+            with self._pending_lock:
+                del self._pending[key]
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(cancel_futures=True)
+
+
+def serve(file_path: Union[str, os.PathLike], host: str = "127.0.0.1", port: int = 8000, **kwargs) -> None:
+    """Serve the tiles of an NWB file until interrupted. Keyword arguments are passed to TileServer."""
+    with TileServer(file_path, (host, port), **kwargs) as server:
+        logger.info("Serving %s at %s", server.file_path, server.url)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve waveform and spectrogram tiles of the sounds of an NWB file.")
+    parser.add_argument("file_path", help="path to an NWB file")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--cache-dir", default=None, help="directory of the tile cache")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    serve(args.file_path, host=args.host, port=args.port, cache_dir=args.cache_dir, max_workers=args.workers)
+
+
+_VIEWER_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>ndx-sound</title>
+<style>
+body { font-family: sans-serif; margin: 1em; }
+.row { white-space: nowrap; overflow: hidden; background: #fafafa; }
+.row img { display: inline-block; vertical-align: top; }
+</style>
+</head>
+<body>
+<select id="series"></select>
+<button id="out">&minus;</button><button id="in">+</button>
+<button id="left">&larr;</button><button id="right">&rarr;</button>
+<span id="position"></span>
+<div class="row" id="waveform"></div>
+<div class="row" id="spectrogram"></div>
+<script>
+let series = [], current = null, zoom = 0, index = 0;
+const select = document.getElementById("series");
+function draw() {
+  if (!current) return;
+  const n = 2 ** zoom, duration = current.duration / n;
+  const start = current.starting_time + index * duration;
+  document.getElementById("position").textContent =
+    `zoom ${zoom}, ${start.toFixed(3)} s to ${(start + Math.min(3, n - index) * duration).toFixed(3)} s`;
+  for (const kind of ["waveform", "spectrogram"]) {
+    const row = document.getElementById(kind);
+    row.innerHTML = "";
+    for (let i = index; i < Math.min(index + 3, n); i++) {
+      const img = document.createElement("img");
+      img.src = `tiles/${current.object_id}/${kind}/${zoom}/${i}.png`;
+      row.appendChild(img);
+    }
+  }
+}
+select.onchange = () => { current = series[select.selectedIndex]; zoom = 0; index = 0; draw(); };
+document.getElementById("in").onclick = () => {
+  if (zoom < current.max_zoom) { zoom++; index = Math.min(2 * index + 1, 2 ** zoom - 1); draw(); }
+};
+document.getElementById("out").onclick = () => { if (zoom > 0) { zoom--; index = index >> 1; draw(); } };
+document.getElementById("left").onclick = () => { if (index > 0) { index--; draw(); } };
+document.getElementById("right").onclick = () => { if (index < 2 ** zoom - 1) { index++; draw(); } };
+fetch("series").then(response => response.json()).then(data => {
+  series = data;
+  for (const s of series) select.add(new Option(`${s.parent}/${s.name}`));
+  select.onchange();
+});
+</script>
+</body>
+</html>
+"""
+
+
+if __name__ == "__main__":
+    main()
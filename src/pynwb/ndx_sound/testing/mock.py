@@ -1,10 +1,12 @@
 """Mock implementations for testing ndx-sound."""
 
-from typing import Optional, Tuple, Union
+from typing import Optional, Sequence, Tuple, Union
 
+from hdmf.data_utils import GenericDataChunkIterator
 import numpy as np
 
-from ndx_sound import AcousticWaveformSeries
+from ndx_sound import AcousticWaveformSeries, SegmentedAcousticWaveformSeries
+from ndx_sound.segments import stack_segments
 
 
 def mock_AcousticWaveformSeries(
@@ -69,3 +71,255 @@ def mock_AcousticWaveformSeries(
         **kwargs
     )
     return acoustic_waveform_series
+
+
+class SyntheticAudioDataChunkIterator(GenericDataChunkIterator):
+    """
+    Lazily generate realistic synthetic audio, one chunk at a time.
+
+    Each chunk is generated deterministically from `(seed, chunk_index)` only, so any part of
+    the series can be regenerated without generating what comes before it, and memory use is
+    bounded by the chunk size regardless of the length of the series. A chunk contains a low
+    level of background noise, linear chirps, tone pips with raised-cosine ramps and
+    vocalization-like harmonic bursts with frequency modulation. Some chunks contain a gap of
+    exact digital silence. Optional NaN dropouts require a float dtype. In multi-channel data,
+    channel `k` is a copy of the first channel delayed by `k * channel_delay` samples within
+    the chunk and attenuated, with independent background noise.
+    """
+
+    def __init__(
+        self,
+        n_samples: int,
+        rate: float = 42000.0,
+        n_channels: Optional[int] = None,
+        dtype: str = "int16",
+        chunk_size: int = 2**20,
+        seed: int = 0,
+        events_per_second: float = 5.0,
+        silence_probability: float = 0.3,
+        nan_dropouts: bool = False,
+        channel_delay: int = 8,
+        **kwargs
+    ):
+        if n_samples <= 0:
+            raise ValueError(f"n_samples must be positive, got {n_samples}.")
+        self.n_samples = n_samples
+        self.rate = rate
+        self.n_channels = n_channels
+        self._dtype = np.dtype(dtype)
+        self.chunk_size = min(chunk_size, n_samples)
+        self.seed = seed
+        self.events_per_second = events_per_second
+        self.silence_probability = silence_probability
+        self.nan_dropouts = nan_dropouts
+        self.channel_delay = channel_delay
+        if nan_dropouts and self._dtype.kind != "f":
+            raise ValueError("NaN dropouts require a float dtype.")
+
+        shape = (self.chunk_size,) if n_channels is None else (self.chunk_size, n_channels)
+        kwargs.setdefault("chunk_shape", shape)
+        if kwargs.get("buffer_gb") is None:
+            kwargs.setdefault("buffer_shape", shape)
+        super().__init__(**kwargs)
+
+    def _get_maxshape(self) -> Tuple[int, ...]:
+        return (self.n_samples,) if self.n_channels is None else (self.n_samples, self.n_channels)
+
+    def _get_dtype(self) -> np.dtype:
+        return self._dtype
+
+    def _get_data(self, selection: Tuple[slice]) -> np.ndarray:
+        start, stop, _ = selection[0].indices(self.n_samples)
+        chunks = [
+            self.get_chunk(chunk_index)
+            for chunk_index in range(start // self.chunk_size, (stop - 1) // self.chunk_size + 1)
+        ]
+        offset = (start // self.chunk_size) * self.chunk_size
+        data = np.concatenate(chunks)[start - offset: stop - offset]
+        return data[(slice(None), *selection[1:])]
+
+    def get_chunk(self, chunk_index: int) -> np.ndarray:
+        """Generate the chunk with the given index."""
+        rng = np.random.default_rng([self.seed, chunk_index])
+        chunk_start = chunk_index * self.chunk_size
+        n = min(self.chunk_size, self.n_samples - chunk_start)
+        nyquist = self.rate / 2
+
+        signal = np.zeros(n)
+        n_events = rng.poisson(self.events_per_second * n / self.rate)
+        for _ in range(n_events):
+            kind = rng.integers(3)
+            duration = int(rng.uniform(0.01, 0.2) * self.rate)
+            duration = min(max(duration, 2), n)
+            onset = rng.integers(0, n - duration + 1)
+            t = np.arange(duration) / self.rate
+            if kind == 0:  # chirp
+                f0, f1 = rng.uniform(0.02, 0.45, size=2) * nyquist * 2
+                event = np.sin(2 * np.pi * (f0 * t + (f1 - f0) * t**2 / (2 * t[-1])))
+            elif kind == 1:  # tone pip
+                event = np.sin(2 * np.pi * rng.uniform(0.02, 0.4) * nyquist * 2 * t)
+                ramp = min(duration // 4, int(0.005 * self.rate)) or 1
+                envelope = np.ones(duration)
+                envelope[:ramp] = envelope[-ramp:][::-1] = 0.5 - 0.5 * np.cos(np.pi * np.arange(ramp) / ramp)
+                event *= envelope
+            else:  # vocalization-like burst
+                f0 = rng.uniform(0.005, 0.05) * nyquist * 2
+                phase = 2 * np.pi * np.cumsum(f0 * (1 + 0.1 * np.sin(2 * np.pi * rng.uniform(2, 20) * t))) / self.rate
+                harmonics = np.arange(1, 6)[:, None]
+                weights = (1.0 / harmonics) * (harmonics * f0 < nyquist)
+                event = (weights * np.sin(harmonics * phase)).sum(axis=0) * np.hanning(duration)
+            signal[onset: onset + duration] += rng.uniform(0.1, 0.5) * event
+
+        noise_level = 0.01
+        signal += noise_level * rng.standard_normal(n)
+        if rng.random() < self.silence_probability:
+            gap = rng.integers(n // 10, n // 2 + 1)
+            gap_onset = rng.integers(0, n - gap + 1)
+            signal[gap_onset: gap_onset + gap] = 0.0
+
+        if self.n_channels is None:
+            data = signal
+        else:
+            data = np.empty((n, self.n_channels))
+            data[:, 0] = signal
+            for channel in range(1, self.n_channels):
+                delay = min(channel * self.channel_delay, n)
+                delayed = np.concatenate([np.zeros(delay), signal[: n - delay]])
+                data[:, channel] = 0.8**channel * delayed + noise_level * rng.standard_normal(n)
+
+        if self.nan_dropouts:
+            for _ in range(rng.poisson(2)):
+                dropout = rng.integers(1, max(2, int(0.01 * self.rate)))
+                dropout_onset = rng.integers(0, max(1, n - dropout))
+                data[dropout_onset: dropout_onset + dropout] = np.nan
+
+        if self._dtype.kind in "iu":
+            info = np.iinfo(self._dtype)
+            data = np.clip(np.round(data * info.max), info.min, info.max)
+        return data.astype(self._dtype)
+
+
+def mock_lazy_AcousticWaveformSeries(
+    name: str = "AcousticWaveformSeries",
+    duration: float = 60.0,
+    rate: float = 42000.0,
+    n_channels: Optional[int] = None,
+    dtype: str = "int16",
+    description: str = "synthetic acoustic waveform",
+    chunk_size: int = 2**20,
+    seed: int = 0,
+    nan_dropouts: bool = False,
+    **kwargs
+) -> AcousticWaveformSeries:
+    """
+    Generate a mock AcousticWaveformSeries whose data is synthesized lazily while it is written.
+
+    The data is a SyntheticAudioDataChunkIterator, so series of any duration can be written
+    with constant memory, e.g. to benchmark reading and plotting multi-hour recordings.
+
+    Parameters
+    ----------
+    name : str, optional
+        The name of the AcousticWaveformSeries. Default is "AcousticWaveformSeries".
+    duration : float, optional
+        Duration of the series in seconds. Default is 60.0.
+    rate : float, optional
+        The sampling rate in Hz. Default is 42000.0.
+    n_channels : int, optional
+        Number of channels. Default is None, for data of shape (time,).
+    dtype : str, optional
+        The dtype of the data. Default is "int16".
+    description : str, optional
+        A description of the acoustic waveform. Default is "synthetic acoustic waveform".
+    chunk_size : int, optional
+        Number of samples generated at a time, also used as the chunk shape of the dataset.
+        Default is 2**20.
+    seed : int, optional
+        Seed of the generator; each chunk is seeded with `(seed, chunk_index)`. Default is 0.
+    nan_dropouts : bool, optional
+        If True, short runs of NaN values are added. Requires a float dtype. Default is False.
+    **kwargs
+        Additional keyword arguments to pass to the AcousticWaveformSeries constructor.
+
+    Returns
+    -------
+    AcousticWaveformSeries
+        A mock AcousticWaveformSeries object whose data is a SyntheticAudioDataChunkIterator.
+    """
+    data = SyntheticAudioDataChunkIterator(
+        n_samples=int(duration * rate),
+        rate=rate,
+        n_channels=n_channels,
+        dtype=dtype,
+        chunk_size=chunk_size,
+        seed=seed,
+        nan_dropouts=nan_dropouts,
+    )
+    return AcousticWaveformSeries(
+        name=name,
+        data=data,
+        rate=rate,
+        description=description,
+        **kwargs
+    )
+
+
+def mock_SegmentedAcousticWaveformSeries(
+    name: str = "SegmentedAcousticWaveformSeries",
+    segment_durations: Sequence[float] = (0.5, 1.0, 0.25),
+    gap_durations: Sequence[float] = (10.0, 60.0),
+    rate: float = 8000.0,
+    starting_time: float = 0.0,
+    n_channels: Optional[int] = None,
+    description: str = "triggered acoustic recording",
+    seed: int = 0,
+    **kwargs
+) -> SegmentedAcousticWaveformSeries:
+    """
+    Generate a mock SegmentedAcousticWaveformSeries of random segments separated by gaps.
+
+    Parameters
+    ----------
+    name : str, optional
+        The name of the SegmentedAcousticWaveformSeries. Default is "SegmentedAcousticWaveformSeries".
+    segment_durations : sequence of float, optional
+        Duration of each segment in seconds. Default is (0.5, 1.0, 0.25).
+    gap_durations : sequence of float, optional
+        Duration of the gap after each segment but the last, in seconds. Default is (10.0, 60.0).
+    rate : float, optional
+        The sampling rate in Hz. Default is 8000.0.
+    starting_time : float, optional
+        Onset time of the first segment in seconds. Default is 0.0.
+    n_channels : int, optional
+        Number of channels. Default is None, for data of shape (time,).
+    description : str, optional
+        A description of the acoustic waveform. Default is "triggered acoustic recording".
+    seed : int, optional
+        Seed for the random number generator to ensure reproducibility. Default is 0.
+    **kwargs
+        Additional keyword arguments to pass to the SegmentedAcousticWaveformSeries constructor.
+
+    Returns
+    -------
+    SegmentedAcousticWaveformSeries
+    """
+    rng = np.random.default_rng(seed=seed)
+    channel_shape = () if n_channels is None else (n_channels,)
+    segments = [
+        rng.integers(low=-1000, high=1000, size=(int(duration * rate), *channel_shape), dtype="int16")
+        for duration in segment_durations
+    ]
+    durations = np.array([len(segment) / rate for segment in segments])
+    onset_times = starting_time + np.concatenate([[0.0], np.cumsum(durations[:-1] + np.asarray(gap_durations))])
+    data, segment_start_indices = stack_segments(segments)
+
+    return SegmentedAcousticWaveformSeries(
+        name=name,
+        data=data,
+        rate=rate,
+        starting_time=float(onset_times[0]),
+        segment_onset_times=onset_times,
+        segment_start_indices=segment_start_indices,
+        description=description,
+        **kwargs
+    )
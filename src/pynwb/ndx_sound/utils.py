@@ -0,0 +1,284 @@
+"""Helpers for reading AcousticWaveformSeries data in chunks."""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
+import os
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+import h5py
+import numpy as np
+from pynwb.file import TimeSeries
+
+from . import AcousticWaveformPreview
+from .profiling import stage
+
+DEFAULT_CHUNK_SIZE = 2**20
+MU_LAW_MU = 255
+
+
+def get_starting_time(time_series: TimeSeries) -> float:
+    """Return the starting time of a TimeSeries, treating a missing value as 0."""
+    starting_time = time_series.starting_time
+    if starting_time is None or not np.isfinite(starting_time):
+        return 0.0
+    return float(starting_time)
+
+
+def time_to_index(time_series: TimeSeries, time: float) -> int:
+    """Convert a time in seconds to a sample index, clipped to the extent of the data."""
+    index = int(np.ceil((time - get_starting_time(time_series)) * time_series.rate))
+    return min(max(index, 0), len(time_series.data))
+
+
+def read_window(data, istart: int = 0, istop: Optional[int] = None, max_workers: Optional[int] = None) -> np.ndarray:
+    """
+    Read `data[istart:istop]`, reading each chunk of the dataset in a separate thread.
+
+    Chunks are only read in parallel for chunked arrays that decompress without holding a
+    global lock, such as Zarr arrays. h5py serializes all reads, so HDF5 datasets and in-memory
+    arrays are read in one call.
+
+    Parameters
+    ----------
+    data: array-like
+    istart: int, optional
+    istop: int, optional
+    max_workers: int, optional
+        Number of threads. Default is the default of concurrent.futures.ThreadPoolExecutor.
+
+    Returns
+    -------
+    np.ndarray
+    """
+    chunks = getattr(data, "chunks", None)
+    if max_workers == 1 or not chunks or isinstance(data, (h5py.Dataset, np.ndarray)):
+        return np.asarray(data[istart:istop])
+
+    istart, istop, _ = slice(istart, istop).indices(len(data))
+    chunk_length = chunks[0]
+    boundaries = [istart, *range((istart // chunk_length + 1) * chunk_length, istop, chunk_length), istop]
+    if len(boundaries) <= 3:
+        return np.asarray(data[istart:istop])
+
+    out = np.empty((istop - istart, *data.shape[1:]), dtype=data.dtype)
+
+    def read(start, stop):
+        out[start - istart: stop - istart] = data[start:stop]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(read, boundaries[:-1], boundaries[1:]))
+    return out
+
+
+def read_samples(
+    time_series: TimeSeries,
+    istart: int = 0,
+    istop: Optional[int] = None,
+    max_workers: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Read samples as float and apply the conversion and offset of the TimeSeries.
+
+    The mu-law codes of an AcousticWaveformPreview are decoded before the conversion is applied.
+    The read and the conversion to float are profiled as the "read" and "astype" stages.
+
+    Parameters
+    ----------
+    time_series: pynwb.file.TimeSeries
+    istart: int, optional
+    istop: int, optional
+    max_workers: int, optional
+        Number of threads used to read the chunks of the data, see `read_window`. Default is the
+        default of concurrent.futures.ThreadPoolExecutor.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (time,) or (time, channels).
+    """
+    with stage("read") as current:
+        raw = read_window(time_series.data, istart, istop, max_workers=max_workers)
+        current.record_read(raw)
+    with stage("astype") as current:
+        # always a new array, `raw` may be the in-memory data of the series that must not be scaled in place
+        data = mu_law_decode(raw) if isinstance(time_series, AcousticWaveformPreview) else raw.astype(float, copy=True)
+        conversion = time_series.conversion
+        if conversion is not None and np.isfinite(conversion) and conversion != 1.0:
+            data *= conversion
+        offset = getattr(time_series, "offset", 0.0)
+        if offset:
+            data += offset
+        current.record_array(data)
+    return data
+
+
+def resample_ratio(rate: float, target_rate: float, max_denominator: int = 1000) -> Tuple[int, int]:
+    """
+    Approximate the ratio of two sampling rates by a fraction `up / down`, for scipy.signal.resample_poly.
+
+    The denominator is at most `max_denominator`, so that resample_poly only filters at the
+    rational rate.
+    """
+    ratio = Fraction(target_rate / rate).limit_denominator(max_denominator)
+    return ratio.numerator, ratio.denominator
+
+
+def resample_margin(up: int, down: int) -> int:
+    """
+    Number of input samples on each side of a block that contribute to its output with resample_poly.
+
+    This is half the length of the default filter of resample_poly in input samples, rounded up to
+    a multiple of `down` so that the margin maps to a whole number of output samples. Resampling
+    overlapping blocks with this margin gives the same result as resampling the whole signal.
+    """
+    half_length = -(-10 * max(up, down) // up)
+    return -(-half_length // down) * down
+
+
+def mu_law_encode(data: np.ndarray, mu: int = MU_LAW_MU) -> np.ndarray:
+    """
+    Compand values in [-1, 1] with the mu-law and quantize them to unsigned 8-bit codes.
+
+    Codes range from 0 to 254 so that 0.0 is encoded exactly, as 127.
+    """
+    data = np.clip(np.nan_to_num(data, nan=0.0), -1.0, 1.0)
+    companded = np.sign(data) * np.log1p(mu * np.abs(data)) / np.log1p(mu)
+    return np.round((companded + 1.0) * 127).astype("uint8")
+
+
+def mu_law_decode(codes: np.ndarray, mu: int = MU_LAW_MU) -> np.ndarray:
+    """Expand unsigned 8-bit mu-law codes to values in [-1, 1]."""
+    companded = np.asarray(codes, dtype=float) / 127 - 1.0
+    return np.sign(companded) * np.expm1(np.abs(companded) * np.log1p(mu)) / mu
+
+
+def to_mono(data: np.ndarray) -> np.ndarray:
+    """Mix down a (time, channels) array to a single channel by averaging, ignoring NaNs."""
+    if data.ndim == 1:
+        return data
+    if data.shape[1] == 1:
+        return data[:, 0]
+    valid = np.isfinite(data)
+    counts = valid.sum(axis=1)
+    total = np.where(valid, data, 0.0).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, total / np.maximum(counts, 1), np.nan)
+
+
+def iter_chunks(
+    time_series: TimeSeries,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    istart: int = 0,
+    istop: Optional[int] = None,
+    max_workers: Optional[int] = None,
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Iterate over the samples of a TimeSeries in contiguous chunks.
+
+    Parameters
+    ----------
+    time_series: pynwb.file.TimeSeries
+    chunk_size: int, optional
+        Number of samples per chunk. Default is 2**20.
+    istart: int, optional
+    istop: int, optional
+    max_workers: int, optional
+        Number of threads used to read the chunks of the data, see `read_window`. Default is the
+        default of concurrent.futures.ThreadPoolExecutor.
+
+    Yields
+    ------
+    tuple of int and np.ndarray
+        The index of the first sample of the chunk and the chunk read with `read_samples`.
+    """
+    if istop is None:
+        istop = len(time_series.data)
+    for chunk_start in range(istart, istop, chunk_size):
+        chunk_stop = min(chunk_start + chunk_size, istop)
+        yield chunk_start, read_samples(time_series, chunk_start, chunk_stop, max_workers=max_workers)
+
+
+def power_to_db(power: np.ndarray, amin: float = 1e-10, top_db: Optional[float] = 80.0) -> np.ndarray:
+    """Convert a power spectrogram to decibels, following the conventions of librosa.power_to_db, keeping NaNs."""
+    db = 10.0 * np.log10(np.maximum(amin, power))
+    if top_db is not None and not np.isnan(db).all():
+        db = np.maximum(db, np.nanmax(db) - top_db)
+    return db
+
+
+def iter_frames(
+    time_series: TimeSeries,
+    frame_length: int,
+    hop_length: int,
+    istart: int = 0,
+    istop: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_workers: Optional[int] = None,
+) -> Iterator[np.ndarray]:
+    """
+    Iterate over blocks of overlapping frames of a TimeSeries, mixed down to mono.
+
+    The data is read once: the samples shared by consecutive chunks are carried over
+    instead of being read again. Frames are not centered, i.e. frame `i` starts at sample
+    `istart + i * hop_length`.
+
+    Parameters
+    ----------
+    time_series: pynwb.file.TimeSeries
+    frame_length: int
+    hop_length: int
+    istart: int, optional
+    istop: int, optional
+    chunk_size: int, optional
+        Number of samples read at a time. Default is 2**20.
+    max_workers: int, optional
+        Number of threads used to read the chunks of the data, see `read_window`. Default is the
+        default of concurrent.futures.ThreadPoolExecutor.
+
+    Yields
+    ------
+    np.ndarray
+        Read-only block of frames of shape (n_frames, frame_length).
+    """
+    tail = np.empty(0)
+    for _, chunk in iter_chunks(
+        time_series, chunk_size=chunk_size, istart=istart, istop=istop, max_workers=max_workers
+    ):
+        buffer = np.concatenate([tail, to_mono(chunk)])
+        n_frames = 0 if len(buffer) < frame_length else 1 + (len(buffer) - frame_length) // hop_length
+        if n_frames:
+            yield np.lib.stride_tricks.sliding_window_view(buffer, frame_length)[::hop_length][:n_frames]
+        tail = buffer[n_frames * hop_length:]
+
+
+def map_bounded(function: Callable, items: Iterable, max_workers: Optional[int] = None) -> Iterator[Any]:
+    """
+    Apply a function to each item on a thread pool, yielding the results in order.
+
+    Unlike ThreadPoolExecutor.map, the items are produced lazily in the calling thread, and at
+    most 2 * `max_workers` of them are submitted ahead of the results yielded, so that memory
+    use is bounded when producing the items, e.g. reading chunks, is faster than the function.
+
+    Parameters
+    ----------
+    function: callable
+    items: iterable
+    max_workers: int, optional
+        Number of threads. Default is min(32, os.cpu_count() + 4), as for ThreadPoolExecutor.
+
+    Yields
+    ------
+    object
+        The result of `function` for each item.
+    """
+    if max_workers is None:
+        max_workers = min(32, (os.cpu_count() or 1) + 4)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(function, item))
+            if len(pending) >= 2 * max_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -1,4 +1,4 @@
-from typing import Tuple
+from typing import Sequence, Tuple
 
 from librosa import amplitude_to_db, stft
 from librosa import display as librosa_display
@@ -6,21 +6,28 @@ import matplotlib.pyplot as plt
 import numpy as np
 from IPython.core.display_functions import clear_output, display
 from IPython.display import Audio
-from ipywidgets import Output, VBox
+from ipywidgets import HBox, Label, Output, VBox
 from ipywidgets.widgets.interaction import show_inline_matplotlib_plots
 from matplotlib.gridspec import GridSpec
-from matplotlib.ticker import FormatStrFormatter
+from matplotlib.ticker import FormatStrFormatter, FuncFormatter
 from nwbwidgets.base import fig2widget
 from nwbwidgets.controllers import StartAndDurationController
 from nwbwidgets.timeseries import AbstractTraceWidget
-from nwbwidgets.utils.timeseries import (
-    get_timeseries_tt,
-    timeseries_time_to_ind,
-    get_timeseries_in_units,
-)
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from nwbwidgets.utils.timeseries import get_timeseries_maxt, get_timeseries_mint
 from pynwb.file import TimeSeries
 
-from . import AcousticWaveformSeries
+from . import AcousticWaveformSeries, SegmentedAcousticWaveformSeries
+from .comparison import WindowedSpectrogram, compute_spectrograms
+from .overview import compute_overview
+from .preview import get_playback_series
+from .profiling import stage
+from .render import pool_frames, rasterize_spectrogram, rasterize_waveform, waveform_value_range
+from .segments import Segment, fill_gaps, get_segment_times, read_segments
+from .utils import get_starting_time, read_samples, time_to_index, to_mono
+
+BACKENDS = ("matplotlib", "raster")
 
 
 class AcousticWaveformWidget(AbstractTraceWidget):
@@ -28,8 +35,21 @@ class AcousticWaveformWidget(AbstractTraceWidget):
             self,
             acoustic_waveform_series: AcousticWaveformSeries,
             foreign_time_window_controller: StartAndDurationController = None,
+            show_overview: bool = True,
+            backend: str = "matplotlib",
+            full_fidelity: bool = False,
             **kwargs
     ):
+        self.show_overview = show_overview
+        self.backend = backend
+        self.full_fidelity = full_fidelity
+        self.overview = None
+        # the default controller of nwbwidgets ends at starting_time + len(data) / rate, which is
+        # before the end of a segmented series
+        self.owns_time_window_controller = foreign_time_window_controller is None
+        if self.owns_time_window_controller:
+            tmin, tmax = _get_time_range(acoustic_waveform_series)
+            foreign_time_window_controller = StartAndDurationController(tmax, tmin)
         super().__init__(
             timeseries=acoustic_waveform_series,
             foreign_time_window_controller=foreign_time_window_controller,
@@ -40,22 +60,85 @@ class AcousticWaveformWidget(AbstractTraceWidget):
         time_series = self.controls["timeseries"].value
         time_window = self.controls["time_window"].value
 
-        self.out_fig = acoustic_waveform_widget(time_series, time_window)
+        with stage("AcousticWaveformWidget.render"):
+            self.out_fig = acoustic_waveform_widget(
+                time_series, time_window, full_fidelity=self.full_fidelity, backend=self.backend
+            )
+            if self.show_overview:
+                self.overview = overview_widget(
+                    time_series, self.controls["time_window"], full_fidelity=self.full_fidelity
+                )
 
         def on_change(change):
             time_window = self.controls["time_window"].value
 
-            with self.out_fig.children[0]:
-                clear_output(wait=True)
-                plot_sound(time_series, time_window)
-                show_inline_matplotlib_plots()
+            with stage("AcousticWaveformWidget.update"):
+                with self.out_fig.children[0]:
+                    clear_output(wait=True)
+                    plot_sound(time_series, time_window, backend=self.backend)
+                    show_inline_matplotlib_plots()
 
-            with self.out_fig.children[1]:
-                clear_output(wait=True)
-                display(play_sound(time_series, time_window))
+                with self.out_fig.children[1]:
+                    clear_output(wait=True)
+                    display(play_sound(time_series, time_window, full_fidelity=self.full_fidelity))
 
         self.controls["time_window"].observe(on_change)
 
+    def set_children(self):
+        # the overview strip sits right above the detailed view
+        children = [self.out_fig] if self.overview is None else [self.overview, self.out_fig]
+        if self.owns_time_window_controller:
+            children.insert(0, self.time_window_controller)
+        self.children = children
+
+
+def _check_backend(backend: str):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}.")
+
+
+def _axes_size_in_pixels(ax: plt.Axes) -> Tuple[int, int]:
+    bbox = ax.get_window_extent()
+    return max(1, int(round(bbox.width))), max(1, int(round(bbox.height)))
+
+
+def _read_time_window(time_series: TimeSeries, time_window=None) -> Tuple[np.ndarray, float]:
+    """
+    Read the samples within a time window, or all samples, with `read_samples`, which decompresses
+    the chunks of Zarr datasets in parallel. Returns the samples and the time of the first one.
+    """
+    if time_window is None:
+        istart, istop = 0, len(time_series.data)
+    else:
+        istart, istop = time_to_index(time_series, time_window[0]), time_to_index(time_series, time_window[1])
+    return read_samples(time_series, istart, istop), get_starting_time(time_series) + istart / time_series.rate
+
+
+def _get_segments_time_window(time_series: SegmentedAcousticWaveformSeries, time_window=None) -> Tuple[float, float]:
+    """Return the time window, defaulting to the span from the first onset to the last offset."""
+    if time_window is not None:
+        return tuple(time_window)
+    onsets, offsets = get_segment_times(time_series)
+    if not len(onsets):
+        return 0.0, 0.0
+    return float(onsets[0]), float(offsets[-1])
+
+
+def _get_time_range(time_series: TimeSeries) -> Tuple[float, float]:
+    """Return the first and last time of a series, from the first onset to the last offset of a segmented series."""
+    if isinstance(time_series, SegmentedAcousticWaveformSeries):
+        return _get_segments_time_window(time_series)
+    return get_timeseries_mint(time_series), get_timeseries_maxt(time_series)
+
+
+def _segment_columns(segment: Segment, rate: float, time_window, width: int) -> slice:
+    """Columns of an image spanning `time_window` that are covered by a segment."""
+    scale = width / (time_window[1] - time_window[0])
+    first = int(np.floor((segment.starting_time - time_window[0]) * scale))
+    stop = int(np.ceil((segment.starting_time + len(segment.data) / rate - time_window[0]) * scale))
+    first = min(max(first, 0), width - 1)
+    return slice(first, min(max(stop, first + 1), width))
+
 
 def plot_spectrogram(
         time_series: TimeSeries,
@@ -66,6 +149,7 @@ def plot_spectrogram(
         cax: plt.Axes = None,
         stft_kwargs: dict = None,
         specshow_kwargs: dict = None,
+        backend: str = "matplotlib",
         **kwargs,
 ):
     """
@@ -84,6 +168,9 @@ def plot_spectrogram(
         kwargs passed to librosa.stft
     specshow_kwargs: dict
         kwargs passed to librosa.display.specshow
+    backend: str, optional
+        "matplotlib" draws every STFT frame with librosa.display.specshow, "raster" draws an
+        image the size of the axes in pixels. Default is "matplotlib"
 
     Returns
     -------
@@ -91,6 +178,8 @@ def plot_spectrogram(
 
     """
 
+    _check_backend(backend)
+
     if stft_kwargs is None:
         stft_kwargs = dict()
 
@@ -99,43 +188,135 @@ def plot_spectrogram(
 
     if ax is None:
         fig, ax = plt.subplots(figsize=figsize)
-    else:
-        fig = ax.figure
 
-    if time_window is not None:
-        istart = timeseries_time_to_ind(time_series, time_window[0])
-        istop = timeseries_time_to_ind(time_series, time_window[1])
-        data, units = get_timeseries_in_units(time_series, istart, istop)
-    else:
-        data = time_series.data[:].astype(float)
-    sr = time_series.rate
-    starting_time = time_series.starting_time if time_window is None else time_window[0]
+    if isinstance(time_series, SegmentedAcousticWaveformSeries):
+        with stage("plot_spectrogram"):
+            _plot_segmented_spectrogram(
+                time_series, time_window, n_fft, ax, cax, backend, stft_kwargs, specshow_kwargs
+            )
+        return ax
 
-    D = amplitude_to_db(np.abs(stft(data, n_fft=n_fft, **stft_kwargs)))
+    with stage("plot_spectrogram"):
+        data, starting_time = _read_time_window(time_series, time_window)
+        sr = time_series.rate
 
-    tt = np.arange(len(D.T)) / sr * n_fft / 4 + starting_time
+        with stage("stft") as current:
+            D = amplitude_to_db(np.abs(stft(data, n_fft=n_fft, **stft_kwargs)))
+            current.record_array(D)
 
-    img = librosa_display.specshow(
-        D,
-        y_axis="log",
-        x_axis="time",
-        sr=sr,
-        cmap="plasma",
-        ax=ax,
-        x_coords=tt,
-        **specshow_kwargs,
-    )
+        tt = np.arange(len(D.T)) / sr * n_fft / 4 + starting_time
+
+        _show_spectrogram(D, tt, sr, n_fft, ax=ax, cax=cax, backend=backend, specshow_kwargs=specshow_kwargs)
+
+    return ax
+
+
+def _plot_segmented_spectrogram(
+        time_series: SegmentedAcousticWaveformSeries,
+        time_window,
+        n_fft: int,
+        ax: plt.Axes,
+        cax: plt.Axes,
+        backend: str,
+        stft_kwargs: dict,
+        specshow_kwargs: dict,
+):
+    """Plot the spectrogram of the segments within a time window, leaving the gaps between them blank."""
+    time_window = _get_segments_time_window(time_series, time_window)
+    segments = read_segments(time_series, time_window)
+    sr = time_series.rate
+    hop_length = stft_kwargs.get("hop_length", n_fft // 4)
+    n_frequencies = 1 + n_fft // 2
+    ax.set_xlim(time_window)
+    if not segments:
+        ax.set_xlabel("time (s)")
+        return
+
+    with stage("stft") as current:
+        magnitudes = [
+            np.abs(stft(np.nan_to_num(to_mono(segment.data)), n_fft=n_fft, **stft_kwargs)) for segment in segments
+        ]
+        # convert all segments at once so that they share the dB reference
+        D = amplitude_to_db(np.concatenate(magnitudes, axis=1))
+        current.record_array(D)
+    segment_D = np.split(D, np.cumsum([magnitude.shape[1] for magnitude in magnitudes])[:-1], axis=1)
+
+    if backend == "raster":
+        # place each segment in its own columns of a grid the width of the axes in pixels
+        width, _ = _axes_size_in_pixels(ax)
+        D_grid = np.full((n_frequencies, width), np.nan)
+        for segment, D_segment in zip(segments, segment_D):
+            columns = _segment_columns(segment, sr, time_window, width)
+            D_grid[:, columns] = pool_frames(D_segment, columns.stop - columns.start)
+        tt = np.linspace(*time_window, width)
+    else:
+        # frame times of each segment, with two empty frames over each gap that place the cell
+        # edges half a hop after the last frame and half a hop before the next first frame
+        hop_duration = hop_length / sr
+        D_grid = np.full((n_frequencies, max(0, sum(D_segment.shape[1] + 2 for D_segment in segment_D) - 2)), np.nan)
+        tt = []
+        column = 0
+        for segment, D_segment in zip(segments, segment_D):
+            n_frames = D_segment.shape[1]
+            D_grid[:, column: column + n_frames] = D_segment
+            if tt:
+                tt.append([tt[-1][-1] + hop_duration, segment.starting_time - hop_duration])
+            tt.append(segment.starting_time + np.arange(n_frames) * hop_duration)
+            column += n_frames + 2
+        tt = np.maximum.accumulate(np.concatenate(tt))
+
+    _show_spectrogram(D_grid, tt, sr, n_fft, ax=ax, cax=cax, backend=backend, specshow_kwargs=specshow_kwargs)
+    ax.set_xlim(time_window)
+
+
+def _show_spectrogram(
+        D: np.ndarray,
+        tt: np.ndarray,
+        sr: float,
+        n_fft: int,
+        ax: plt.Axes,
+        cax: plt.Axes = None,
+        backend: str = "matplotlib",
+        specshow_kwargs: dict = None,
+):
+    """Draw a spectrogram in dB that was already computed, with its colorbar."""
+    if backend == "raster":
+        with stage("rasterize") as current:
+            width, height = _axes_size_in_pixels(ax)
+            image, frequency_range = rasterize_spectrogram(
+                D, np.fft.rfftfreq(n_fft, d=1.0 / sr), width=width, height=height
+            )
+            current.record_array(image)
+        img = ax.imshow(
+            image,
+            extent=(tt[0], tt[-1], *frequency_range),
+            aspect="auto",
+            cmap="plasma",
+            interpolation="nearest",
+        )
+        ax.yaxis.set_major_formatter(FuncFormatter(lambda y, pos: f"{2 ** y:.0f}"))
+        ax.set_ylabel("Hz")
+    else:
+        with stage("specshow"):
+            img = librosa_display.specshow(
+                D,
+                y_axis="log",
+                x_axis="time",
+                sr=sr,
+                cmap="plasma",
+                ax=ax,
+                x_coords=tt,
+                **(specshow_kwargs or dict()),
+            )
 
     ax.set_xlabel("time (s)")
     ax.xaxis.set_major_formatter(FormatStrFormatter('%.2f'))
     ax.tick_params(axis='x', labelrotation=45)
 
-    fig.colorbar(img, ax=ax, format="%+2.f dB", cax=cax)
-
-    return ax
+    ax.figure.colorbar(img, ax=ax, format="%+2.f dB", cax=cax)
 
 
-def plot_waveform(time_series: TimeSeries, time_window=None, ax=None, figsize=(8, 4)):
+def plot_waveform(time_series: TimeSeries, time_window=None, ax=None, figsize=(8, 4), backend: str = "matplotlib"):
     """
     Plot waveform of sound
 
@@ -145,39 +326,110 @@ def plot_waveform(time_series: TimeSeries, time_window=None, ax=None, figsize=(8
     time_window
     ax
     figsize
+    backend: str, optional
+        "matplotlib" plots every sample, "raster" draws an image the size of the axes in pixels.
+        Default is "matplotlib"
 
     Returns
     -------
 
     """
+    _check_backend(backend)
+
     if ax is None:
         fig, ax = plt.subplots(figsize=figsize)
 
-    if time_window is not None:
-        istart = timeseries_time_to_ind(time_series, time_window[0])
-        istop = timeseries_time_to_ind(time_series, time_window[1])
-        data, units = get_timeseries_in_units(time_series, istart, istop)
-        tt = get_timeseries_tt(time_series, istart, istop)
-    else:
-        data = time_series.data[:]
-        tt = get_timeseries_tt(time_series)
+    if isinstance(time_series, SegmentedAcousticWaveformSeries):
+        with stage("plot_waveform"):
+            _plot_segmented_waveform(time_series, time_window, ax=ax, backend=backend)
+        return ax
 
-    ax.plot(tt, data, "k")
+    with stage("plot_waveform"):
+        data, starting_time = _read_time_window(time_series, time_window)
+        tt = np.arange(len(data)) / time_series.rate + starting_time
 
-    ax.axis("off")
-    ax.autoscale(enable=True, axis="x", tight=True)
+        _show_waveform(tt, data, ax=ax, backend=backend)
 
     return ax
 
 
-def plot_sound(time_series: TimeSeries, time_window=None, figsize=None, **kwargs):
+def _plot_segmented_waveform(
+        time_series: SegmentedAcousticWaveformSeries,
+        time_window,
+        ax: plt.Axes,
+        backend: str = "matplotlib",
+):
+    """Plot the waveform of the segments within a time window, leaving the gaps between them blank."""
+    time_window = _get_segments_time_window(time_series, time_window)
+    segments = read_segments(time_series, time_window)
+    sr = time_series.rate
+
+    if backend == "raster" and segments:
+        with stage("rasterize") as current:
+            width, height = _axes_size_in_pixels(ax)
+            value_range = waveform_value_range(np.concatenate([np.ravel(segment.data) for segment in segments]))
+            image = np.zeros((height, width), dtype=bool)
+            for segment in segments:
+                columns = _segment_columns(segment, sr, time_window, width)
+                image[:, columns] |= rasterize_waveform(
+                    segment.data, width=columns.stop - columns.start, height=height, value_range=value_range
+                )
+            current.record_array(image)
+        ax.imshow(
+            image,
+            extent=(*time_window, *value_range),
+            aspect="auto",
+            cmap="gray_r",
+            interpolation="nearest",
+        )
+    elif backend != "raster":
+        with stage("plot"):
+            for segment in segments:
+                ax.plot(np.arange(len(segment.data)) / sr + segment.starting_time, segment.data, "k")
+
+    ax.axis("off")
+    ax.set_xlim(time_window)
+
+
+def _show_waveform(tt: np.ndarray, data: np.ndarray, ax: plt.Axes, backend: str = "matplotlib"):
+    """Draw waveform samples that were already read."""
+    if backend == "raster":
+        with stage("rasterize") as current:
+            width, height = _axes_size_in_pixels(ax)
+            value_range = waveform_value_range(data)
+            image = rasterize_waveform(data, width=width, height=height, value_range=value_range)
+            current.record_array(image)
+        if len(tt):
+            ax.imshow(
+                image,
+                extent=(tt[0], tt[-1], *value_range),
+                aspect="auto",
+                cmap="gray_r",
+                interpolation="nearest",
+            )
+    else:
+        with stage("plot"):
+            ax.plot(tt, data, "k")
+
+    ax.axis("off")
+    ax.autoscale(enable=True, axis="x", tight=True)
+
+
+def plot_sound(time_series: TimeSeries, time_window=None, figsize=None, backend: str = "matplotlib", **kwargs):
     """
     Figure for waveform and spectrogram
 
+    The full-resolution data is plotted even if the series has a preview. The preview is mixed
+    down to mono, band-limited to half its rate and quantized to 8 bits, which would hide the
+    channels, the high frequencies and the quiet parts of the spectrogram of a detailed view.
+    Playback and the overview, which only need the coarse content, use the preview instead.
+
     Parameters
     ----------
     time_series
     figsize
+    backend: str, optional
+        "matplotlib" or "raster", see plot_waveform and plot_spectrogram. Default is "matplotlib"
     kwargs
 
     Returns
@@ -194,35 +446,140 @@ def plot_sound(time_series: TimeSeries, time_window=None, figsize=None, **kwargs
         width_ratios=[25, 1],
     )
 
-    fig = plt.figure(figsize=figsize)
+    with stage("plot_sound"):
+        fig = plt.figure(figsize=figsize)
 
-    ax1 = fig.add_subplot(gs[0, 0])
+        ax1 = fig.add_subplot(gs[0, 0])
 
-    plot_waveform(time_series, time_window=time_window, ax=ax1)
+        plot_waveform(time_series, time_window=time_window, ax=ax1, backend=backend)
 
-    ax2 = fig.add_subplot(gs[1, 0])
-    cax = fig.add_subplot(gs[1, 1])
+        ax2 = fig.add_subplot(gs[1, 0])
+        cax = fig.add_subplot(gs[1, 1])
 
-    plot_spectrogram(time_series, time_window=time_window, ax=ax2, cax=cax, **kwargs)
+        plot_spectrogram(time_series, time_window=time_window, ax=ax2, cax=cax, backend=backend, **kwargs)
 
     return fig
 
 
-def play_sound(time_series: TimeSeries, time_window=None):
-    """Returns the Audio widget."""
+def plot_sounds(
+        time_series_list: Sequence[TimeSeries],
+        time_window,
+        n_fft: int = 1024,
+        rate: float = None,
+        figsize=None,
+        backend: str = "matplotlib",
+        max_workers: int = None,
+        stft_kwargs: dict = None,
+        specshow_kwargs: dict = None,
+):
+    """
+    Figure for the waveform and spectrogram of several series in one synchronized time window.
+    The series are read and transformed together with `compute_spectrograms`.
 
-    if time_window is not None:
-        istart = timeseries_time_to_ind(time_series, time_window[0])
-        istop = timeseries_time_to_ind(time_series, time_window[1])
-        data, units = get_timeseries_in_units(time_series, istart, istop)
-    else:
-        data = time_series.data[:].astype(float)
-    sr = time_series.rate
+    Parameters
+    ----------
+    time_series_list: sequence of pynwb.file.TimeSeries
+    time_window: tuple
+    n_fft: int, optional
+        Default is 1024
+    rate: float, optional
+        Common sampling rate to resample all series to. Default is to keep the rate of each series.
+    figsize: tuple
+    backend: str, optional
+        "matplotlib" or "raster", see plot_waveform and plot_spectrogram. Default is "matplotlib"
+    max_workers: int, optional
+        Number of threads used to read the data.
+    stft_kwargs: dict
+        kwargs passed to librosa.stft
+    specshow_kwargs: dict
+        kwargs passed to librosa.display.specshow
+
+    Returns
+    -------
+    plt.Figure
+
+    """
+    spectrograms = compute_spectrograms(
+        time_series_list, time_window, n_fft=n_fft, rate=rate, max_workers=max_workers, stft_kwargs=stft_kwargs
+    )
+    return _plot_spectrograms(
+        spectrograms, time_window, n_fft=n_fft, figsize=figsize, backend=backend, specshow_kwargs=specshow_kwargs
+    )
+
+
+def _plot_spectrograms(
+        spectrograms: Sequence[WindowedSpectrogram],
+        time_window,
+        n_fft: int = 1024,
+        figsize=None,
+        backend: str = "matplotlib",
+        specshow_kwargs: dict = None,
+):
+    _check_backend(backend)
+
+    gs = GridSpec(
+        nrows=2 * len(spectrograms),
+        ncols=2,
+        hspace=0.04,
+        wspace=0.04,
+        height_ratios=[1, 5] * len(spectrograms),
+        width_ratios=[25, 1],
+    )
+
+    with stage("plot_sounds"):
+        fig = plt.figure(figsize=figsize)
+        shared_ax = None
+        for i, spectrogram in enumerate(spectrograms):
+            ax_waveform = fig.add_subplot(gs[2 * i, 0], sharex=shared_ax)
+            shared_ax = shared_ax or ax_waveform
+            tt = np.arange(len(spectrogram.data)) / spectrogram.rate + spectrogram.starting_time
+            _show_waveform(tt, spectrogram.data, ax=ax_waveform, backend=backend)
+            ax_waveform.set_title(spectrogram.name, fontsize="small", loc="left")
+
+            ax_spectrogram = fig.add_subplot(gs[2 * i + 1, 0], sharex=shared_ax)
+            cax = fig.add_subplot(gs[2 * i + 1, 1])
+            _show_spectrogram(
+                spectrogram.spectrogram_db,
+                spectrogram.frame_times,
+                spectrogram.rate,
+                n_fft,
+                ax=ax_spectrogram,
+                cax=cax,
+                backend=backend,
+                specshow_kwargs=specshow_kwargs,
+            )
+            if i < len(spectrograms) - 1:
+                ax_spectrogram.set_xlabel("")
+                ax_spectrogram.tick_params(axis="x", labelbottom=False)
+        if shared_ax is not None:
+            shared_ax.set_xlim(time_window)
+
+    return fig
+
+
+def play_sound(time_series: TimeSeries, time_window=None, full_fidelity: bool = False):
+    """
+    Returns the Audio widget.
+
+    If the series has a preview and `full_fidelity` is False, the preview is played.
+    """
+
+    with stage("play_sound"):
+        if isinstance(time_series, SegmentedAcousticWaveformSeries):
+            # the gaps between segments are played as silence
+            time_window = _get_segments_time_window(time_series, time_window)
+            data = fill_gaps(read_segments(time_series, time_window), time_series.rate, time_window, fill_value=0.0)
+            with stage("encode"):
+                return Audio(data, rate=time_series.rate)
 
-    return Audio(data, rate=sr)
+        playback_series = get_playback_series(time_series, full_fidelity=full_fidelity)
+        data, _ = _read_time_window(playback_series, time_window)
 
+        with stage("encode"):
+            return Audio(data, rate=playback_series.rate)
 
-def play_sound_widget(time_series: TimeSeries, time_window=None):
+
+def play_sound_widget(time_series: TimeSeries, time_window=None, full_fidelity: bool = False):
     """
     Widget for playing sound.
 
@@ -230,6 +587,8 @@ def play_sound_widget(time_series: TimeSeries, time_window=None):
     ----------
     time_series
     time_window
+    full_fidelity: bool, optional
+        Whether to play the data instead of the preview of the series, if any. Default is False
 
     Returns
     -------
@@ -237,17 +596,19 @@ def play_sound_widget(time_series: TimeSeries, time_window=None):
     """
     out = Output()
     with out:
-        display(play_sound(time_series, time_window))
+        display(play_sound(time_series, time_window, full_fidelity=full_fidelity))
     return out
 
 
-def acoustic_waveform_widget(time_series: TimeSeries, time_window=None, **kwargs):
+def acoustic_waveform_widget(time_series: TimeSeries, time_window=None, full_fidelity: bool = False, **kwargs):
     """
     Entire widget, with waveform, spectrogram, and sound.
 
     Parameters
     ----------
     time_series
+    full_fidelity: bool, optional
+        Whether to play the data instead of the preview of the series, if any. Default is False
     kwargs
 
     Returns
@@ -258,11 +619,179 @@ def acoustic_waveform_widget(time_series: TimeSeries, time_window=None, **kwargs
     return VBox(
         [
             fig2widget(plot_sound(time_series, time_window, **kwargs)),
-            play_sound_widget(time_series, time_window),
+            play_sound_widget(time_series, time_window, full_fidelity=full_fidelity),
         ]
     )
 
 
+class AcousticWaveformComparisonWidget(VBox):
+    """Waveforms, spectrograms and sounds of several series in one synchronized time window."""
+
+    def __init__(
+            self,
+            time_series_list: Sequence[TimeSeries],
+            foreign_time_window_controller: StartAndDurationController = None,
+            n_fft: int = 1024,
+            rate: float = None,
+            backend: str = "matplotlib",
+            max_workers: int = None,
+    ):
+        super().__init__()
+        self.time_series_list = list(time_series_list)
+        self.n_fft = n_fft
+        self.rate = rate
+        self.backend = backend
+        self.max_workers = max_workers
+
+        if foreign_time_window_controller is None:
+            time_ranges = [_get_time_range(time_series) for time_series in self.time_series_list]
+            tmin = min(tmin for tmin, _ in time_ranges)
+            tmax = max(tmax for _, tmax in time_ranges)
+            self.time_window_controller = StartAndDurationController(tmax, tmin)
+        else:
+            self.time_window_controller = foreign_time_window_controller
+
+        self.out_fig = Output()
+        self.out_audio = HBox()
+        self.update()
+        self.time_window_controller.observe(self.update, names="value")
+
+        if foreign_time_window_controller is None:
+            self.children = [self.time_window_controller, self.out_fig, self.out_audio]
+        else:
+            self.children = [self.out_fig, self.out_audio]
+
+    def update(self, change=None):
+        time_window = self.time_window_controller.value
+        with stage("AcousticWaveformComparisonWidget.update"):
+            spectrograms = compute_spectrograms(
+                self.time_series_list, time_window, n_fft=self.n_fft, rate=self.rate, max_workers=self.max_workers
+            )
+
+            with self.out_fig:
+                clear_output(wait=True)
+                _plot_spectrograms(spectrograms, time_window, n_fft=self.n_fft, backend=self.backend)
+                show_inline_matplotlib_plots()
+
+            players = []
+            for spectrogram in spectrograms:
+                player = Output()
+                if len(spectrogram.data):
+                    with player:
+                        display(Audio(spectrogram.data, rate=spectrogram.rate))
+                players.append(VBox([Label(spectrogram.name), player]))
+            self.out_audio.children = players
+
+
+def overview_widget(
+        time_series: TimeSeries,
+        time_window_controller: StartAndDurationController = None,
+        n_bins: int = 2000,
+        height: int = 200,
+        full_fidelity: bool = False,
+        **kwargs,
+):
+    """
+    Overview strip of the entire recording, with the decimated waveform envelope above
+    a low-resolution spectrogram. The overview is computed once with `compute_overview`,
+    from the preview of the series if it has one.
+
+    Parameters
+    ----------
+    time_series: pynwb.file.TimeSeries
+    time_window_controller: StartAndDurationController, optional
+        If provided, the current time window is highlighted and clicking on the overview
+        centers the time window on the clicked time.
+    n_bins: int, optional
+        Default is 2000
+    height: int, optional
+        Height of the figure in pixels. Default is 200
+    full_fidelity: bool, optional
+        Whether to compute the overview from the data instead of the preview. Default is False
+    kwargs: dict
+        kwargs passed to compute_overview
+
+    Returns
+    -------
+    plotly.graph_objects.FigureWidget
+
+    """
+    overview = compute_overview(get_playback_series(time_series, full_fidelity=full_fidelity), n_bins=n_bins, **kwargs)
+    tt = overview.bin_times + overview.bin_duration / 2
+
+    fig = go.FigureWidget(
+        make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.3, 0.7], vertical_spacing=0.02)
+    )
+    fig.add_trace(
+        go.Scatter(x=tt, y=overview.envelope_max, mode="lines", line=dict(color="black", width=1)),
+        row=1,
+        col=1,
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=tt,
+            y=overview.envelope_min,
+            mode="lines",
+            line=dict(color="black", width=1),
+            fill="tonexty",
+            fillcolor="black",
+        ),
+        row=1,
+        col=1,
+    )
+    fig.add_trace(
+        go.Heatmap(
+            x=tt,
+            y=overview.frequencies,
+            z=overview.spectrogram_db,
+            colorscale="Plasma",
+            showscale=False,
+        ),
+        row=2,
+        col=1,
+    )
+    fig.update_layout(height=height, showlegend=False, margin=dict(l=60, r=20, t=10, b=30))
+    fig.update_yaxes(showticklabels=False, row=1, col=1)
+    fig.update_yaxes(title_text="Hz", row=2, col=1)
+    fig.update_xaxes(title_text="time (s)", row=2, col=1)
+
+    if time_window_controller is None:
+        return fig
+
+    def on_click(trace, points, selector):
+        if not points.xs:
+            return
+        t0, t1 = time_window_controller.value
+        duration = t1 - t0
+        start = max(points.xs[0] - duration / 2, time_window_controller.vmin)
+        time_window_controller.slider.value = min(start, time_window_controller.vmax - duration)
+
+    for trace in fig.data:
+        trace.on_click(on_click)
+
+    def show_time_window(change=None):
+        t0, t1 = time_window_controller.value
+        fig.layout.shapes = [
+            dict(
+                type="rect",
+                xref="x",
+                yref="paper",
+                x0=t0,
+                x1=t1,
+                y0=0,
+                y1=1,
+                fillcolor="white",
+                opacity=0.4,
+                line=dict(color="white", width=1),
+            )
+        ]
+
+    show_time_window()
+    time_window_controller.observe(show_time_window, names="value")
+
+    return fig
+
+
 def load_widgets():
     """Load AcousticWaveformWidget into nwbwidgets, to use as default visualization
     for AcousticWaveformSeries data."""
@@ -3,7 +3,11 @@ from pynwb.testing import AcquisitionH5IOMixin, TestCase
 import pytest
 
 from ndx_sound import AcousticWaveformSeries
-from ndx_sound.testing.mock import mock_AcousticWaveformSeries
+from ndx_sound.testing.mock import (
+    SyntheticAudioDataChunkIterator,
+    mock_AcousticWaveformSeries,
+    mock_lazy_AcousticWaveformSeries,
+)
 
 
 class TestAcousticWaveformSeriesConstructor(TestCase):
@@ -62,6 +66,41 @@ class TestAcousticWaveformSeriesWidget(TestCase):
         controller = StartAndDurationController(tmin=0.1, tmax=0.3)
         AcousticWaveformWidget(acoustic_waveform_series, controller)
 
+    def test_plot_waveform_raster_with_degenerate_values(self):
+        """Test that constant and all-NaN windows are drawn with a finite, non-empty extent."""
+        pytest.importorskip("nwbwidgets", reason="nwbwidgets not installed")
+        pytest.importorskip("librosa", reason="librosa not installed")
+        import warnings
+        from ndx_sound.widgets import plot_waveform
+
+        for value in (0.5, np.nan):
+            acoustic_waveform_series = AcousticWaveformSeries(
+                name="acoustic_stimulus",
+                data=np.full(1000, value),
+                rate=1000.0,
+                description="acoustic stimulus description",
+            )
+            with warnings.catch_warnings():
+                warnings.simplefilter("error", RuntimeWarning)
+                ax = plot_waveform(acoustic_waveform_series, backend="raster")
+            bottom, top = ax.images[0].get_extent()[2:]
+            self.assertTrue(np.isfinite([bottom, top]).all())
+            self.assertLess(bottom, top)
+
+    def test_AcousticWaveformWidget_with_segments(self):
+        """Test that the time window controller spans all segments."""
+        pytest.importorskip("nwbwidgets", reason="nwbwidgets not installed")
+        pytest.importorskip("librosa", reason="librosa not installed")
+        from ndx_sound.segments import get_segment_times
+        from ndx_sound.testing.mock import mock_SegmentedAcousticWaveformSeries
+        from ndx_sound.widgets import AcousticWaveformWidget
+
+        segmented_series = mock_SegmentedAcousticWaveformSeries()
+        onsets, offsets = get_segment_times(segmented_series)
+        widget = AcousticWaveformWidget(segmented_series)
+        self.assertEqual(widget.time_window_controller.vmin, onsets[0])
+        self.assertEqual(widget.time_window_controller.vmax, offsets[-1])
+
 
 def test_constructor_with_custom_unit():
     """Test that the constructor accepts a custom unit."""
@@ -121,4 +160,40 @@ def test_mock_acoustic_waveform_series():
     assert aws.name == custom_name
     assert aws.description == custom_description
     assert aws.rate == custom_rate
-    assert aws.data.shape == custom_shape
\ No newline at end of file
+    assert aws.data.shape == custom_shape
+
+
+def test_synthetic_audio_data_chunk_iterator():
+    """Test that synthetic chunks are deterministic and independent of the order of generation."""
+    iterator = SyntheticAudioDataChunkIterator(
+        n_samples=10000, rate=8000.0, dtype="float32", chunk_size=3000, seed=2, nan_dropouts=True
+    )
+    chunks = [iterator.get_chunk(i) for i in range(4)]
+    assert [len(chunk) for chunk in chunks] == [3000, 3000, 3000, 1000]
+    np.testing.assert_array_equal(iterator.get_chunk(1), chunks[1])
+    np.testing.assert_array_equal(iterator._get_data((slice(2500, 6500),)), np.concatenate(chunks)[2500:6500])
+
+    other_seed = SyntheticAudioDataChunkIterator(n_samples=10000, rate=8000.0, dtype="float32", chunk_size=3000, seed=3)
+    assert not np.array_equal(other_seed.get_chunk(0), chunks[0], equal_nan=True)
+
+    data = np.concatenate(chunks)
+    assert np.isnan(data).any()
+    assert np.nanmax(np.abs(data)) > 0.05
+
+    with pytest.raises(ValueError, match="float dtype"):
+        SyntheticAudioDataChunkIterator(n_samples=100, dtype="int16", nan_dropouts=True)
+    with pytest.raises(ValueError, match="positive"):
+        SyntheticAudioDataChunkIterator(n_samples=0)
+
+    # the buffer is sized from buffer_gb instead of defaulting to one chunk
+    iterator = SyntheticAudioDataChunkIterator(n_samples=10000, chunk_size=1000, buffer_gb=1e-5)
+    assert iterator.chunk_shape == (1000,)
+    assert iterator.buffer_shape[0] % 1000 == 0
+
+
+def test_mock_lazy_acoustic_waveform_series():
+    """Test that the lazy mock series wraps a data chunk iterator of the requested shape and rate."""
+    aws = mock_lazy_AcousticWaveformSeries(duration=2.0, rate=8000.0, n_channels=2)
+    assert aws.data.maxshape == (16000, 2)
+    assert aws.data.dtype == np.dtype("int16")
+    assert aws.rate == 8000.0
@@ -4,7 +4,7 @@ import numpy as np
 import pytest
 from pynwb import NWBHDF5IO
 
-from ndx_sound.testing.mock import mock_AcousticWaveformSeries
+from ndx_sound.testing.mock import mock_AcousticWaveformSeries, mock_lazy_AcousticWaveformSeries
 from pynwb.testing.mock.file import mock_NWBFile
 
 
@@ -165,3 +165,25 @@ def test_multiple_acoustic_waveform_series(tmp_path):
         assert read_aws3.description == aws3.description
         assert read_aws3.rate == aws3.rate
         np.testing.assert_array_equal(read_aws3.data, aws3.data)
+
+
+def test_write_lazy_synthetic_series(tmp_path):
+    """Test writing a lazily synthesized AcousticWaveformSeries chunk by chunk."""
+    nwbfile = mock_NWBFile()
+    acoustic_waveform_series = mock_lazy_AcousticWaveformSeries(
+        duration=5.0, rate=8000.0, n_channels=2, chunk_size=4096, seed=1
+    )
+    nwbfile.add_acquisition(acoustic_waveform_series)
+    expected = acoustic_waveform_series.data.get_chunk(3)
+
+    test_path = tmp_path / "test.nwb"
+    with NWBHDF5IO(test_path, mode="w") as io:
+        io.write(nwbfile)
+
+    with NWBHDF5IO(test_path, mode="r", load_namespaces=True) as io:
+        read_nwbfile = io.read()
+        read_acoustic_waveform_series = read_nwbfile.acquisition[acoustic_waveform_series.name]
+        assert read_acoustic_waveform_series.data.shape == (40000, 2)
+        assert read_acoustic_waveform_series.data.dtype == "int16"
+        assert read_acoustic_waveform_series.data.chunks == (4096, 2)
+        np.testing.assert_array_equal(read_acoustic_waveform_series.data[3 * 4096: 4 * 4096], expected)
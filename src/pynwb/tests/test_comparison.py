@@ -0,0 +1,94 @@
+"""Tests for the batched multi-series spectrograms."""
+
+import numpy as np
+import pytest
+
+from ndx_sound.segments import get_segment_times
+from ndx_sound.testing.mock import mock_AcousticWaveformSeries, mock_SegmentedAcousticWaveformSeries
+
+librosa = pytest.importorskip("librosa", reason="librosa not installed")
+
+from ndx_sound.comparison import compute_spectrograms, resample  # noqa: E402
+
+
+def test_compute_spectrograms_matches_single_series():
+    """Test that batched spectrograms equal the spectrogram of each series on its own."""
+    rng = np.random.default_rng(seed=0)
+    stimulus = mock_AcousticWaveformSeries(name="stimulus", data=rng.standard_normal(40000), rate=8000.0)
+    response = mock_AcousticWaveformSeries(
+        name="response", data=rng.standard_normal(40000), rate=8000.0, starting_time=1.0
+    )
+
+    spectrograms = compute_spectrograms([stimulus, response], time_window=(1.5, 3.0), n_fft=256)
+
+    assert [spectrogram.name for spectrogram in spectrograms] == ["stimulus", "response"]
+    for spectrogram, time_series, offset in zip(spectrograms, (stimulus, response), (0.0, 1.0)):
+        istart, istop = int((1.5 - offset) * 8000), int((3.0 - offset) * 8000)
+        np.testing.assert_array_equal(spectrogram.data, time_series.data[istart:istop])
+        expected = librosa.amplitude_to_db(np.abs(librosa.stft(spectrogram.data, n_fft=256)))
+        np.testing.assert_allclose(spectrogram.spectrogram_db, expected, atol=1e-6)
+        assert spectrogram.starting_time == pytest.approx(1.5)
+        assert spectrogram.frame_times[1] - spectrogram.frame_times[0] == pytest.approx(64 / 8000)
+
+
+def test_compute_spectrograms_with_different_rates():
+    """Test that series with different rates are resampled to a common rate on request."""
+    rng = np.random.default_rng(seed=0)
+    stimulus = mock_AcousticWaveformSeries(name="stimulus", data=rng.standard_normal(44100), rate=44100.0)
+    response = mock_AcousticWaveformSeries(name="response", data=rng.standard_normal((48000, 2)), rate=48000.0)
+
+    native = compute_spectrograms([stimulus, response], time_window=(0.0, 0.5), n_fft=512)
+    assert [spectrogram.rate for spectrogram in native] == [44100.0, 48000.0]
+
+    common = compute_spectrograms([stimulus, response], time_window=(0.0, 0.5), n_fft=512, rate=16000.0)
+    assert [spectrogram.rate for spectrogram in common] == [16000.0, 16000.0]
+    assert [len(spectrogram.data) for spectrogram in common] == [8000, 8000]
+    assert common[0].spectrogram_db.shape == common[1].spectrogram_db.shape == (257, 63)
+
+
+def test_resample_preserves_tone():
+    rate = 44100.0
+    tone = np.sin(2 * np.pi * 1000.0 * np.arange(44100) / rate)
+    resampled = resample(tone, rate, 16000.0)
+    assert len(resampled) == 16000
+    np.testing.assert_allclose(np.abs(np.fft.rfft(resampled)).argmax(), 1000, atol=1)
+
+
+def test_compute_spectrograms_without_centering():
+    """Test that frames are counted and timed from the length of each series when frames are not centered."""
+    rng = np.random.default_rng(seed=0)
+    short = mock_AcousticWaveformSeries(name="short", data=rng.standard_normal(4000), rate=8000.0)
+    long = mock_AcousticWaveformSeries(name="long", data=rng.standard_normal(8000), rate=8000.0)
+
+    spectrograms = compute_spectrograms(
+        [short, long], time_window=(0.0, 1.0), n_fft=256, stft_kwargs=dict(center=False)
+    )
+
+    for spectrogram in spectrograms:
+        expected = librosa.amplitude_to_db(np.abs(librosa.stft(spectrogram.data, n_fft=256, center=False)))
+        np.testing.assert_allclose(spectrogram.spectrogram_db, expected, atol=1e-6)
+        assert len(spectrogram.frame_times) == expected.shape[1]
+        assert spectrogram.frame_times[0] == pytest.approx(128 / 8000)
+
+
+def test_compute_spectrograms_segmented():
+    """Test that the segments of a segmented series are placed at their onsets, with silent gaps."""
+    segmented_series = mock_SegmentedAcousticWaveformSeries(starting_time=5.0)
+    onsets, offsets = get_segment_times(segmented_series)
+    rate = segmented_series.rate
+    time_window = (offsets[0] - 0.25, onsets[1] + 0.5)
+
+    (spectrogram,) = compute_spectrograms([segmented_series], time_window=time_window, n_fft=256)
+
+    assert spectrogram.starting_time == pytest.approx(time_window[0])
+    assert len(spectrogram.data) == pytest.approx((time_window[1] - time_window[0]) * rate, abs=1)
+    n_first, n_second = int(0.25 * rate), int(0.5 * rate)
+    istop = int(round((onsets[1] - time_window[0]) * rate))
+    data = np.asarray(segmented_series.data)
+    np.testing.assert_array_equal(spectrogram.data[:n_first], data[n_first: 2 * n_first])
+    assert np.all(spectrogram.data[n_first:istop] == 0.0)
+    np.testing.assert_array_equal(spectrogram.data[istop:], data[2 * n_first: 2 * n_first + n_second])
+
+    # windows are clipped to the first onset, like continuous series to their first sample
+    (spectrogram,) = compute_spectrograms([segmented_series], time_window=(0.0, onsets[0] + 0.1), n_fft=256)
+    assert spectrogram.starting_time == onsets[0]
@@ -0,0 +1,103 @@
+"""Tests for the batched GCC-PHAT time-delay estimation."""
+
+import tracemalloc
+
+import numpy as np
+import pytest
+from pynwb import NWBHDF5IO
+from pynwb.testing.mock.file import mock_NWBFile
+
+from ndx_sound.delays import estimate_delays, gcc_phat
+from ndx_sound.testing.mock import (
+    mock_AcousticWaveformSeries,
+    mock_lazy_AcousticWaveformSeries,
+    mock_SegmentedAcousticWaveformSeries,
+)
+
+
+def test_gcc_phat():
+    rng = np.random.default_rng(seed=0)
+    signal = rng.standard_normal((10, 1200))
+    frames = np.stack([signal[:, 100:1100], signal[:, 97:1097], signal[:, 105:1105]], axis=-1)
+    delays, peak_values = gcc_phat(frames, np.array([[0, 1], [0, 2], [2, 1]]), max_lag=20)
+    np.testing.assert_allclose(delays, np.tile([3.0, -5.0, 8.0], (10, 1)), atol=0.01)
+    assert np.all(peak_values > 0.9)
+
+
+def _upsampled_gcc_phat(frames, channel_pairs, max_lag, interp):
+    """Cross-correlation fully inverse-transformed at the upsampled length, as a reference."""
+    n_fft = 1 << int(np.ceil(np.log2(2 * frames.shape[1])))
+    spectra = np.fft.rfft(frames, n=n_fft, axis=1)
+    cross = spectra[:, :, channel_pairs[:, 1]] * np.conj(spectra[:, :, channel_pairs[:, 0]])
+    cross /= np.abs(cross)
+    correlation = np.fft.irfft(cross, n=n_fft * interp, axis=1) * interp
+    return correlation[:, np.arange(-max_lag * interp, max_lag * interp + 1)]
+
+
+@pytest.mark.parametrize("interp", [1, 3, 4])
+def test_gcc_phat_upsampling(interp):
+    """Test that the lags evaluated phase by phase equal the fully upsampled cross-correlation."""
+    rng = np.random.default_rng(seed=1)
+    frames = rng.standard_normal((4, 300, 3))
+    channel_pairs = np.array([[0, 1], [1, 2], [2, 0]])
+    delays, peak_values = gcc_phat(frames, channel_pairs, max_lag=12, interp=interp)
+
+    expected = _upsampled_gcc_phat(frames, channel_pairs, 12, interp)
+    np.testing.assert_allclose(peak_values, expected.max(axis=1))
+    np.testing.assert_array_equal(np.round(delays * interp), expected.argmax(axis=1) - 12 * interp)
+
+
+def test_gcc_phat_memory_does_not_grow_with_upsampling():
+    frames = np.random.default_rng(seed=2).standard_normal((8, 20000, 2))
+    peaks = []
+    for interp in (1, 16):
+        tracemalloc.start()
+        gcc_phat(frames, np.array([[0, 1]]), max_lag=20, interp=interp)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    assert peaks[1] < 1.5 * peaks[0]
+
+
+def test_estimate_delays(tmp_path):
+    """Test the delays of the channels of a synthetic series, which are delayed copies of the first channel."""
+    nwbfile = mock_NWBFile()
+    nwbfile.add_acquisition(
+        mock_lazy_AcousticWaveformSeries(duration=2.0, rate=8000.0, n_channels=2, dtype="float32", chunk_size=4096)
+    )
+    test_path = tmp_path / "test.nwb"
+    with NWBHDF5IO(test_path, mode="w") as io:
+        io.write(nwbfile)
+
+    windows = [(start, start + 0.1) for start in np.arange(0.0, 1.9, 0.1)]
+    with NWBHDF5IO(test_path, mode="r") as io:
+        acoustic_waveform_series = io.read().acquisition["AcousticWaveformSeries"]
+        time_delays = estimate_delays(acoustic_waveform_series, windows, max_delay=0.005, batch_size=4)
+
+    assert time_delays.delays.shape == (19, 1)
+    np.testing.assert_array_equal(time_delays.channel_pairs, [[0, 1]])
+    np.testing.assert_allclose(np.median(time_delays.delays), 8 / 8000.0, atol=0.1 / 8000.0)
+
+
+def test_estimate_delays_batches():
+    """Test that sparse and dense windows and any batch size give the same delays."""
+    rng = np.random.default_rng(seed=0)
+    signal = rng.standard_normal(100000)
+    data = np.stack([signal, np.roll(signal, 4), np.roll(signal, -2)], axis=1)
+    acoustic_waveform_series = mock_AcousticWaveformSeries(data=data, rate=1000.0)
+
+    windows = [(1.0, 1.5), (2.0, 2.2), (90.0, 90.5)]
+    time_delays = estimate_delays(acoustic_waveform_series, windows, max_delay=0.01, interp=4)
+    np.testing.assert_allclose(time_delays.delays * 1000.0, np.tile([4.0, -2.0, -6.0], (3, 1)), atol=0.05)
+
+    one_by_one = estimate_delays(acoustic_waveform_series, windows, max_delay=0.01, interp=4, batch_size=1)
+    np.testing.assert_allclose(one_by_one.delays, time_delays.delays)
+
+
+def test_estimate_delays_single_channel():
+    with pytest.raises(ValueError):
+        estimate_delays(mock_AcousticWaveformSeries(), [(0.0, 0.001)])
+
+
+def test_estimate_delays_segmented_series():
+    with pytest.raises(ValueError, match="Segmented"):
+        estimate_delays(mock_SegmentedAcousticWaveformSeries(n_channels=2), [(0.0, 0.001)])
@@ -0,0 +1,96 @@
+"""Tests for the spectral feature pipeline."""
+
+import numpy as np
+import pytest
+from pynwb import NWBHDF5IO
+from pynwb.testing.mock.file import mock_NWBFile
+
+from ndx_sound.features import add_features_to_nwbfile, compute_features
+from ndx_sound.testing.mock import mock_AcousticWaveformSeries, mock_SegmentedAcousticWaveformSeries
+
+
+@pytest.fixture
+def tone():
+    rate = 8000.0
+    data = np.sin(2 * np.pi * 1000.0 * np.arange(20000) / rate)
+    return mock_AcousticWaveformSeries(data=data, rate=rate, starting_time=1.0)
+
+
+def test_stft_matches_librosa(tone):
+    """Test that the chunked STFT matches librosa.stft without centering."""
+    librosa = pytest.importorskip("librosa", reason="librosa not installed")
+
+    sound_features = compute_features(tone, features=["stft"], n_fft=256, to_db=False, chunk_size=1000, max_workers=2)
+
+    expected = np.abs(librosa.stft(tone.data, n_fft=256, center=False)).T
+    np.testing.assert_allclose(sound_features.features["stft"], expected, rtol=1e-4, atol=1e-3)
+    assert sound_features.rate == 8000.0 / 64
+    assert sound_features.starting_time == 1.0
+
+
+def test_multiple_features_from_one_pass(tone):
+    """Test that all requested features share the same frames."""
+    pytest.importorskip("librosa", reason="librosa not installed")
+
+    sound_features = compute_features(
+        tone,
+        features=["stft", "mel", "cqt", "band_power"],
+        n_fft=512,
+        bands=[(0, 500), (900, 1100)],
+        time_window=(1.5, 3.0),
+    )
+
+    n_frames = 1 + (12000 - 512) // 128
+    assert sound_features.features["stft"].shape == (n_frames, 257)
+    assert sound_features.features["mel"].shape == (n_frames, 128)
+    assert sound_features.features["band_power"].shape == (n_frames, 2)
+    assert sound_features.starting_time == 1.5
+
+    band_power = sound_features.features["band_power"]
+    assert np.all(band_power[:, 1] > 1000 * band_power[:, 0])
+
+    cqt = sound_features.features["cqt"]
+    peak_frequency = sound_features.frequencies["cqt"][cqt.mean(axis=0).argmax()]
+    assert abs(np.log2(peak_frequency / 1000.0)) < 1 / 12
+
+
+def test_unknown_feature(tone):
+    with pytest.raises(ValueError, match="Unknown features"):
+        compute_features(tone, features=["mfcc"])
+
+
+def test_band_power_bands(tone):
+    """Test that a single band may be given as a tuple and that malformed bands are rejected."""
+    single = compute_features(tone, features=["band_power"], bands=(900, 1100))
+    assert single.features["band_power"].shape[1] == 1
+    np.testing.assert_array_equal(single.frequencies["band_power"], [[900, 1100]])
+
+    for bands in (None, [], [(1100, 900)], [(0, 500, 1000)], (500,)):
+        with pytest.raises(ValueError, match="bands"):
+            compute_features(tone, features=["band_power"], bands=bands)
+
+
+def test_add_features_to_nwbfile(tone, tmp_path):
+    """Test writing features to a processing module and reading them back."""
+    nwbfile = mock_NWBFile()
+    nwbfile.add_acquisition(tone)
+    sound_features = compute_features(tone, features=["stft", "band_power"], bands=[(900, 1100)])
+    add_features_to_nwbfile(nwbfile, sound_features, source_name=tone.name)
+
+    test_path = tmp_path / "test.nwb"
+    with NWBHDF5IO(test_path, mode="w") as io:
+        io.write(nwbfile)
+
+    with NWBHDF5IO(test_path, mode="r", load_namespaces=True) as io:
+        read_nwbfile = io.read()
+        stft = read_nwbfile.processing["sound_features"][f"{tone.name}_stft"]
+        assert stft.unit == "dB"
+        assert stft.rate == sound_features.rate
+        np.testing.assert_array_equal(stft.data[:], sound_features.features["stft"])
+        band_power = read_nwbfile.processing["sound_features"][f"{tone.name}_band_power"]
+        assert band_power.unit == "n.a."
+
+
+def test_segmented_series():
+    with pytest.raises(ValueError, match="Segmented"):
+        compute_features(mock_SegmentedAcousticWaveformSeries())
@@ -0,0 +1,154 @@
+"""Tests for audio fingerprints and the stimulus deduplication index."""
+
+import gc
+
+import h5py
+import numpy as np
+import pytest
+from pynwb import NWBHDF5IO
+from pynwb.testing.mock.file import mock_NWBFile
+
+from ndx_sound.fingerprint import FingerprintIndex, compute_fingerprint, link_to_canonical
+from ndx_sound.testing.mock import SyntheticAudioDataChunkIterator, mock_AcousticWaveformSeries
+
+
+def _synthetic_audio(seed: int, duration: float = 5.0, rate: float = 16000.0) -> np.ndarray:
+    iterator = SyntheticAudioDataChunkIterator(
+        n_samples=int(duration * rate), rate=rate, chunk_size=2**14, seed=seed, silence_probability=0.0
+    )
+    return np.concatenate([chunk.data for chunk in iterator])
+
+
+def test_compute_fingerprint():
+    """Test that the fingerprint does not depend on the chunks the data is read in."""
+    acoustic_waveform_series = mock_AcousticWaveformSeries(data=_synthetic_audio(seed=0), rate=16000.0)
+    fingerprint = compute_fingerprint(acoustic_waveform_series)
+    assert len(fingerprint.hashes) == len(fingerprint.times) > 0
+    assert fingerprint.n_frames == 1 + (80000 - 2048) // 1024
+
+    chunked = compute_fingerprint(acoustic_waveform_series, chunk_size=5000)
+    np.testing.assert_array_equal(chunked.hashes, fingerprint.hashes)
+    np.testing.assert_array_equal(chunked.times, fingerprint.times)
+
+
+def test_fingerprint_index(tmp_path):
+    data = _synthetic_audio(seed=0)
+    index_path = tmp_path / "index.sqlite"
+    with FingerprintIndex(index_path) as index:
+        for seed in range(3):
+            index.add(
+                mock_AcousticWaveformSeries(data=_synthetic_audio(seed=seed), rate=16000.0),
+                file_path=f"session_{seed}.nwb",
+                data_path="/stimulus/presentation/stimulus/data",
+            )
+        # adding the same data again replaces its entry
+        index.add(
+            mock_AcousticWaveformSeries(data=data, rate=16000.0),
+            file_path="session_0.nwb",
+            data_path="/stimulus/presentation/stimulus/data",
+        )
+        assert len(index) == 3
+
+    with FingerprintIndex(index_path) as index:
+        matches = index.query(mock_AcousticWaveformSeries(data=data, rate=16000.0))
+        assert len(matches) == 1
+        assert matches[0].file_path.endswith("session_0.nwb")
+        assert matches[0].score == matches[0].containment == 1.0
+        assert matches[0].offset == 0.0
+
+        # a quieter, noisy copy still matches
+        rng = np.random.default_rng(seed=1)
+        noisy = (0.5 * data + rng.normal(scale=20.0, size=data.shape)).astype("int16")
+        matches = index.query(mock_AcousticWaveformSeries(data=noisy, rate=16000.0))
+        assert [match.file_path for match in matches] == [matches[0].file_path]
+        assert matches[0].file_path.endswith("session_0.nwb")
+
+        # an excerpt starting on a frame is contained in the series at its offset
+        excerpt = mock_AcousticWaveformSeries(data=data[16 * 1024: 48 * 1024], rate=16000.0)
+        matches = index.query(excerpt)
+        assert matches[0].file_path.endswith("session_0.nwb")
+        assert matches[0].offset == 16 * 1024 / 16000.0
+        assert matches[0].containment > 0.9
+        assert matches[0].score < 0.5
+        # but it is not a copy of it
+        assert index.query(excerpt, min_score=0.5, mode="identity") == []
+        with pytest.raises(ValueError, match="mode"):
+            index.query(excerpt, mode="subset")
+
+        # series with another rate are not compared
+        assert index.query(mock_AcousticWaveformSeries(data=data, rate=8000.0)) == []
+
+
+def test_link_to_canonical(tmp_path):
+    """Test that a duplicated stimulus is written as an external link to the canonical copy."""
+    data = _synthetic_audio(seed=0)
+    canonical_path = str(tmp_path / "canonical.nwb")
+    nwbfile = mock_NWBFile()
+    nwbfile.add_stimulus(mock_AcousticWaveformSeries(name="stimulus", data=data, rate=16000.0))
+    with NWBHDF5IO(canonical_path, mode="w") as io:
+        io.write(nwbfile)
+
+    index = FingerprintIndex(tmp_path / "index.sqlite")
+    assert len(index.add_nwbfile(canonical_path)) == 1
+
+    duplicate = mock_AcousticWaveformSeries(name="stimulus", data=data.copy(), rate=16000.0, description="repeated")
+    linked = link_to_canonical(duplicate, index)
+    assert linked is not duplicate
+    assert linked.description == "repeated"
+
+    different = mock_AcousticWaveformSeries(name="stimulus", data=_synthetic_audio(seed=1), rate=16000.0)
+    assert link_to_canonical(different, index) is different
+
+    session_path = str(tmp_path / "session.nwb")
+    nwbfile = mock_NWBFile()
+    nwbfile.add_stimulus(linked)
+    with NWBHDF5IO(session_path, mode="w") as io:
+        io.write(nwbfile)
+    index.close()
+
+    with h5py.File(session_path, "r") as file:
+        link = file.get("/stimulus/presentation/stimulus/data", getlink=True)
+        assert isinstance(link, h5py.ExternalLink)
+    with NWBHDF5IO(session_path, mode="r") as io:
+        read_series = io.read().stimulus["stimulus"]
+        assert read_series.description == "repeated"
+        np.testing.assert_array_equal(read_series.data[:], data)
+
+
+def _open_files():
+    return {file_id.name.decode() for file_id in h5py.h5f.get_obj_ids(types=h5py.h5f.OBJ_FILE)}
+
+
+def test_link_to_canonical_checks_all_matches(tmp_path, monkeypatch):
+    """Test that a near-duplicate ranked first is skipped and that only the linked file stays open."""
+    data = _synthetic_audio(seed=0)
+    near_duplicate = data.copy()
+    near_duplicate[1000] += 1.0
+    index = FingerprintIndex(tmp_path / "index.sqlite")
+    paths = dict()
+    for name, values in (("near_duplicate", near_duplicate), ("canonical", data)):
+        paths[name] = str(tmp_path / f"{name}.nwb")
+        nwbfile = mock_NWBFile()
+        nwbfile.add_stimulus(mock_AcousticWaveformSeries(name="stimulus", data=values, rate=16000.0))
+        with NWBHDF5IO(paths[name], mode="w") as io:
+            io.write(nwbfile)
+        index.add_nwbfile(paths[name])
+
+    query = index.query
+    monkeypatch.setattr(
+        index, "query", lambda *args, **kwargs: sorted(
+            query(*args, **kwargs), key=lambda match: match.file_path != paths["near_duplicate"]
+        )
+    )
+    assert index.query(mock_AcousticWaveformSeries(data=data, rate=16000.0))[0].file_path == paths["near_duplicate"]
+
+    linked = link_to_canonical(mock_AcousticWaveformSeries(name="stimulus", data=data.copy(), rate=16000.0), index)
+    index.close()
+    assert linked.data.data.file.filename == paths["canonical"]
+    assert paths["near_duplicate"] not in _open_files()
+    assert paths["canonical"] in _open_files()
+
+    # the linked series owns the canonical file
+    del linked
+    gc.collect()
+    assert paths["canonical"] not in _open_files()
@@ -0,0 +1,107 @@
+"""Tests for the dask-backed lazy view of AcousticWaveformSeries data."""
+
+import pickle
+
+import numpy as np
+import pytest
+from pynwb import NWBHDF5IO
+from pynwb.testing.mock.file import mock_NWBFile
+from scipy.signal import resample_poly
+
+from ndx_sound.io import wrap_data
+from ndx_sound.testing.mock import mock_AcousticWaveformSeries, mock_SegmentedAcousticWaveformSeries
+from ndx_sound.utils import to_mono
+
+da = pytest.importorskip("dask.array", reason="dask not installed")
+librosa = pytest.importorskip("librosa")
+
+from ndx_sound.lazy import _HDF5DatasetReader, as_dask_array, resample, select_time_window, spectrogram_db  # noqa: E402
+
+
+@pytest.fixture
+def nwbfile_path(tmp_path):
+    rng = np.random.default_rng(seed=0)
+    data = rng.integers(-1000, 1000, size=(50000, 2), dtype="int16")
+    nwbfile = mock_NWBFile()
+    nwbfile.add_stimulus(
+        mock_AcousticWaveformSeries(name="stimulus", data=wrap_data(data, chunks=(4096, 2)), rate=8000.0)
+    )
+    path = tmp_path / "test.nwb"
+    with NWBHDF5IO(str(path), mode="w") as io:
+        io.write(nwbfile)
+    return path, data
+
+
+def test_as_dask_array_chunks(nwbfile_path):
+    path, data = nwbfile_path
+    with NWBHDF5IO(str(path), mode="r") as io:
+        acoustic_waveform_series = io.read().stimulus["stimulus"]
+        array = as_dask_array(acoustic_waveform_series, chunks=(3 * 4096, 2))
+        assert all(length % 4096 == 0 for length in array.chunks[0][:-1])
+        np.testing.assert_array_equal(array.compute(), data)
+
+        window = select_time_window(array, acoustic_waveform_series, time_window=(1.0, 2.0))
+        np.testing.assert_array_equal(window.compute(), data[8000:16000])
+
+
+def test_as_dask_array_processes(nwbfile_path):
+    """Test that an HDF5-backed array can be computed with the multi-process scheduler."""
+    path, data = nwbfile_path
+    with NWBHDF5IO(str(path), mode="r") as io:
+        array = as_dask_array(io.read().stimulus["stimulus"], chunks=(16384, 2))
+        assert array.sum().compute(scheduler="processes") == data.sum()
+
+
+@pytest.mark.parametrize("n_samples, chunk_length", [(100000, 7000), (12345, 3000), (5000, 100000)])
+def test_spectrogram_db(n_samples, chunk_length):
+    """Test that the chunked spectrogram equals the spectrogram of the whole array."""
+    data = np.random.default_rng(seed=0).standard_normal((n_samples, 2))
+    spectrogram = spectrogram_db(da.from_array(data, chunks=(chunk_length, 2)), n_fft=512).compute()
+
+    expected = librosa.amplitude_to_db(np.abs(librosa.stft(data.mean(axis=1), n_fft=512, pad_mode="constant")))
+    assert spectrogram.shape == expected.T.shape
+    np.testing.assert_allclose(spectrogram, expected.T, atol=1e-6)
+
+
+@pytest.mark.parametrize("rate, target_rate", [(44100.0, 16000.0), (8000.0, 12000.0)])
+def test_resample(rate, target_rate):
+    """Test that chunked resampling equals resample_poly on the whole array."""
+    data = np.random.default_rng(seed=0).standard_normal((30000, 2))
+    resampled = resample(da.from_array(data, chunks=(4000, 2)), rate, target_rate).compute()
+
+    up, down = (160, 441) if rate == 44100.0 else (3, 2)
+    np.testing.assert_allclose(resampled, resample_poly(data, up, down, axis=0), atol=1e-10)
+
+
+def test_spectrogram_db_with_nans():
+    """Test that NaNs in one channel are ignored when mixing down to mono, as in the eager path."""
+    data = np.random.default_rng(seed=0).standard_normal((20000, 2))
+    data[5000:6000, 0] = np.nan
+    data[8000:8100] = np.nan
+    spectrogram = spectrogram_db(da.from_array(data, chunks=(3000, 1)), n_fft=512).compute()
+
+    mono = np.nan_to_num(to_mono(data), nan=0.0)
+    expected = librosa.amplitude_to_db(np.abs(librosa.stft(mono, n_fft=512, pad_mode="constant")))
+    np.testing.assert_allclose(spectrogram, expected.T, atol=1e-6)
+
+
+def test_hdf5_dataset_reader_closes_reopened_file(nwbfile_path):
+    """Test that an unpickled reader closes the file it opened, and never the file of the caller."""
+    path, data = nwbfile_path
+    with NWBHDF5IO(str(path), mode="r") as io:
+        dataset = io.read().stimulus["stimulus"].data
+        reader = _HDF5DatasetReader(dataset)
+        copy = pickle.loads(pickle.dumps(reader))
+        np.testing.assert_array_equal(copy[:10], data[:10])
+        opened = copy._file
+        assert opened.id.valid
+
+        copy.close()
+        assert not opened.id.valid
+        reader.close()
+        assert dataset.id.valid
+
+
+def test_as_dask_array_segmented_series():
+    with pytest.raises(ValueError, match="Segmented"):
+        as_dask_array(mock_SegmentedAcousticWaveformSeries())
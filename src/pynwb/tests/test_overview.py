@@ -0,0 +1,103 @@
+"""Tests for the full-length overview of AcousticWaveformSeries."""
+
+import numpy as np
+
+from ndx_sound.overview import compute_overview
+from ndx_sound.segments import get_segment_times
+from ndx_sound.testing.mock import mock_AcousticWaveformSeries, mock_SegmentedAcousticWaveformSeries
+
+
+class CountingArray:
+    """Wrap an array and count the number of samples read from it."""
+
+    def __init__(self, data):
+        self.data = data
+        self.samples_read = 0
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, item):
+        out = self.data[item]
+        self.samples_read += len(out)
+        return out
+
+
+def test_compute_overview_envelope():
+    """Test that the envelope matches the min and max of each bin."""
+    rng = np.random.default_rng(seed=0)
+    data = rng.standard_normal(10000)
+    aws = mock_AcousticWaveformSeries(data=data, rate=1000.0, starting_time=2.0)
+
+    overview = compute_overview(aws, n_bins=100, n_fft=32, chunk_size=1000)
+
+    bins = data.reshape(100, 100)
+    np.testing.assert_array_equal(overview.envelope_min, bins.min(axis=1))
+    np.testing.assert_array_equal(overview.envelope_max, bins.max(axis=1))
+    np.testing.assert_allclose(overview.bin_times, 2.0 + np.arange(100) * 0.1)
+    assert overview.bin_duration == 0.1
+    assert overview.spectrogram_db.shape == (17, 100)
+    np.testing.assert_allclose(overview.frequencies[-1], 500.0)
+
+
+def test_compute_overview_reads_data_once():
+    """Test that the data is read in a single pass and the result is cached."""
+    data = CountingArray(np.sin(np.arange(12345) / 10.0))
+    aws = mock_AcousticWaveformSeries(data=np.zeros(1), rate=1000.0)
+    aws.fields["data"] = data
+
+    overview = compute_overview(aws, n_bins=50, chunk_size=1000)
+    assert data.samples_read == 12345
+    assert len(overview.bin_times) == 50
+
+    assert compute_overview(aws, n_bins=50, chunk_size=1000) is overview
+    assert data.samples_read == 12345
+
+
+def test_compute_overview_multichannel_with_nans():
+    """Test that multi-channel data is mixed down and NaNs are ignored."""
+    data = np.ones((1000, 2), dtype="float32")
+    data[:, 1] = 3.0
+    data[:100] = np.nan
+    aws = mock_AcousticWaveformSeries(data=data)
+
+    overview = compute_overview(aws, n_bins=10, n_fft=64)
+
+    assert np.all(np.isnan(overview.envelope_min[:1]))
+    np.testing.assert_array_equal(overview.envelope_max[1:], 2.0)
+    assert np.all(np.isfinite(overview.spectrogram_db))
+
+
+def test_compute_overview_does_not_modify_data():
+    """Test that the conversion is not applied in place to in-memory float data."""
+    data = np.ones(1000)
+    aws = mock_AcousticWaveformSeries(data=data, conversion=2.0)
+
+    for _ in range(2):
+        overview = compute_overview(aws, n_bins=10, use_cache=False)
+        np.testing.assert_array_equal(overview.envelope_max, 2.0)
+    np.testing.assert_array_equal(data, 1.0)
+    assert aws.data is data
+
+
+def test_compute_overview_segmented():
+    """Test that the bins of a segmented series are on the time axis of the segments, with blank gaps."""
+    segmented_series = mock_SegmentedAcousticWaveformSeries(starting_time=5.0, n_channels=2)
+    onsets, offsets = get_segment_times(segmented_series)
+
+    overview = compute_overview(segmented_series, n_bins=1000, n_fft=64)
+
+    assert overview.bin_times[0] == onsets[0]
+    assert overview.bin_times[-1] < offsets[-1] <= overview.bin_times[-1] + overview.bin_duration
+    centers = overview.bin_times + overview.bin_duration / 2
+    in_segment = np.any((centers[:, None] >= onsets) & (centers[:, None] < offsets), axis=1)
+    starts, stops = overview.bin_times[:, None], overview.bin_times[:, None] + overview.bin_duration
+    in_gap = ~np.any((stops > onsets) & (starts < offsets), axis=1)
+    assert in_segment.any() and in_gap.any()
+    for values in (overview.envelope_min, overview.envelope_max, overview.spectrogram_db):
+        assert np.all(np.isfinite(values[..., in_segment]))
+        assert np.all(np.isnan(values[..., in_gap]))
+
+    # the envelope of each segment is that of its samples
+    first_segment = np.asarray(segmented_series.data[: int(0.5 * segmented_series.rate)]).mean(axis=1)
+    assert np.nanmax(overview.envelope_max[overview.bin_times < offsets[0]]) == first_segment.max()
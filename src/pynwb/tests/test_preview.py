@@ -0,0 +1,71 @@
+"""Tests for the low-bitrate preview of AcousticWaveformSeries."""
+
+import numpy as np
+import pytest
+from pynwb import NWBHDF5IO
+from pynwb.testing.mock.file import mock_NWBFile
+from scipy.signal import resample_poly
+
+from ndx_sound import AcousticWaveformPreview
+from ndx_sound.preview import PreviewDataChunkIterator, add_preview, create_preview, get_playback_series
+from ndx_sound.testing.mock import mock_AcousticWaveformSeries, mock_SegmentedAcousticWaveformSeries
+from ndx_sound.utils import mu_law_decode, mu_law_encode, read_samples
+
+
+def test_mu_law():
+    values = np.linspace(-1.0, 1.0, 1001)
+    codes = mu_law_encode(values)
+    assert codes.dtype == "uint8"
+    assert mu_law_encode(np.array([0.0]))[0] == 127
+    np.testing.assert_allclose(mu_law_decode(codes), values, atol=0.025)
+    # companding keeps the relative error of quiet samples small
+    np.testing.assert_allclose(mu_law_decode(mu_law_encode(np.array([1e-2]))), 1e-2, rtol=0.05)
+
+
+def test_preview_matches_resampled_data():
+    """Test that computing the preview buffer by buffer equals encoding the resampled series."""
+    acoustic_waveform_series = mock_AcousticWaveformSeries(data_shape=(44100, 2), rate=44100.0)
+    iterator = PreviewDataChunkIterator(acoustic_waveform_series, rate=8000.0, chunk_shape=(500,), buffer_shape=(1500,))
+    codes = np.concatenate([chunk.data for chunk in iterator])
+
+    expected = resample_poly(acoustic_waveform_series.data.mean(axis=1), 80, 441)
+    np.testing.assert_array_equal(codes, mu_law_encode(expected / 32768.0))
+
+
+def test_create_preview():
+    data = np.sin(np.linspace(0, 100, 42000)).astype("float32") * 0.5
+    acoustic_waveform_series = mock_AcousticWaveformSeries(data=data, rate=42000.0, starting_time=3.0)
+    preview = create_preview(acoustic_waveform_series, rate=7000.0)
+    assert isinstance(preview, AcousticWaveformPreview)
+    assert preview.rate == 7000.0
+    assert preview.starting_time == 3.0
+    np.testing.assert_allclose(preview.conversion, 0.5, rtol=1e-3)
+
+    with pytest.raises(ValueError):
+        create_preview(mock_SegmentedAcousticWaveformSeries())
+
+
+def test_preview_roundtrip(tmp_path):
+    """Test that the preview is written with the series and is decoded when it is read."""
+    acoustic_waveform_series = mock_AcousticWaveformSeries(data_shape=(88200, 2), rate=44100.0)
+    add_preview(acoustic_waveform_series)
+    assert get_playback_series(acoustic_waveform_series) is acoustic_waveform_series.preview
+    assert get_playback_series(acoustic_waveform_series, full_fidelity=True) is acoustic_waveform_series
+
+    nwbfile = mock_NWBFile()
+    nwbfile.add_acquisition(acoustic_waveform_series)
+    test_path = tmp_path / "test.nwb"
+    with NWBHDF5IO(test_path, mode="w") as io:
+        io.write(nwbfile)
+
+    with NWBHDF5IO(test_path, mode="r") as io:
+        read_series = io.read().acquisition[acoustic_waveform_series.name]
+        preview = read_series.preview
+        assert isinstance(preview, AcousticWaveformPreview)
+        assert preview.data.shape == (16000,)
+        assert preview.data.dtype == "uint8"
+        assert preview.data.nbytes < 0.05 * read_series.data.nbytes
+
+        decoded = read_samples(preview)
+        expected = resample_poly(read_series.data[:].mean(axis=1), 80, 441)
+        np.testing.assert_allclose(decoded, expected, atol=0.03 * 32768)
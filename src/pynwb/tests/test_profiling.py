@@ -0,0 +1,79 @@
+"""Tests for the profiling hooks."""
+
+import json
+import logging
+
+import numpy as np
+import pytest
+
+from ndx_sound.overview import compute_overview
+from ndx_sound.profiling import PROFILE_ENV_VAR, profile, stage
+from ndx_sound.testing.mock import mock_AcousticWaveformSeries
+
+
+def test_profile_records_nested_stages():
+    """Test that nested stages, bytes read and peak array sizes are recorded."""
+    aws = mock_AcousticWaveformSeries(data_shape=(10000,))
+
+    with profile() as profiler:
+        compute_overview(aws, n_bins=10, chunk_size=1000, use_cache=False)
+
+    summary = {entry["stage"]: entry for entry in profiler.summary()}
+    assert summary["compute_overview/read"]["calls"] == 10
+    assert summary["compute_overview/read"]["bytes_read"] == aws.data.nbytes
+    assert summary["compute_overview/read"]["peak_array_bytes"] == aws.data.nbytes // 10
+    assert summary["compute_overview"]["bytes_read"] == aws.data.nbytes
+    assert summary["compute_overview"]["total"] >= summary["compute_overview/read"]["total"]
+
+    report = profiler.report()
+    assert "compute_overview/read" in report
+    assert "19.5 KB" in report
+
+
+def test_profile_separates_reads_from_conversion():
+    """Test that the conversion of the samples to float is recorded apart from the read."""
+    aws = mock_AcousticWaveformSeries(data_shape=(10000,))
+
+    with profile() as profiler:
+        compute_overview(aws, n_bins=10, chunk_size=1000, use_cache=False)
+
+    summary = {entry["stage"]: entry for entry in profiler.summary()}
+    assert summary["compute_overview/astype"]["calls"] == 10
+    assert summary["compute_overview/astype"]["bytes_read"] == 0
+    assert summary["compute_overview/astype"]["peak_array_bytes"] == 1000 * np.dtype(float).itemsize
+
+
+def test_profile_plot_waveform():
+    """Test that plot_waveform records the read and the conversion to float as separate stages."""
+    pytest.importorskip("nwbwidgets", reason="nwbwidgets not installed")
+    pytest.importorskip("librosa", reason="librosa not installed")
+    from ndx_sound.widgets import plot_waveform
+
+    aws = mock_AcousticWaveformSeries(data_shape=(10000,), rate=1000.0)
+    with profile() as profiler:
+        plot_waveform(aws, time_window=(1.0, 5.0))
+
+    summary = {entry["stage"]: entry for entry in profiler.summary()}
+    assert summary["plot_waveform/read"]["bytes_read"] == 4000 * aws.data.itemsize
+    assert summary["plot_waveform/astype"]["peak_array_bytes"] == 4000 * np.dtype(float).itemsize
+
+
+def test_stage_disabled_records_nothing(monkeypatch):
+    monkeypatch.delenv(PROFILE_ENV_VAR, raising=False)
+    with profile() as profiler:
+        pass
+    with stage("outside") as current:
+        current.record_read(np.zeros(10))
+    assert profiler.records == []
+
+
+def test_env_var_logs_structured_records(monkeypatch, caplog):
+    monkeypatch.setenv(PROFILE_ENV_VAR, "1")
+    with caplog.at_level(logging.INFO, logger="ndx_sound.profiling"):
+        with stage("outer"):
+            with stage("inner") as current:
+                current.record_read(np.zeros(100))
+
+    records = [json.loads(record.message) for record in caplog.records]
+    assert [record["name"] for record in records] == ["outer/inner", "outer"]
+    assert records[1]["bytes_read"] == 800
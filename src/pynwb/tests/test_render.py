@@ -0,0 +1,69 @@
+"""Tests for the rasterized rendering of waveforms and spectrograms."""
+
+import warnings
+
+import numpy as np
+
+from ndx_sound.render import rasterize_spectrogram, rasterize_waveform, waveform_value_range
+
+
+def test_rasterize_waveform_shape_and_extent():
+    """Test that the image has the requested size and spans the range of the data."""
+    rng = np.random.default_rng(seed=0)
+    data = rng.standard_normal(100000)
+
+    image = rasterize_waveform(data, width=300, height=50)
+
+    assert image.shape == (50, 300)
+    assert image.dtype == bool
+    assert image[0].any() and image[-1].any()
+    # a continuous trace touches every column
+    assert image.any(axis=0).all()
+
+
+def test_rasterize_waveform_constant_and_nans():
+    """Test that a flat signal is a single line and NaN gaps stay blank."""
+    data = np.zeros(1000)
+    data[:500] = np.nan
+
+    image = rasterize_waveform(data, width=100, height=11, value_range=(-1, 1))
+
+    assert not image[:, :49].any()
+    np.testing.assert_array_equal(np.flatnonzero(image[:, -1]), [5])
+
+
+def test_waveform_value_range():
+    """Test that constant and all-NaN waveforms get a drawable range."""
+    assert waveform_value_range(np.array([-2.0, np.nan, 3.0])) == (-2.0, 3.0)
+    assert waveform_value_range(np.full(100, 0.5)) == (-0.5, 1.5)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert waveform_value_range(np.full((100, 2), np.nan)) == (-1.0, 1.0)
+        assert waveform_value_range(np.empty(0)) == (-1.0, 1.0)
+
+
+def test_rasterize_waveform_fewer_samples_than_pixels():
+    image = rasterize_waveform(np.array([0.0, 1.0]), width=10, height=5)
+    assert image.shape == (5, 10)
+    assert image[-1, 0] and image[0, -1]
+
+
+def test_rasterize_spectrogram():
+    """Test pooling of frames and the log frequency axis."""
+    frequencies = np.linspace(0, 4000, 257)
+    spectrogram = np.full((257, 1000), -80.0)
+    peak = np.argmin(np.abs(frequencies - 1000))
+    spectrogram[peak, 500] = 0.0
+
+    image, frequency_range = rasterize_spectrogram(spectrogram, frequencies, width=100, height=64)
+
+    assert image.shape == (64, 100)
+    np.testing.assert_allclose(frequency_range, (np.log2(15.625), np.log2(4000)))
+    row, column = np.unravel_index(image.argmax(), image.shape)
+    assert column == 50
+    row_frequency = 2 ** np.linspace(*frequency_range, 64)[::-1][row]
+    assert abs(np.log2(row_frequency / 1000)) < 0.1
+
+    image, frequency_range = rasterize_spectrogram(spectrogram, frequencies, width=2000, height=16, log_frequency=False)
+    assert image.shape == (16, 2000)
+    assert frequency_range == (0.0, 4000.0)
@@ -0,0 +1,164 @@
+"""Tests for SegmentedAcousticWaveformSeries and reading its segments."""
+
+import numpy as np
+from pynwb import NWBHDF5IO
+import pytest
+from pynwb.testing.mock.file import mock_NWBFile
+
+from ndx_sound import SegmentedAcousticWaveformSeries
+from ndx_sound.profiling import profile
+from ndx_sound.segments import (
+    fill_gaps,
+    find_segments,
+    get_segment_times,
+    read_segments,
+    stack_segments,
+    validate_segments,
+)
+from ndx_sound.testing.mock import mock_SegmentedAcousticWaveformSeries
+
+
+def test_stack_segments():
+    data, segment_start_indices = stack_segments([np.ones(3), np.zeros(5), np.ones(2)])
+    assert len(data) == 10
+    np.testing.assert_array_equal(segment_start_indices, [0, 3, 8])
+    assert segment_start_indices.dtype == "uint64"
+
+
+@pytest.mark.parametrize(
+    "segments, match",
+    [
+        ([], "At least one segment"),
+        ([np.ones(3), np.ones(0)], "empty"),
+        ([np.ones(3), np.ones((2, 2))], "channels"),
+    ],
+)
+def test_stack_segments_rejects_invalid_segments(segments, match):
+    with pytest.raises(ValueError, match=match):
+        stack_segments(segments)
+
+
+def test_get_segment_times():
+    segmented_series = mock_SegmentedAcousticWaveformSeries(starting_time=5.0)
+    onsets, offsets = get_segment_times(segmented_series)
+    np.testing.assert_allclose(onsets, [5.0, 15.5, 76.5])
+    np.testing.assert_allclose(offsets, [5.5, 16.5, 76.75])
+
+
+def test_find_segments():
+    segmented_series = mock_SegmentedAcousticWaveformSeries()
+    np.testing.assert_array_equal(find_segments(segmented_series, (0.0, 100.0)), [0, 1, 2])
+    np.testing.assert_array_equal(find_segments(segmented_series, (0.25, 11.0)), [0, 1])
+    np.testing.assert_array_equal(find_segments(segmented_series, (11.0, 80.0)), [1, 2])
+    assert len(find_segments(segmented_series, (20.0, 70.0))) == 0
+    # a window ending at an onset or starting at an offset does not overlap the segment
+    assert len(find_segments(segmented_series, (0.5, 10.5))) == 0
+
+
+def test_read_segments():
+    """Test that only the overlapping part of the overlapping segments is read."""
+    segmented_series = mock_SegmentedAcousticWaveformSeries(n_channels=2, conversion=0.5)
+    data = segmented_series.data
+
+    with profile() as profiler:
+        segments = read_segments(segmented_series, time_window=(0.25, 11.0))
+    assert [segment.index for segment in segments] == [0, 1]
+    assert segments[0].starting_time == 0.25
+    np.testing.assert_array_equal(segments[0].data, data[2000:4000] * 0.5)
+    assert segments[1].starting_time == 10.5
+    np.testing.assert_array_equal(segments[1].data, data[4000:8000] * 0.5)
+    summary = {entry["stage"]: entry for entry in profiler.summary()}
+    assert summary["read"]["bytes_read"] == 6000 * 2 * 2
+
+    all_segments = read_segments(segmented_series)
+    assert [len(segment.data) for segment in all_segments] == [4000, 8000, 2000]
+    assert read_segments(segmented_series, time_window=(20.0, 70.0)) == []
+
+
+def test_read_segments_reads_segment_index_once():
+    """Test that the segment times and start indices are read once per query."""
+
+    class CountingArray(np.ndarray):
+        reads = 0
+
+        def __getitem__(self, item):
+            CountingArray.reads += 1
+            return np.asarray(self).__getitem__(item)
+
+    segmented_series = mock_SegmentedAcousticWaveformSeries()
+    for name in ("segment_onset_times", "segment_start_indices"):
+        segmented_series.fields[name] = np.asarray(segmented_series.fields[name]).view(CountingArray)
+
+    read_segments(segmented_series, time_window=(0.25, 11.0))
+    assert CountingArray.reads == 2
+
+
+def test_fill_gaps():
+    segmented_series = mock_SegmentedAcousticWaveformSeries(gap_durations=(1.0, 2.0))
+    segments = read_segments(segmented_series, time_window=(0.25, 2.0))
+    filled = fill_gaps(segments, rate=8000.0, time_window=(0.25, 2.0), fill_value=0.0)
+    assert filled.shape == (14000,)
+    np.testing.assert_array_equal(filled[:2000], segmented_series.data[2000:4000])
+    assert not filled[2000:10000].any()
+    np.testing.assert_array_equal(filled[10000:], segmented_series.data[4000:8000])
+
+
+def test_segmented_roundtrip(tmp_path):
+    """Test writing and reading a SegmentedAcousticWaveformSeries."""
+    nwbfile = mock_NWBFile()
+    segmented_series = mock_SegmentedAcousticWaveformSeries(n_channels=2)
+    nwbfile.add_acquisition(segmented_series)
+
+    test_path = tmp_path / "test.nwb"
+    with NWBHDF5IO(test_path, mode="w") as io:
+        io.write(nwbfile)
+
+    with NWBHDF5IO(test_path, mode="r", load_namespaces=True) as io:
+        read_series = io.read().acquisition[segmented_series.name]
+        assert isinstance(read_series, SegmentedAcousticWaveformSeries)
+        assert read_series.unit == "n.a."
+        np.testing.assert_array_equal(read_series.segment_onset_times, segmented_series.segment_onset_times)
+        np.testing.assert_array_equal(read_series.segment_start_indices, segmented_series.segment_start_indices)
+        segments = read_segments(read_series, time_window=(11.0, 80.0))
+        np.testing.assert_array_equal(segments[1].data, segmented_series.data[12000:])
+
+
+@pytest.mark.parametrize(
+    "onsets, start_indices, match",
+    [
+        ([0.0, 1.0], [0], "same length"),
+        ([0.0, 1.0, 2.0], [1, 3, 8], "start at 0"),
+        ([0.0, 1.0, 2.0], [0, 8, 3], "strictly increasing"),
+        ([0.0, 1.0, 2.0], [0, 3, 3], "strictly increasing"),
+        ([0.0, 1.0, 2.0], [0, 3, 10], "below the length"),
+        ([0.0, 2.0, 1.0], [0, 3, 8], "segment_onset_times"),
+        ([0.0, 1.0, np.nan], [0, 3, 8], "segment_onset_times"),
+        ([0.0, 0.002, 1.0], [0, 3, 8], "Segment 1 starts before the end of segment 0"),
+    ],
+)
+def test_invalid_segment_index(onsets, start_indices, match):
+    """Test that malformed segment indices are rejected instead of returning the wrong segments."""
+    segmented_series = SegmentedAcousticWaveformSeries(
+        name="triggered_recording",
+        data=np.ones(10),
+        rate=1000.0,
+        segment_onset_times=onsets,
+        segment_start_indices=start_indices,
+        description="triggered microphone recording",
+    )
+    for check in (validate_segments, get_segment_times, read_segments):
+        with pytest.raises(ValueError, match=match):
+            check(segmented_series)
+
+
+def test_validate_segments_allows_contiguous_segments():
+    segmented_series = SegmentedAcousticWaveformSeries(
+        name="triggered_recording",
+        data=np.ones(10),
+        rate=1000.0,
+        segment_onset_times=[0.0, 0.003, 0.008],
+        segment_start_indices=[0, 3, 8],
+        description="triggered microphone recording",
+    )
+    validate_segments(segmented_series)
+    assert len(read_segments(segmented_series)) == 3
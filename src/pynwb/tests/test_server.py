@@ -0,0 +1,204 @@
+"""Tests for the local tile server."""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import numpy as np
+import pytest
+from pynwb import NWBHDF5IO
+from pynwb.testing.mock.file import mock_NWBFile
+
+from ndx_sound.profiling import profile
+from ndx_sound.segments import get_segment_times
+from ndx_sound.server import TileServer, _waveform_columns, compute_tile_overview, get_max_zoom, render_tile
+from ndx_sound.testing.mock import mock_AcousticWaveformSeries, mock_SegmentedAcousticWaveformSeries
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+@pytest.fixture
+def nwb_path(tmp_path):
+    nwbfile = mock_NWBFile()
+    nwbfile.add_acquisition(mock_AcousticWaveformSeries(name="microphone", data_shape=(200000, 2), rate=20000.0))
+    nwbfile.add_acquisition(mock_SegmentedAcousticWaveformSeries(name="triggered"))
+    path = tmp_path / "recording.nwb"
+    with NWBHDF5IO(str(path), mode="w") as io:
+        io.write(nwbfile)
+    return path
+
+
+@pytest.fixture
+def server(nwb_path, tmp_path):
+    with TileServer(
+        nwb_path, ("127.0.0.1", 0), cache_dir=str(tmp_path / "cache"), max_workers=2, use_processes=False
+    ) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield server
+        server.shutdown()
+        thread.join()
+
+
+def test_render_tile():
+    acoustic_waveform_series = mock_AcousticWaveformSeries(data_shape=(100000,), rate=10000.0)
+    overview = compute_tile_overview(acoustic_waveform_series, n_fft=256, n_bins=500)
+    assert overview.bin_duration * 10000.0 >= 256
+    max_zoom = get_max_zoom(acoustic_waveform_series, 128)
+    assert max_zoom == 9
+    # tiles from the overview and from the samples
+    for zoom in (0, max_zoom):
+        for kind in ("waveform", "spectrogram"):
+            tile = render_tile(
+                acoustic_waveform_series, kind, zoom, 0, width=128, height=64, n_fft=256, overview=overview
+            )
+            assert tile.startswith(PNG_SIGNATURE)
+
+    with pytest.raises(ValueError):
+        render_tile(acoustic_waveform_series, "sonogram", 0, 0, overview=overview)
+
+
+def test_render_tile_caches_overview():
+    """Test that tiles rendered without an overview compute it once per series."""
+    acoustic_waveform_series = mock_AcousticWaveformSeries(data_shape=(100000,), rate=10000.0)
+    with profile() as profiler:
+        for index in range(4):
+            render_tile(acoustic_waveform_series, "waveform", 2, index, width=128, height=64, n_fft=256)
+    summary = {entry["stage"]: entry for entry in profiler.summary()}
+    assert summary["compute_overview"]["calls"] == 1
+    assert summary["render_tile"]["calls"] == 4
+
+
+def test_render_segmented_tile_from_overview():
+    """Test that coarse tiles of segmented series are rendered from the overview, blank in the gaps."""
+    segmented_series = mock_SegmentedAcousticWaveformSeries()
+    overview = compute_tile_overview(segmented_series, n_fft=256)
+    onsets, offsets = get_segment_times(segmented_series)
+    # the bins span the segments and the gaps between them
+    assert overview.bin_times[0] == onsets[0]
+    assert overview.bin_times[-1] < offsets[-1] <= overview.bin_times[-1] + overview.bin_duration
+    assert np.isnan(overview.envelope_min).any()
+
+    with profile() as profiler:
+        for kind in ("waveform", "spectrogram"):
+            tile = render_tile(segmented_series, kind, 0, 0, width=128, height=64, n_fft=256, overview=overview)
+            assert tile.startswith(PNG_SIGNATURE)
+    summary = {entry["stage"]: entry for entry in profiler.summary()}
+    assert summary["render_tile"]["bytes_read"] == 0
+
+    time_window = (onsets[0], offsets[-1])
+    column_times = np.linspace(*time_window, 128, endpoint=False)
+    in_segment = ((column_times[:, None] >= onsets) & (column_times[:, None] < offsets)).any(axis=1)
+    column_min, _ = _waveform_columns(segmented_series, time_window, 128, overview)
+    assert np.isfinite(column_min[in_segment]).all()
+    # columns that end before the next segment starts are blank
+    column_ends = column_times + np.diff(time_window)[0] / 128
+    in_gap = ((column_times[:, None] >= offsets[:-1]) & (column_ends[:, None] <= onsets[1:])).any(axis=1)
+    assert in_gap.sum() > 100
+    assert np.isnan(column_min[in_gap]).all()
+
+
+def test_tile_server(server):
+    with urlopen(server.url + "series") as response:
+        series = {entry["name"]: entry for entry in json.load(response)}
+    assert set(series) == {"microphone", "triggered"}
+    assert series["microphone"]["duration"] == 10.0
+    assert series["microphone"]["n_channels"] == 2
+    assert series["triggered"]["segmented"]
+
+    for entry in series.values():
+        for kind in ("waveform", "spectrogram"):
+            url = f"{server.url}tiles/{entry['object_id']}/{kind}/{entry['max_zoom']}/0.png"
+            with urlopen(url) as response:
+                assert response.headers["Content-Type"] == "image/png"
+                assert response.headers["Cache-Control"].startswith("public")
+                etag = response.headers["ETag"]
+                body = response.read()
+            assert body.startswith(PNG_SIGNATURE)
+
+            # revalidation does not send the tile again
+            with pytest.raises(HTTPError) as error:
+                urlopen(Request(url, headers={"If-None-Match": etag}))
+            assert error.value.code == 304
+
+            # the second request is served from the cache
+            with urlopen(url) as response:
+                assert response.read() == body
+
+    object_id = series["microphone"]["object_id"]
+    for path in (
+        f"tiles/{object_id}/waveform/{series['microphone']['max_zoom'] + 1}/0.png",
+        f"tiles/{object_id}/waveform/1/2.png",
+        f"tiles/{object_id}/sonogram/0/0.png",
+        "tiles/unknown/waveform/0/0.png",
+    ):
+        with pytest.raises(HTTPError) as error:
+            urlopen(server.url + path)
+        assert error.value.code == 404
+
+
+def test_tile_server_concurrent_requests(server):
+    """Test that concurrent requests of the same tiles return the same images."""
+    object_id = next(entry["object_id"] for entry in server.series if entry["name"] == "microphone")
+    urls = [f"{server.url}tiles/{object_id}/spectrogram/2/{index % 4}.png" for index in range(16)]
+
+    def fetch(url):
+        with urlopen(url) as response:
+            return response.read()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        bodies = list(executor.map(fetch, urls))
+    for index, body in enumerate(bodies):
+        assert body == bodies[index % 4]
+    assert len(set(bodies)) == 4
+    assert not server._pending
+
+
+def test_tile_server_invalidation(nwb_path, tmp_path):
+    """Test that the cache is keyed by the tile geometry."""
+    kwargs = dict(server_address=("127.0.0.1", 0), cache_dir=str(tmp_path / "cache"), use_processes=False)
+    with TileServer(nwb_path, **kwargs) as small, TileServer(nwb_path, tile_width=256, **kwargs) as large:
+        assert small.version != large.version
+        assert np.all([entry["tile_width"] == 256 for entry in large.series])
+
+
+def test_tile_server_processes_compute_overview_once(nwb_path, tmp_path):
+    """Test that concurrent requests to a cold cache compute the overview of each series once."""
+    with TileServer(
+        nwb_path, ("127.0.0.1", 0), cache_dir=str(tmp_path / "cache"), max_workers=2, use_processes=True
+    ) as server:
+        submitted = []
+        submit = server.executor.submit
+
+        def record_submit(function, *args):
+            submitted.append((function.__name__, args))
+            return submit(function, *args)
+
+        server.executor.submit = record_submit
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            urls = [
+                f"{server.url}tiles/{entry['object_id']}/{kind}/{zoom}/0.png"
+                for entry in server.series
+                for kind in ("waveform", "spectrogram")
+                for zoom in (0, entry["max_zoom"])
+            ]
+
+            def fetch(url):
+                with urlopen(url) as response:
+                    return response.read()
+
+            with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+                bodies = list(executor.map(fetch, urls))
+        finally:
+            server.shutdown()
+            thread.join()
+
+    assert all(body.startswith(PNG_SIGNATURE) for body in bodies)
+    overviews = sorted(args for name, args in submitted if name == "_compute_worker_overview")
+    assert overviews == sorted((entry["object_id"],) for entry in server.series)
+    for entry in server.series:
+        assert (tmp_path / "cache" / server.version / entry["object_id"] / "overview.npz").exists()
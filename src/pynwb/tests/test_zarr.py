@@ -0,0 +1,71 @@
+"""Tests for writing and reading AcousticWaveformSeries with the Zarr backend."""
+
+import numpy as np
+import pytest
+from pynwb import NWBHDF5IO
+from pynwb.testing.mock.file import mock_NWBFile
+
+from ndx_sound.features import compute_features
+from ndx_sound.io import get_audio_chunk_shape, wrap_data
+from ndx_sound.testing.mock import mock_AcousticWaveformSeries, mock_lazy_AcousticWaveformSeries
+from ndx_sound.utils import read_samples, read_window
+
+hdmf_zarr = pytest.importorskip("hdmf_zarr", reason="hdmf-zarr not installed")
+
+
+def test_get_audio_chunk_shape():
+    assert get_audio_chunk_shape((10**7,), "int16", chunk_mb=1.0) == (2**18,)
+    assert get_audio_chunk_shape((10**7, 2), "float32", chunk_mb=1.0) == (2**16, 2)
+    assert get_audio_chunk_shape((1000, 2), "int16") == (1000, 2)
+
+
+def test_zarr_roundtrip(tmp_path):
+    """Test writing and reading an AcousticWaveformSeries with NWBZarrIO and an audio chunk layout."""
+    rng = np.random.default_rng(seed=0)
+    data = rng.integers(-1000, 1000, size=(100000, 2), dtype="int16")
+    nwbfile = mock_NWBFile()
+    nwbfile.add_stimulus(
+        mock_AcousticWaveformSeries(name="stimulus", data=wrap_data(data, backend="zarr", chunk_mb=0.05))
+    )
+
+    test_path = tmp_path / "test.nwb.zarr"
+    with hdmf_zarr.NWBZarrIO(str(test_path), mode="w") as io:
+        io.write(nwbfile)
+
+    with hdmf_zarr.NWBZarrIO(str(test_path), mode="r") as io:
+        read_nwbfile = io.read()
+        acoustic_waveform_series = read_nwbfile.stimulus["stimulus"]
+        assert acoustic_waveform_series.rate == 42000.0
+        assert acoustic_waveform_series.data.chunks == (8192, 2)
+        np.testing.assert_array_equal(acoustic_waveform_series.data[:], data)
+
+        window = read_window(acoustic_waveform_series.data, 1234, 56789, max_workers=4)
+        np.testing.assert_array_equal(window, data[1234:56789])
+        np.testing.assert_array_equal(read_samples(acoustic_waveform_series, 5, 20000, max_workers=4), data[5:20000])
+
+
+def test_zarr_lazy_write_and_parallel_features(tmp_path):
+    """Test writing a lazily generated series to Zarr and computing features with parallel reads."""
+    nwbfile = mock_NWBFile()
+    acoustic_waveform_series = mock_lazy_AcousticWaveformSeries(duration=4.0, rate=8000.0, chunk_size=4096)
+    acoustic_waveform_series.fields["data"] = wrap_data(acoustic_waveform_series.data, backend="zarr")
+    nwbfile.add_acquisition(acoustic_waveform_series)
+
+    zarr_path = tmp_path / "test.nwb.zarr"
+    with hdmf_zarr.NWBZarrIO(str(zarr_path), mode="w") as io:
+        io.write(nwbfile)
+
+    hdf5_path = tmp_path / "test.nwb"
+    nwbfile = mock_NWBFile()
+    nwbfile.add_acquisition(mock_lazy_AcousticWaveformSeries(duration=4.0, rate=8000.0, chunk_size=4096))
+    with NWBHDF5IO(hdf5_path, mode="w") as io:
+        io.write(nwbfile)
+
+    with hdmf_zarr.NWBZarrIO(str(zarr_path), mode="r") as zarr_io, NWBHDF5IO(hdf5_path, mode="r") as hdf5_io:
+        zarr_series = zarr_io.read().acquisition[acoustic_waveform_series.name]
+        hdf5_series = hdf5_io.read().acquisition[acoustic_waveform_series.name]
+        np.testing.assert_array_equal(zarr_series.data[:], hdf5_series.data[:])
+
+        zarr_features = compute_features(zarr_series, features=["stft"], chunk_size=10000, max_workers=4)
+        hdf5_features = compute_features(hdf5_series, features=["stft"], chunk_size=10000, max_workers=4)
+        np.testing.assert_array_equal(zarr_features.features["stft"], hdf5_features.features["stft"])
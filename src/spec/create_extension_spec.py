@@ -10,7 +10,7 @@ def main():
     ns_builder = NWBNamespaceBuilder(
         doc="""Represent acoustic stimuli and responses""",
         name="""ndx-sound""",
-        version="""0.1.0""",
+        version="""0.3.0""",
         author=list(map(str.strip, """Ben Dichter""".split(','))),
         contact=list(map(str.strip, """ben.dichter@catalystneuro.com""".split(',')))
     )
@@ -24,6 +24,33 @@ def main():
 
     # see https://pynwb.readthedocs.io/en/latest/extensions.html#extending-nwb
     # for more information
+    acoustic_waveform_preview = NWBGroupSpec(
+        neurodata_type_def='AcousticWaveformPreview',
+        neurodata_type_inc='TimeSeries',
+        doc=(
+            "low-bitrate mono version of an acoustic series for quick playback and browsing. data "
+            "holds 8-bit mu-law codes; decoded to [-1, 1] and multiplied by conversion, they give "
+            "the waveform in the units of the full-resolution series."
+        ),
+        datasets=[
+            NWBDatasetSpec(
+                name="data",
+                doc="8-bit mu-law codes of the downsampled waveform, mixed down to mono",
+                dtype='uint8',
+                shape=(None,),
+                dims=("time",),
+                attributes=[
+                    NWBAttributeSpec(
+                        name="unit",
+                        doc="SI unit of data",
+                        dtype="text",
+                        value="n.a.",
+                    )
+                ]
+            ),
+        ],
+    )
+
     acoustic_waveform_series = NWBGroupSpec(
         neurodata_type_def='AcousticWaveformSeries',
         neurodata_type_inc='TimeSeries',
@@ -45,9 +72,51 @@ def main():
                 ]
             ),
         ],
+        groups=[
+            NWBGroupSpec(
+                name="preview",
+                neurodata_type_inc='AcousticWaveformPreview',
+                doc="low-bitrate version of the data for quick playback and browsing",
+                quantity='?',
+            ),
+        ],
+    )
+
+    segmented_acoustic_waveform_series = NWBGroupSpec(
+        neurodata_type_def='SegmentedAcousticWaveformSeries',
+        neurodata_type_inc='AcousticWaveformSeries',
+        doc=(
+            "acoustic series recorded in separate active segments, e.g. by a triggered recording "
+            "setup. The samples of all segments are concatenated in data, in time order, and the "
+            "time between segments is not stored. rate is the sampling rate within each segment."
+        ),
+        datasets=[
+            NWBDatasetSpec(
+                name="segment_onset_times",
+                doc="time of the first sample of each segment, in seconds, in increasing order",
+                dtype='float64',
+                shape=(None,),
+                dims=("num_segments",),
+                attributes=[
+                    NWBAttributeSpec(
+                        name="unit",
+                        doc="unit of the times, fixed to seconds",
+                        dtype="text",
+                        value="seconds",
+                    )
+                ]
+            ),
+            NWBDatasetSpec(
+                name="segment_start_indices",
+                doc="index in data of the first sample of each segment, in increasing order",
+                dtype='uint64',
+                shape=(None,),
+                dims=("num_segments",),
+            ),
+        ],
     )
 
-    new_data_types = [acoustic_waveform_series]
+    new_data_types = [acoustic_waveform_preview, acoustic_waveform_series, segmented_acoustic_waveform_series]
 
     # export the spec to yaml files in the spec folder
     output_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'spec'))